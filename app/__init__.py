@@ -1,3 +1,2 @@
-from .main import app
-from .weaviate_operations import WeaviateOperations
-from .minio_operations import load_documents_from_minio
\ No newline at end of file
+# The app runs from this directory (`uvicorn main:app`, see the Dockerfile), with `lib`
+# and `bench` as top-level packages, so nothing is imported through this package.
@@ -0,0 +1,87 @@
+import itertools
+import random
+from typing import Iterator, List, Tuple
+
+import numpy as np
+
+# Defaults for generated corpora; overridable per call (see bench.scenarios.SIZES).
+DEFAULT_VOCABULARY_SIZE = 5000
+DEFAULT_DOCUMENT_BYTES = 4096
+DEFAULT_SIZE_SPREAD = 0.5
+
+
+def vocabulary(size: int = DEFAULT_VOCABULARY_SIZE, seed: int = 0) -> List[str]:
+    """
+    Pronounceable pseudo-words, the same list for the same seed.
+    """
+    rng = random.Random(seed)
+    consonants, vowels = "bcdfghklmnprstvz", "aeiou"
+    words = set()
+    while len(words) < size:
+        words.add("".join(rng.choice(consonants) + rng.choice(vowels) for _ in range(rng.randint(1, 4))))
+    # Sorted first for a stable order, then shuffled so word frequency does not follow the alphabet
+    words = sorted(words)
+    rng.shuffle(words)
+    return words
+
+
+def markdown_document(rng: random.Random, words: List[str], size: int) -> str:
+    """
+    A markdown document of about `size` bytes: a title, sections with paragraphs and lists.
+    Word frequencies are Zipf-like, as in natural text, so embeddings and chunking see
+    realistic repetition.
+    """
+    cumulative = list(itertools.accumulate(1.0 / (rank + 1) for rank in range(len(words))))
+
+    def sentence(length: int) -> str:
+        return " ".join(rng.choices(words, cum_weights=cumulative, k=length)).capitalize() + "."
+
+    parts = [f"# {sentence(rng.randint(3, 7))[:-1]}\n"]
+    written = len(parts[0])
+    while written < size:
+        if rng.random() < 0.15:
+            block = f"\n## {sentence(rng.randint(2, 5))[:-1]}\n"
+        elif rng.random() < 0.2:
+            block = "\n" + "".join(f"- {sentence(rng.randint(4, 10))}\n" for _ in range(rng.randint(2, 5)))
+        else:
+            block = "\n" + " ".join(sentence(rng.randint(6, 20)) for _ in range(rng.randint(2, 6))) + "\n"
+        parts.append(block)
+        written += len(block)
+    return "".join(parts)
+
+
+def generate_corpus(
+    count: int,
+    document_bytes: int = DEFAULT_DOCUMENT_BYTES,
+    seed: int = 0,
+    size_spread: float = DEFAULT_SIZE_SPREAD,
+    prefix: str = "docs/",
+) -> Iterator[Tuple[str, bytes]]:
+    """
+    Yield `count` (key, markdown bytes) pairs with sizes uniformly within `size_spread` of
+    `document_bytes`. The corpus depends only on its arguments, so runs are comparable.
+    """
+    rng = random.Random(seed)
+    words = vocabulary(seed=seed)
+    for index in range(count):
+        size = max(64, int(document_bytes * rng.uniform(1 - size_spread, 1 + size_spread)))
+        yield f"{prefix}{index:08d}.md", markdown_document(rng, words, size).encode("utf-8")
+
+
+def populate_bucket(server, bucket: str, corpus: Iterator[Tuple[str, bytes]]) -> Tuple[int, int]:
+    """
+    Store a corpus in a `FakeS3Server` bucket directly (no HTTP); returns (objects, bytes).
+    """
+    objects = total = 0
+    for key, data in corpus:
+        server.put(bucket, key, data, content_type="text/markdown")
+        objects += 1
+        total += len(data)
+    return objects, total
+
+
+def binary_payload(size: int, seed: int = 0) -> bytes:
+    """
+    Incompressible bytes for transfer benchmarks.
+    """
+    return np.random.default_rng(seed).bytes(size)
@@ -0,0 +1,57 @@
+import asyncio
+import random
+import threading
+import time
+from typing import Any, List, Optional
+
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage, BaseMessage
+from langchain_core.outputs import ChatGeneration, ChatResult
+
+
+class FakeChatModel(BaseChatModel):
+    """
+    Chat model stand-in with a configurable response time: `latency` seconds per call plus
+    up to `jitter` seconds of uniform noise, and `seconds_per_token` for every output
+    token (words of the reply). The reply echoes the tail of the last message, so
+    document processing keeps realistic output sizes.
+    """
+
+    latency: float = 0.05
+    jitter: float = 0.0
+    seconds_per_token: float = 0.0
+    max_reply_words: int = 200
+    seed: Optional[int] = None
+    calls: int = 0
+
+    class Config:
+        underscore_attrs_are_private = True
+
+    _lock: Any = None
+    _random: Any = None
+
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self._lock = threading.Lock()
+        self._random = random.Random(self.seed)
+
+    @property
+    def _llm_type(self) -> str:
+        return "fake-chat"
+
+    def _reply(self, messages: List[BaseMessage]):
+        words = str(messages[-1].content).split()[-self.max_reply_words:] if messages else []
+        with self._lock:
+            self.calls += 1
+            delay = self.latency + self._random.uniform(0, self.jitter) + self.seconds_per_token * len(words)
+        return ChatResult(generations=[ChatGeneration(message=AIMessage(content=" ".join(words)))]), delay
+
+    def _generate(self, messages: List[BaseMessage], stop: Optional[List[str]] = None, run_manager=None, **kwargs) -> ChatResult:
+        result, delay = self._reply(messages)
+        time.sleep(delay)
+        return result
+
+    async def _agenerate(self, messages: List[BaseMessage], stop: Optional[List[str]] = None, run_manager=None, **kwargs) -> ChatResult:
+        result, delay = self._reply(messages)
+        await asyncio.sleep(delay)
+        return result
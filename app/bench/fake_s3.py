@@ -0,0 +1,215 @@
+import hashlib
+import threading
+import time
+import uuid as uuid_lib
+import xml.etree.ElementTree as ET
+from email.utils import formatdate
+from typing import Dict, NamedTuple
+from urllib.parse import parse_qs, quote, unquote, urlsplit
+from xml.sax.saxutils import escape
+
+from .fake_http import FakeHTTPServer
+
+S3_NAMESPACE = "http://s3.amazonaws.com/doc/2006-03-01/"
+MAX_KEYS = 1000
+
+
+class StoredObject(NamedTuple):
+    data: bytes
+    etag: str
+    last_modified: float
+    content_type: str
+    metadata: Dict[str, str]
+
+
+def _iso(timestamp: float) -> str:
+    return time.strftime("%Y-%m-%dT%H:%M:%S.000Z", time.gmtime(timestamp))
+
+
+def _xml(root: str, body: str) -> bytes:
+    return f'<?xml version="1.0" encoding="UTF-8"?><{root} xmlns="{S3_NAMESPACE}">{body}</{root}>'.encode("utf-8")
+
+
+class FakeS3Server(FakeHTTPServer):
+    """
+    In-memory S3 endpoint speaking the subset of the protocol minio-py uses here: bucket
+    location/exists/create, ListObjectsV2, GET (ranges, If-Match), HEAD, PUT, DELETE,
+    multi-object delete and multipart uploads. Signatures are not checked.
+    """
+
+    def __init__(self, latency: float = 0.0):
+        super().__init__(latency)
+        self.buckets: Dict[str, Dict[str, StoredObject]] = {}
+        self.uploads = {}
+        self._lock = threading.Lock()
+
+    @property
+    def endpoint(self) -> str:
+        return f"{self.host}:{self.port}"
+
+    def put(self, bucket: str, key: str, data: bytes, content_type: str = "application/octet-stream", metadata=None):
+        """
+        Store an object directly, bypassing HTTP (used to seed corpora quickly).
+        """
+        stored = StoredObject(data, hashlib.md5(data).hexdigest(), time.time(), content_type, dict(metadata or {}))
+        with self._lock:
+            self.buckets.setdefault(bucket, {})[key] = stored
+        return stored
+
+    def handle(self, request):
+        parts = urlsplit(request.path)
+        query = {name: values[0] for name, values in parse_qs(parts.query, keep_blank_values=True).items()}
+        path = unquote(parts.path).lstrip("/")
+        bucket, _, key = path.partition("/")
+        method = request.command
+        if not bucket:
+            return self._list_buckets()
+        if not key:
+            if "location" in query:
+                return 200, {}, _xml("LocationConstraint", "")
+            if method == "HEAD":
+                return (200, {}, b"") if bucket in self.buckets else (404, {}, b"")
+            if method == "PUT":
+                with self._lock:
+                    self.buckets.setdefault(bucket, {})
+                return 200, {"Location": f"/{bucket}"}, b""
+            if method == "POST" and "delete" in query:
+                return self._delete_objects(bucket, request.body)
+            if method == "GET":
+                return self._list_objects(bucket, query)
+            return self._error(405, "MethodNotAllowed", path)
+        if bucket not in self.buckets:
+            return self._error(404, "NoSuchBucket", path)
+        if method == "POST" and "uploads" in query:
+            return self._create_upload(bucket, key, request.headers)
+        if "uploadId" in query:
+            return self._multipart(method, bucket, key, query, request.body)
+        if method == "PUT":
+            stored = self.put(bucket, key, request.body, request.headers.get("Content-Type", "application/octet-stream"),
+                              self._metadata(request.headers))
+            return 200, {"ETag": f'"{stored.etag}"'}, b""
+        if method == "DELETE":
+            with self._lock:
+                self.buckets[bucket].pop(key, None)
+            return 204, {}, b""
+        stored = self.buckets[bucket].get(key)
+        if stored is None:
+            return self._error(404, "NoSuchKey", path)
+        if_match = request.headers.get("If-Match")
+        if if_match and if_match.strip('"') != stored.etag:
+            return self._error(412, "PreconditionFailed", path)
+        headers = {
+            "ETag": f'"{stored.etag}"',
+            "Last-Modified": formatdate(stored.last_modified, usegmt=True),
+            "Content-Type": stored.content_type,
+            "Accept-Ranges": "bytes",
+        }
+        headers.update({f"x-amz-meta-{name}": value for name, value in stored.metadata.items()})
+        if method == "HEAD":
+            headers["Content-Length"] = str(len(stored.data))
+            return 200, headers, None
+        byte_range = request.headers.get("Range")
+        if byte_range:
+            start, _, end = byte_range.split("=", 1)[1].partition("-")
+            start, end = int(start), min(int(end) if end else len(stored.data) - 1, len(stored.data) - 1)
+            headers["Content-Range"] = f"bytes {start}-{end}/{len(stored.data)}"
+            return 206, headers, stored.data[start:end + 1]
+        return 200, headers, stored.data
+
+    @staticmethod
+    def _metadata(headers) -> Dict[str, str]:
+        return {name[len("x-amz-meta-"):].lower(): value for name, value in headers.items()
+                if name.lower().startswith("x-amz-meta-")}
+
+    @staticmethod
+    def _error(status: int, code: str, resource: str):
+        body = (f'<?xml version="1.0" encoding="UTF-8"?><Error><Code>{code}</Code><Message>{code}</Message>'
+                f"<Resource>/{escape(resource)}</Resource><RequestId>fake</RequestId><HostId>fake</HostId></Error>")
+        return status, {"Content-Type": "application/xml"}, body.encode("utf-8")
+
+    def _list_buckets(self):
+        buckets = "".join(f"<Bucket><Name>{escape(name)}</Name><CreationDate>{_iso(0)}</CreationDate></Bucket>"
+                          for name in sorted(self.buckets))
+        return 200, {}, _xml("ListAllMyBucketsResult", f"<Owner><ID>fake</ID></Owner><Buckets>{buckets}</Buckets>")
+
+    def _list_objects(self, bucket: str, query: dict):
+        if bucket not in self.buckets:
+            return self._error(404, "NoSuchBucket", bucket)
+        prefix = query.get("prefix", "")
+        after = query.get("continuation-token") or query.get("start-after") or ""
+        max_keys = min(int(query.get("max-keys") or MAX_KEYS), MAX_KEYS)
+        url_encoded = query.get("encoding-type") == "url"
+        with self._lock:
+            keys = sorted(key for key in self.buckets[bucket] if key.startswith(prefix) and key > after)
+            page = [(key, self.buckets[bucket][key]) for key in keys[:max_keys]]
+        truncated = len(keys) > max_keys
+        contents = "".join(
+            f"<Contents><Key>{escape(quote(key) if url_encoded else key)}</Key>"
+            f"<LastModified>{_iso(stored.last_modified)}</LastModified><ETag>&quot;{stored.etag}&quot;</ETag>"
+            f"<Size>{len(stored.data)}</Size><StorageClass>STANDARD</StorageClass></Contents>"
+            for key, stored in page
+        )
+        body = (f"<Name>{escape(bucket)}</Name><Prefix>{escape(prefix)}</Prefix><KeyCount>{len(page)}</KeyCount>"
+                f"<MaxKeys>{max_keys}</MaxKeys><IsTruncated>{'true' if truncated else 'false'}</IsTruncated>")
+        if url_encoded:
+            body += "<EncodingType>url</EncodingType>"
+        if truncated:
+            body += f"<NextContinuationToken>{escape(page[-1][0])}</NextContinuationToken>"
+        return 200, {}, _xml("ListBucketResult", body + contents)
+
+    def _delete_objects(self, bucket: str, payload: bytes):
+        root = ET.fromstring(payload)
+        keys = [element.text for element in root.iter() if element.tag.endswith("Key")]
+        with self._lock:
+            for key in keys:
+                self.buckets.get(bucket, {}).pop(key, None)
+        deleted = "".join(f"<Deleted><Key>{escape(key)}</Key></Deleted>" for key in keys)
+        return 200, {}, _xml("DeleteResult", deleted)
+
+    def _create_upload(self, bucket: str, key: str, headers):
+        upload_id = uuid_lib.uuid4().hex
+        with self._lock:
+            self.uploads[upload_id] = {"bucket": bucket, "key": key, "parts": {},
+                                       "content_type": headers.get("Content-Type", "application/octet-stream"),
+                                       "metadata": self._metadata(headers)}
+        body = f"<Bucket>{escape(bucket)}</Bucket><Key>{escape(key)}</Key><UploadId>{upload_id}</UploadId>"
+        return 200, {}, _xml("InitiateMultipartUploadResult", body)
+
+    def _multipart(self, method: str, bucket: str, key: str, query: dict, payload: bytes):
+        upload = self.uploads.get(query["uploadId"])
+        if upload is None:
+            return self._error(404, "NoSuchUpload", f"{bucket}/{key}")
+        if method == "PUT":
+            etag = hashlib.md5(payload).hexdigest()
+            with self._lock:
+                upload["parts"][int(query["partNumber"])] = (payload, etag, time.time())
+            return 200, {"ETag": f'"{etag}"'}, b""
+        if method == "GET":
+            marker = int(query.get("part-number-marker") or 0)
+            with self._lock:
+                parts = sorted((number, part) for number, part in upload["parts"].items() if number > marker)
+            listed = "".join(
+                f"<Part><PartNumber>{number}</PartNumber><LastModified>{_iso(modified)}</LastModified>"
+                f"<ETag>&quot;{etag}&quot;</ETag><Size>{len(data)}</Size></Part>"
+                for number, (data, etag, modified) in parts
+            )
+            body = (f"<Bucket>{escape(bucket)}</Bucket><Key>{escape(key)}</Key><UploadId>{query['uploadId']}</UploadId>"
+                    f"<IsTruncated>false</IsTruncated>{listed}")
+            return 200, {}, _xml("ListPartsResult", body)
+        if method == "DELETE":
+            with self._lock:
+                self.uploads.pop(query["uploadId"], None)
+            return 204, {}, b""
+        root = ET.fromstring(payload)
+        numbers = [int(element.text) for element in root.iter() if element.tag.endswith("PartNumber")]
+        with self._lock:
+            self.uploads.pop(query["uploadId"], None)
+        data = b"".join(upload["parts"][number][0] for number in numbers)
+        stored = self.put(bucket, key, data, upload["content_type"], upload["metadata"])
+        etag = hashlib.md5(b"".join(bytes.fromhex(upload["parts"][number][1]) for number in numbers)).hexdigest()
+        # Keep the multipart-style ETag, as S3 does
+        with self._lock:
+            self.buckets[bucket][key] = stored._replace(etag=f"{etag}-{len(numbers)}")
+        body = (f"<Location>/{escape(bucket)}/{escape(key)}</Location><Bucket>{escape(bucket)}</Bucket>"
+                f"<Key>{escape(key)}</Key><ETag>&quot;{etag}-{len(numbers)}&quot;</ETag>")
+        return 200, {}, _xml("CompleteMultipartUploadResult", body)
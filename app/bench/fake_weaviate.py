@@ -0,0 +1,308 @@
+import fnmatch
+import json
+import re
+import threading
+import uuid as uuid_lib
+from typing import Dict, List, Optional
+from urllib.parse import urlsplit
+
+import numpy as np
+
+from .fake_http import FakeHTTPServer
+
+FAKE_VERSION = "1.24.0"
+
+_TOKEN = re.compile(r'\s*(?:(?P<string>"(?:[^"\\]|\\.)*")|(?P<number>-?\d+(?:\.\d+)?(?:[eE][-+]?\d+)?)|(?P<name>[A-Za-z_][A-Za-z0-9_]*)|(?P<punct>[{}\[\]():,]))')
+
+
+class _GraphQL:
+    """
+    Recursive-descent reader for the GraphQL Get queries the app renders: argument
+    objects, lists, strings, numbers and bare enum names.
+    """
+
+    def __init__(self, text: str):
+        self.tokens = []
+        position = 0
+        text = text.rstrip()
+        while position < len(text):
+            match = _TOKEN.match(text, position)
+            if match is None:
+                raise ValueError(f"Cannot parse query near {text[position:position + 20]!r}")
+            kind = match.lastgroup
+            self.tokens.append((kind, match.group(kind)))
+            position = match.end()
+        self.position = 0
+
+    def peek(self):
+        return self.tokens[self.position] if self.position < len(self.tokens) else (None, None)
+
+    def take(self, expected: Optional[str] = None) -> str:
+        kind, value = self.peek()
+        if expected is not None and value != expected:
+            raise ValueError(f"Expected {expected!r}, got {value!r}")
+        self.position += 1
+        return value
+
+    def value(self):
+        kind, token = self.peek()
+        if token == "{":
+            return self.fields("{", "}")
+        if token == "[":
+            self.take()
+            items = []
+            while self.peek()[1] != "]":
+                items.append(self.value())
+                if self.peek()[1] == ",":
+                    self.take()
+            self.take("]")
+            return items
+        self.take()
+        if kind == "string":
+            return json.loads(token)
+        if kind == "number":
+            return float(token) if any(c in token for c in ".eE") else int(token)
+        return {"true": True, "false": False, "null": None}.get(token, token)
+
+    def fields(self, opening: str, closing: str) -> dict:
+        self.take(opening)
+        result = {}
+        while self.peek()[1] != closing:
+            name = self.take()
+            self.take(":")
+            result[name] = self.value()
+            if self.peek()[1] == ",":
+                self.take()
+        self.take(closing)
+        return result
+
+    def selection(self) -> dict:
+        # {a b _additional { id vector }} -> {"a": None, "b": None, "_additional": {"id": None, ...}}
+        self.take("{")
+        result = {}
+        while self.peek()[1] != "}":
+            name = self.take()
+            result[name] = self.selection() if self.peek()[1] == "{" else None
+        self.take("}")
+        return result
+
+
+def parse_get(query: str):
+    """
+    Parse `{Get{Class(arguments){selection}}}` into (class, arguments, selection).
+    """
+    reader = _GraphQL(query)
+    reader.take("{")
+    reader.take("Get")
+    reader.take("{")
+    class_name = reader.take()
+    arguments = reader.fields("(", ")") if reader.peek()[1] == "(" else {}
+    return class_name, arguments, reader.selection()
+
+
+def _matches(where: dict, properties: dict) -> bool:
+    operator = where["operator"]
+    if operator == "And":
+        return all(_matches(operand, properties) for operand in where["operands"])
+    if operator == "Or":
+        return any(_matches(operand, properties) for operand in where["operands"])
+    expected = next(value for key, value in where.items() if key.startswith("value"))
+    actual = properties.get(where["path"][-1])
+    if operator == "IsNull":
+        return (actual is None) == expected
+    if actual is None:
+        return operator == "NotEqual"
+    if operator == "Equal":
+        return actual == expected
+    if operator == "NotEqual":
+        return actual != expected
+    if operator == "Like":
+        return fnmatch.fnmatchcase(str(actual), expected)
+    if operator == "ContainsAny":
+        return bool(set(actual if isinstance(actual, list) else [actual]) & set(expected))
+    return {
+        "GreaterThan": actual > expected,
+        "GreaterThanEqual": actual >= expected,
+        "LessThan": actual < expected,
+        "LessThanEqual": actual <= expected,
+    }[operator]
+
+
+class _Collection:
+    def __init__(self, schema: dict):
+        self.schema = schema
+        self.objects: Dict[str, dict] = {}
+        self._matrix = None
+
+    def put(self, object_id: str, properties: dict, vector):
+        self.objects[object_id] = {"properties": properties, "vector": None if vector is None else list(vector)}
+        self._matrix = None
+
+    def remove(self, object_id: str) -> bool:
+        self._matrix = None
+        return self.objects.pop(object_id, None) is not None
+
+    def search(self, vector) -> List[tuple]:
+        # Brute-force cosine distance; the stacked matrix is rebuilt after writes
+        if self._matrix is None:
+            ids = [object_id for object_id, obj in self.objects.items() if obj["vector"] is not None]
+            matrix = np.asarray([self.objects[object_id]["vector"] for object_id in ids], dtype=np.float32)
+            if len(ids):
+                matrix /= np.maximum(np.linalg.norm(matrix, axis=1, keepdims=True), 1e-12)
+            self._matrix = (ids, matrix)
+        ids, matrix = self._matrix
+        if not ids:
+            return []
+        query = np.asarray(vector, dtype=np.float32)
+        distances = 1.0 - matrix @ (query / max(float(np.linalg.norm(query)), 1e-12))
+        order = np.argsort(distances, kind="stable")
+        return [(ids[i], float(distances[i])) for i in order]
+
+
+class FakeWeaviateServer(FakeHTTPServer):
+    """
+    In-memory Weaviate endpoint covering what weaviate-client v3 and this app use: meta and
+    readiness, schema, batch object writes (upserts) and deletes, object get/head/patch/put/
+    delete and GraphQL Get with where filters, nearVector (brute-force cosine), limit, offset
+    and the `after` cursor. Classes are created on first write when not in the schema.
+    """
+
+    def __init__(self, latency: float = 0.0):
+        super().__init__(latency)
+        self.collections: Dict[str, _Collection] = {}
+        self._lock = threading.RLock()
+
+    @property
+    def url(self) -> str:
+        return f"http://{self.host}:{self.port}"
+
+    def count(self, class_name: str) -> int:
+        with self._lock:
+            collection = self.collections.get(class_name)
+            return len(collection.objects) if collection else 0
+
+    def handle(self, request):
+        path = urlsplit(request.path).path
+        if not path.startswith("/v1/"):
+            return self._json(404, {"error": [{"message": "not found"}]})
+        parts = path[len("/v1/"):].strip("/").split("/")
+        method = request.command
+        if parts[0] == ".well-known":
+            return (200, {}, b"") if parts[1] in ("ready", "live") else (404, {}, b"")
+        if parts[0] == "meta":
+            return self._json(200, {"version": FAKE_VERSION, "hostname": self.url, "modules": {}})
+        body = json.loads(request.body) if request.body else None
+        if parts[0] == "schema":
+            return self._schema(method, parts[1:], body)
+        if parts[0] == "batch" and parts[1:] == ["objects"]:
+            if method == "DELETE":
+                return self._json(200, self._delete_matching(body))
+            return self._json(200, [self._write(obj) for obj in body["objects"]])
+        if parts[0] == "graphql":
+            return self._graphql(body["query"])
+        if parts[0] == "objects":
+            return self._object(method, parts[1:], body)
+        return self._json(404, {"error": [{"message": f"unsupported path {path}"}]})
+
+    @staticmethod
+    def _json(status: int, payload) -> tuple:
+        return status, {"Content-Type": "application/json"}, json.dumps(payload).encode("utf-8")
+
+    def _collection(self, class_name: str) -> _Collection:
+        collection = self.collections.get(class_name)
+        if collection is None:
+            collection = self.collections[class_name] = _Collection({"class": class_name, "properties": []})
+        return collection
+
+    def _schema(self, method: str, parts: List[str], body):
+        with self._lock:
+            if method == "POST":
+                self.collections[body["class"]] = _Collection(body)
+                return self._json(200, body)
+            if not parts:
+                return self._json(200, {"classes": [c.schema for c in self.collections.values()]})
+            if method == "DELETE":
+                self.collections.pop(parts[0], None)
+                return 200, {}, b""
+            collection = self.collections.get(parts[0])
+        if collection is None:
+            return self._json(404, {"error": [{"message": f"class {parts[0]} not found"}]})
+        return self._json(200, collection.schema)
+
+    def _write(self, obj: dict) -> dict:
+        object_id = str(obj.get("id") or uuid_lib.uuid4())
+        with self._lock:
+            self._collection(obj["class"]).put(object_id, obj.get("properties") or {}, obj.get("vector"))
+        return {"class": obj["class"], "id": object_id, "properties": obj.get("properties") or {}, "result": {}}
+
+    def _delete_matching(self, body: dict) -> dict:
+        match = body["match"]
+        with self._lock:
+            collection = self.collections.get(match["class"])
+            matched = [object_id for object_id, obj in (collection.objects.items() if collection else ())
+                       if _matches(match["where"], {**obj["properties"], "id": object_id})]
+            if not body.get("dryRun"):
+                for object_id in matched:
+                    collection.remove(object_id)
+        return {"match": match, "output": body.get("output", "minimal"), "dryRun": bool(body.get("dryRun")),
+                "results": {"matches": len(matched), "limit": 10000, "successful": len(matched), "failed": 0}}
+
+    def _object(self, method: str, parts: List[str], body):
+        if method == "POST" and not parts:
+            return self._json(200, self._write(body))
+        if len(parts) != 2:
+            return self._json(404, {"error": [{"message": "objects are addressed as /objects/{class}/{id}"}]})
+        class_name, object_id = parts
+        with self._lock:
+            collection = self.collections.get(class_name)
+            obj = collection.objects.get(object_id) if collection else None
+            if method == "PUT":
+                self._collection(class_name).put(object_id, body.get("properties") or {}, body.get("vector"))
+                return self._json(200, body)
+            if obj is None:
+                return 404, {}, b""
+            if method == "DELETE":
+                collection.remove(object_id)
+                return 204, {}, b""
+            if method == "PATCH":
+                collection.put(object_id, {**obj["properties"], **(body.get("properties") or {})},
+                               body.get("vector") or obj["vector"])
+                return 204, {}, b""
+        if method == "HEAD":
+            return 204, {}, b""
+        return self._json(200, {"class": class_name, "id": object_id, "properties": obj["properties"], "vector": obj["vector"]})
+
+    def _graphql(self, query: str):
+        try:
+            class_name, arguments, selection = parse_get(query)
+        except (ValueError, KeyError) as e:
+            return self._json(200, {"errors": [{"message": f"fake weaviate: {e}"}]})
+        with self._lock:
+            collection = self.collections.get(class_name)
+            if collection is None:
+                return self._json(200, {"errors": [{"message": f"Cannot query field \"{class_name}\" on type \"GetObjectsObj\"."}]})
+            if "nearVector" in arguments:
+                candidates = collection.search(arguments["nearVector"]["vector"])
+            else:
+                candidates = [(object_id, None) for object_id in sorted(collection.objects)]
+            where = arguments.get("where")
+            if where:
+                candidates = [(object_id, distance) for object_id, distance in candidates
+                              if _matches(where, collection.objects[object_id]["properties"])]
+            after = arguments.get("after")
+            if after:
+                candidates = [(object_id, distance) for object_id, distance in candidates if object_id > after]
+            offset = arguments.get("offset") or 0
+            limit = arguments.get("limit")
+            candidates = candidates[offset:offset + limit if limit else None]
+            additional = selection.get("_additional") or {}
+            results = []
+            for object_id, distance in candidates:
+                obj = collection.objects[object_id]
+                result = {name: obj["properties"].get(name) for name in selection if name != "_additional"}
+                if additional:
+                    result["_additional"] = {key: value for key, value in
+                                             (("id", object_id), ("vector", obj["vector"]), ("distance", distance))
+                                             if key in additional}
+                results.append(result)
+        return self._json(200, {"data": {"Get": {class_name: results}}})
@@ -0,0 +1,60 @@
+import hashlib
+import threading
+import time
+from email.utils import formatdate
+from typing import Dict, NamedTuple, Optional
+from urllib.parse import urlsplit
+
+from .fake_http import FakeHTTPServer
+
+
+class Page(NamedTuple):
+    html: bytes
+    etag: str
+    last_modified: float
+    cache_control: Optional[str]
+
+
+class FakeWebServer(FakeHTTPServer):
+    """
+    Web pages by path with validators: every response carries an ETag, Last-Modified and
+    the page's Cache-Control (if any), and conditional GETs that still match get 304.
+    `conditional` and `not_modified` count revalidations and the 304s among them.
+    """
+
+    def __init__(self, latency: float = 0.0):
+        super().__init__(latency)
+        self.pages: Dict[str, Page] = {}
+        self.conditional = 0
+        self.not_modified = 0
+        self._lock = threading.Lock()
+
+    def url(self, path: str) -> str:
+        return f"http://{self.host}:{self.port}{path}"
+
+    def put(self, path: str, title: str, body: str, cache_control: Optional[str] = None):
+        html = f"<html><head><title>{title}</title></head><body>{body}</body></html>".encode("utf-8")
+        with self._lock:
+            self.pages[path] = Page(html, f'"{hashlib.md5(html).hexdigest()}"', time.time(), cache_control)
+
+    def handle(self, request):
+        with self._lock:
+            page = self.pages.get(urlsplit(request.path).path)
+        if page is None:
+            return 404, {"Content-Type": "text/plain"}, b"not found"
+        headers = {
+            "Content-Type": "text/html; charset=utf-8",
+            "ETag": page.etag,
+            "Last-Modified": formatdate(page.last_modified, usegmt=True),
+            "Date": formatdate(usegmt=True),
+        }
+        if page.cache_control:
+            headers["Cache-Control"] = page.cache_control
+        if_none_match = request.headers.get("If-None-Match")
+        if if_none_match or request.headers.get("If-Modified-Since"):
+            with self._lock:
+                self.conditional += 1
+                if if_none_match == page.etag:
+                    self.not_modified += 1
+                    return 304, headers, b""
+        return 200, headers, page.html
@@ -0,0 +1,244 @@
+import argparse
+import json
+import math
+import os
+import platform
+import resource
+import subprocess
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, List, Optional
+
+from .scenarios import SCENARIOS, SIZES, BenchEnvironment
+
+# Defaults for the runner; overridable on the command line.
+DEFAULT_RESULTS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "results")
+DEFAULT_TOLERANCE = 0.10
+RSS_SAMPLE_INTERVAL = 0.01
+
+
+def percentile(values: List[float], q: float) -> Optional[float]:
+    """
+    Nearest-rank percentile (q in 0..100) of `values`, or None when there are none.
+    """
+    if not values:
+        return None
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, max(0, math.ceil(q / 100 * len(ordered)) - 1))]
+
+
+def current_rss() -> int:
+    """
+    Resident set size of this process in bytes.
+    """
+    try:
+        with open("/proc/self/statm", "r") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except OSError:
+        # No procfs (macOS): fall back to the lifetime peak, reported in bytes there
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+
+class RssSampler:
+    """
+    Samples RSS on a background thread and keeps the peak, so each scenario gets its own
+    peak rather than the process lifetime maximum that getrusage reports.
+    """
+
+    def __init__(self, interval: float = RSS_SAMPLE_INTERVAL):
+        self.interval = interval
+        self.start_rss = 0
+        self.peak = 0
+        self._stop = threading.Event()
+        self._thread = None
+
+    def __enter__(self):
+        self.start_rss = self.peak = current_rss()
+        self._thread = threading.Thread(target=self._sample, name="rss-sampler", daemon=True)
+        self._thread.start()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self._stop.set()
+        self._thread.join()
+        self.peak = max(self.peak, current_rss())
+
+    def _sample(self):
+        while not self._stop.wait(self.interval):
+            self.peak = max(self.peak, current_rss())
+
+
+class Recorder:
+    """
+    What a scenario reports: objects processed, per-operation latencies, bytes moved, and
+    free-form `extra` values. Throughput is computed over the `measuring()` window, so
+    setup such as seeding the index stays out of it.
+    """
+
+    def __init__(self):
+        self.objects = 0
+        self.bytes = 0
+        self.latencies: List[float] = []
+        self.extra: Dict[str, object] = {}
+        self.seconds: Optional[float] = None
+        self._lock = threading.Lock()
+
+    def count(self, objects: int = 1):
+        with self._lock:
+            self.objects += objects
+
+    def add_bytes(self, size: int):
+        with self._lock:
+            self.bytes += size
+
+    def record(self, seconds: float):
+        with self._lock:
+            self.latencies.append(seconds)
+
+    @contextmanager
+    def timed(self):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(time.perf_counter() - start)
+
+    @contextmanager
+    def measuring(self):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.seconds = (self.seconds or 0.0) + time.perf_counter() - start
+
+
+def run_scenario(name: str, size: str, latency: float = 0.0, seed: int = 0) -> dict:
+    """
+    Run one scenario in a fresh environment and return its measurements.
+    """
+    scenario = SCENARIOS[name]
+    recorder = Recorder()
+    with BenchEnvironment(SIZES[size], latency=latency, seed=seed) as env:
+        with RssSampler() as rss:
+            start = time.perf_counter()
+            scenario.run(env, recorder)
+            wall = time.perf_counter() - start
+        requests = {"s3": env.s3.requests, "weaviate": env.weaviate.requests}
+    seconds = recorder.seconds if recorder.seconds is not None else wall
+
+    def ms(value):
+        return None if value is None else round(value * 1000, 3)
+
+    return {
+        "description": scenario.description,
+        "objects": recorder.objects,
+        "seconds": round(seconds, 4),
+        "objects_per_second": round(recorder.objects / seconds, 2) if seconds else None,
+        "bytes_per_second": round(recorder.bytes / seconds) if recorder.bytes and seconds else None,
+        "latency_ms": {
+            "count": len(recorder.latencies),
+            "p50": ms(percentile(recorder.latencies, 50)),
+            "p99": ms(percentile(recorder.latencies, 99)),
+            "max": ms(max(recorder.latencies) if recorder.latencies else None),
+        },
+        "peak_rss_bytes": rss.peak,
+        "rss_growth_bytes": rss.peak - rss.start_rss,
+        "requests": requests,
+        "extra": recorder.extra,
+    }
+
+
+def _git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True,
+                              cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def save_results(results: dict, directory: str) -> str:
+    os.makedirs(directory, exist_ok=True)
+    stamp = time.strftime("%Y%m%dT%H%M%S", time.gmtime(results["created_at"]))
+    path = os.path.join(directory, f"{stamp}-{results['commit'] or 'nocommit'}-{results['size']}.json")
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(results, f, indent=2)
+    return path
+
+
+def compare(baseline: dict, current: dict, tolerance: float = DEFAULT_TOLERANCE) -> List[str]:
+    """
+    Regressions of `current` against `baseline`: throughput down or p99 latency up by more
+    than `tolerance` (a fraction) in any scenario both runs contain.
+    """
+    regressions = []
+    for name, now in current["scenarios"].items():
+        before = baseline["scenarios"].get(name)
+        if before is None:
+            continue
+        if before.get("objects_per_second") and now.get("objects_per_second") is not None \
+                and now["objects_per_second"] < before["objects_per_second"] * (1 - tolerance):
+            regressions.append(f"{name}: objects/sec {before['objects_per_second']} -> {now['objects_per_second']}")
+        before_p99, now_p99 = before["latency_ms"]["p99"], now["latency_ms"]["p99"]
+        if before_p99 and now_p99 is not None and now_p99 > before_p99 * (1 + tolerance):
+            regressions.append(f"{name}: p99 {before_p99} ms -> {now_p99} ms")
+    return regressions
+
+
+def _format_row(name: str, result: dict) -> str:
+    latency = result["latency_ms"]
+    return (f"{name:<28} {result['objects']:>8} {result['objects_per_second'] or 0:>12.1f} "
+            f"{latency['p50'] if latency['p50'] is not None else '-':>10} {latency['p99'] if latency['p99'] is not None else '-':>10} "
+            f"{result['peak_rss_bytes'] / 2 ** 20:>10.1f}")
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Offline benchmarks against in-process MinIO/Weaviate stand-ins.")
+    parser.add_argument("scenarios", nargs="*", help=f"scenarios to run (default: all of {', '.join(SCENARIOS)})")
+    parser.add_argument("--size", choices=sorted(SIZES), default="small")
+    parser.add_argument("--latency-ms", type=float, default=0.0, help="added to every fake service request")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--results-dir", default=DEFAULT_RESULTS_DIR)
+    parser.add_argument("--compare", help="earlier results file to check for regressions")
+    parser.add_argument("--tolerance", type=float, default=DEFAULT_TOLERANCE)
+    parser.add_argument("--list", action="store_true", help="list scenarios and exit")
+    args = parser.parse_args(argv)
+
+    if args.list:
+        for scenario in SCENARIOS.values():
+            print(f"{scenario.name:<28} {scenario.description}")
+        return 0
+    unknown = [name for name in args.scenarios if name not in SCENARIOS]
+    if unknown:
+        parser.error(f"unknown scenarios: {', '.join(unknown)}")
+
+    results = {
+        "commit": _git_commit(),
+        "created_at": time.time(),
+        "size": args.size,
+        "latency_ms": args.latency_ms,
+        "seed": args.seed,
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpus": os.cpu_count(),
+        "scenarios": {},
+    }
+    print(f"{'scenario':<28} {'objects':>8} {'objects/s':>12} {'p50 ms':>10} {'p99 ms':>10} {'peak MiB':>10}")
+    for name in args.scenarios or list(SCENARIOS):
+        result = run_scenario(name, args.size, latency=args.latency_ms / 1000, seed=args.seed)
+        results["scenarios"][name] = result
+        print(_format_row(name, result))
+    print(f"results: {save_results(results, args.results_dir)}")
+
+    if args.compare:
+        with open(args.compare, "r", encoding="utf-8") as f:
+            regressions = compare(json.load(f), results, args.tolerance)
+        for regression in regressions:
+            print(f"REGRESSION {regression}")
+        return 1 if regressions else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,327 @@
+import asyncio
+import os
+import random
+import shutil
+import tempfile
+import time
+from typing import Callable, Dict, NamedTuple
+
+from lib.async_operations import AsyncWeaviateOperations, BlockingCallExecutor
+from lib.clients import get_minio_client, get_weaviate_client
+from lib.embeddings import HashingEmbedder
+from lib.index_manifest import IndexManifest, LocalManifestStore
+from lib.jobs import ACTIVE_STATUSES, JobManager
+from lib.minio_operations import MinioOperations
+from lib.query_cache import QueryCache
+from lib.transfers import ParallelTransfer
+from lib.weaviate_operations import WeaviateOperations
+from lib.web_fetch import WebFetcher
+
+from .corpus import binary_payload, generate_corpus, populate_bucket, vocabulary
+from .fake_llm import FakeChatModel
+from .fake_s3 import FakeS3Server
+from .fake_weaviate import FakeWeaviateServer
+from .fake_web import FakeWebServer
+
+BUCKET = "bench-corpus"
+INGEST_BUCKET = "bench-ingest"
+TRANSFER_BUCKET = "bench-transfers"
+WEB_BUCKET = "bench-web"
+CLASS_NAME = "MarkdownDocument"
+EMBEDDING_DIMENSIONS = 384
+
+# Workload sizes: documents in the corpus, their mean size, queries issued, bytes per
+# transfer, and documents pushed through the (fake) LLM
+SIZES = {
+    "small": {"documents": 200, "document_bytes": 4096, "queries": 200, "transfer_bytes": 16 * 1024 * 1024, "llm_documents": 20},
+    "medium": {"documents": 2000, "document_bytes": 8192, "queries": 1000, "transfer_bytes": 128 * 1024 * 1024, "llm_documents": 100},
+    "large": {"documents": 20000, "document_bytes": 8192, "queries": 5000, "transfer_bytes": 1024 * 1024 * 1024, "llm_documents": 500},
+}
+
+
+class Scenario(NamedTuple):
+    name: str
+    description: str
+    run: Callable
+
+
+SCENARIOS: Dict[str, Scenario] = {}
+
+
+def scenario(name: str, description: str):
+    def register(func):
+        SCENARIOS[name] = Scenario(name, description, func)
+        return func
+    return register
+
+
+class BenchEnvironment:
+    """
+    Fake MinIO and Weaviate servers on localhost plus the app's own clients and operations
+    classes pointed at them, with the corpus loaded into `BUCKET`. Everything between the
+    app code and the sockets is the production path (pooled clients, batch writer, query
+    compiler); only the services are stand-ins. `latency` (seconds) is added to every
+    request to model the network round trip.
+    """
+
+    def __init__(self, size: dict, latency: float = 0.0, seed: int = 0):
+        self.size = size
+        self.seed = seed
+        self.s3 = FakeS3Server(latency)
+        self.weaviate = FakeWeaviateServer(latency)
+        self.scratch = None
+
+    def __enter__(self):
+        self.s3.start()
+        self.weaviate.start()
+        self.scratch = tempfile.mkdtemp(prefix="bench-")
+        self.minio_client = get_minio_client(self.s3.endpoint, "bench", "bench-secret")
+        self.weaviate_client = get_weaviate_client(self.weaviate.url)
+        self.minio_ops = MinioOperations(self.s3.endpoint, "bench", "bench-secret")
+        self.embedder = HashingEmbedder(EMBEDDING_DIMENSIONS)
+        self.corpus_objects, self.corpus_bytes = populate_bucket(
+            self.s3, BUCKET, generate_corpus(self.size["documents"], self.size["document_bytes"], seed=self.seed))
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.s3.stop()
+        self.weaviate.stop()
+        shutil.rmtree(self.scratch, ignore_errors=True)
+
+    def weaviate_ops(self, query_cache=None) -> WeaviateOperations:
+        return WeaviateOperations(self.weaviate.url, embedder=self.embedder, query_cache=query_cache)
+
+    def manifest(self, name: str) -> IndexManifest:
+        return IndexManifest(LocalManifestStore(os.path.join(self.scratch, f"{name}.json")))
+
+    def index_corpus(self):
+        """
+        Index the corpus without measuring it, for scenarios that need a populated class.
+        """
+        return self.weaviate_ops().index_minio_objects(self.minio_ops, BUCKET, process=_name_document)
+
+    def query_texts(self, count: int):
+        rng = random.Random(self.seed)
+        words = vocabulary(seed=self.seed)[:500]
+        return [" ".join(rng.sample(words, 3)) for _ in range(count)]
+
+
+class _ObjectTimer:
+    # Progress hook for index_minio_objects: records the time between completed objects
+    def __init__(self, recorder):
+        self.recorder = recorder
+        self._last = time.perf_counter()
+
+    def begin(self, total):
+        self._last = time.perf_counter()
+
+    def cancelled(self) -> bool:
+        return False
+
+    def object_done(self, key, checkpoint):
+        now = time.perf_counter()
+        self.recorder.record(now - self._last)
+        self._last = now
+
+
+def _name_document(content: str):
+    return content.split("\n", 1)[0].lstrip("# "), content
+
+
+@scenario("minio_list", "List every object of the corpus bucket through MinioOperations.iter_objects")
+def minio_list(env: BenchEnvironment, recorder):
+    with recorder.measuring():
+        start = time.perf_counter()
+        for _ in env.minio_ops.iter_objects(BUCKET):
+            now = time.perf_counter()
+            recorder.record(now - start)
+            recorder.count()
+            start = now
+
+
+@scenario("minio_stream_documents", "Fetch and decode the corpus with the prefetching streaming loader")
+def minio_stream_documents(env: BenchEnvironment, recorder):
+    with recorder.measuring():
+        start = time.perf_counter()
+        for document in env.minio_ops.stream_documents(BUCKET):
+            now = time.perf_counter()
+            recorder.record(now - start)
+            recorder.count()
+            recorder.add_bytes(len(document.content))
+            start = now
+
+
+@scenario("minio_transfer", "Multipart upload and ranged parallel download of one large file (MinioTool's transfer engine)")
+def minio_transfer(env: BenchEnvironment, recorder):
+    env.minio_client.make_bucket(TRANSFER_BUCKET)
+    source = os.path.join(env.scratch, "payload.bin")
+    piece = 8 * 1024 * 1024
+    with open(source, "wb") as f:
+        # Written piecewise so generating the payload does not inflate the scenario's peak RSS
+        for index, offset in enumerate(range(0, env.size["transfer_bytes"], piece)):
+            f.write(binary_payload(min(piece, env.size["transfer_bytes"] - offset), seed=env.seed + index))
+    transfer = ParallelTransfer(env.minio_client, part_size=8 * 1024 * 1024, parallelism=8)
+    with recorder.measuring():
+        with recorder.timed():
+            transfer.upload_file(TRANSFER_BUCKET, "payload.bin", source)
+        with recorder.timed():
+            transfer.download_file(TRANSFER_BUCKET, "payload.bin", os.path.join(env.scratch, "payload.copy"))
+    recorder.count(2)
+    recorder.add_bytes(2 * env.size["transfer_bytes"])
+
+
+@scenario("weaviate_index", "Index the corpus from MinIO into Weaviate (stream, embed, adaptive batches)")
+def weaviate_index(env: BenchEnvironment, recorder):
+    ops = env.weaviate_ops()
+    with recorder.measuring():
+        result = ops.index_minio_objects(env.minio_ops, BUCKET, manifest=env.manifest("index"),
+                                         process=_name_document, progress=_ObjectTimer(recorder))
+    recorder.count(result["indexed"])
+    recorder.extra["failed"] = result["failed"]
+
+
+@scenario("weaviate_reindex_unchanged", "Re-run indexing over an unchanged bucket with its manifest (should be a no-op)")
+def weaviate_reindex_unchanged(env: BenchEnvironment, recorder):
+    manifest = env.manifest("reindex")
+    ops = env.weaviate_ops()
+    ops.index_minio_objects(env.minio_ops, BUCKET, manifest=manifest, process=_name_document)
+    objects_before = env.weaviate.count(CLASS_NAME)
+    with recorder.measuring(), recorder.timed():
+        result = ops.index_minio_objects(env.minio_ops, BUCKET, manifest=manifest, process=_name_document)
+    recorder.count(result["unchanged"])
+    recorder.extra.update(reindexed=result["indexed"], objects_added=env.weaviate.count(CLASS_NAME) - objects_before)
+
+
+@scenario("weaviate_query", "Vector search for embedded text queries, no query cache")
+def weaviate_query(env: BenchEnvironment, recorder):
+    env.index_corpus()
+    ops = env.weaviate_ops()
+    texts = env.query_texts(env.size["queries"])
+    with recorder.measuring():
+        for text in texts:
+            with recorder.timed():
+                ops.query_data(text=text, limit=10)
+            recorder.count()
+
+
+@scenario("weaviate_query_cached", "The same queries drawn Zipf-like from a small working set, through the query cache")
+def weaviate_query_cached(env: BenchEnvironment, recorder):
+    env.index_corpus()
+    cache = QueryCache()
+    ops = env.weaviate_ops(query_cache=cache)
+    texts = env.query_texts(50)
+    rng = random.Random(env.seed)
+    workload = rng.choices(texts, weights=[1.0 / (rank + 1) for rank in range(len(texts))], k=env.size["queries"])
+    with recorder.measuring():
+        for text in workload:
+            with recorder.timed():
+                ops.query_data(text=text, limit=10)
+            recorder.count()
+    recorder.extra["hit_rate"] = cache.stats()["hit_rate"]
+
+
+@scenario("llm_process_index", "Index documents that each go through a fake LLM call first, as DocumentProcessingRunnable does")
+def llm_process_index(env: BenchEnvironment, recorder):
+    llm = FakeChatModel(latency=0.05, jitter=0.02, seconds_per_token=0.0005, seed=env.seed)
+
+    def process(content: str):
+        processed = llm.invoke(f"Process this document: {content}").content
+        return "ExtractedDocumentName", processed
+
+    objects = list(env.minio_ops.iter_objects(BUCKET))[:env.size["llm_documents"]]
+    ops = env.weaviate_ops()
+    with recorder.measuring():
+        result = ops.index_minio_objects(env.minio_ops, BUCKET, objects=objects, process=process,
+                                         progress=_ObjectTimer(recorder))
+    recorder.count(result["indexed"])
+    recorder.extra["llm_calls"] = llm.calls
+
+
+@scenario("query_during_ingest", "Query latency on the query executor while a background index job runs")
+def query_during_ingest(env: BenchEnvironment, recorder):
+    env.index_corpus()
+    populate_bucket(env.s3, INGEST_BUCKET, generate_corpus(env.size["documents"], env.size["document_bytes"],
+                                                           seed=env.seed + 1, prefix="ingest/"))
+    query_ops = AsyncWeaviateOperations(env.weaviate_ops(), BlockingCallExecutor(8, "bench-query"))
+    texts = env.query_texts(env.size["queries"])
+
+    async def query_while(active: Callable[[], bool], latencies: list):
+        # Eight concurrent clients, as the /query endpoint would see them
+        async def client(offset: int):
+            index = offset
+            while active():
+                start = time.perf_counter()
+                await query_ops.query_data(text=texts[index % len(texts)], limit=10)
+                latencies.append(time.perf_counter() - start)
+                index += 8
+        await asyncio.gather(*(client(offset) for offset in range(8)))
+
+    idle_latencies = []
+    deadline = time.monotonic() + 2.0
+    asyncio.run(query_while(lambda: time.monotonic() < deadline, idle_latencies))
+
+    ingest_ops = env.weaviate_ops()
+    manager = JobManager(
+        lambda job: ingest_ops.index_minio_objects(env.minio_ops, job.bucket, manifest=env.manifest("ingest"),
+                                                   process=_name_document, start_after=job.last_key, progress=job),
+        os.path.join(env.scratch, "jobs"),
+    )
+    busy_latencies = []
+    with recorder.measuring():
+        started = time.perf_counter()
+        job = manager.submit(INGEST_BUCKET)
+        asyncio.run(query_while(lambda: job.status in ACTIVE_STATUSES, busy_latencies))
+        ingest_seconds = time.perf_counter() - started
+    manager.shutdown()
+    query_ops.executor.shutdown()
+
+    for latency in busy_latencies:
+        recorder.record(latency)
+    recorder.count(len(busy_latencies))
+    idle_latencies.sort()
+    recorder.extra.update(
+        idle_p50_ms=round(1000 * idle_latencies[len(idle_latencies) // 2], 3) if idle_latencies else None,
+        idle_p99_ms=round(1000 * idle_latencies[int(len(idle_latencies) * 0.99)], 3) if idle_latencies else None,
+        ingest_status=job.status,
+        ingest_objects_per_second=job.processed / ingest_seconds if ingest_seconds else 0.0,
+    )
+
+
+@scenario("web_fetch", "scrape_webpages' fetcher: a cold concurrent fetch, then re-fetches served fresh or revalidated (304) from its cache")
+def web_fetch(env: BenchEnvironment, recorder):
+    rng = random.Random(env.seed)
+    words = vocabulary(seed=env.seed)
+    count = min(env.size["documents"], 500)
+    paths = [f"/pages/{index}" for index in range(count)]
+    # Pages are never local; without added latency the fetches would measure nothing
+    with FakeWebServer(max(env.s3.latency, 0.01)) as web:
+        for index, path in enumerate(paths):
+            # Half the pages may be reused for a minute, the rest must be revalidated
+            web.put(path, f"Page {index}", " ".join(rng.choices(words, k=400)),
+                    cache_control="max-age=60" if index % 2 else "no-cache")
+        urls = [web.url(path) for path in paths]
+
+        sequential = WebFetcher(max_connections=1, host_interval=0.0)
+        started = time.perf_counter()
+        sequential.fetch_many(urls[:50])
+        sequential_seconds = (time.perf_counter() - started) * count / 50
+        sequential.close()
+
+        fetcher = WebFetcher(os.path.join(env.scratch, "web-cache"), max_connections=16, max_per_host=16,
+                             host_interval=0.0, client=env.minio_client, bucket_name=WEB_BUCKET)
+        with recorder.measuring():
+            for _ in range(3):
+                with recorder.timed():
+                    pages = fetcher.fetch_many(urls)
+                recorder.count(len(pages))
+                recorder.add_bytes(sum(len(page.text) for page in pages))
+        stats = fetcher.stats()
+        fetcher.close()
+        recorder.extra.update(
+            cold_speedup=round(sequential_seconds / recorder.latencies[0], 2),
+            pages=stats["pages"],
+            cache_hit_rate=round(stats["cache_hit_rate"], 3),
+            not_modified=web.not_modified,
+            mirrored=stats["mirrored"],
+            errors=stats["errors"],
+        )
@@ -1,17 +1,44 @@
-from typing import Any, Callable, List, Optional, TypedDict, Union
+import operator
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional, Sequence, TypedDict, Union
 
 from langchain.agents import AgentExecutor, create_openai_functions_agent
 from langchain.output_parsers.openai_functions import JsonOutputFunctionsParser
-from langchain_core.messages import ChatPromptTemplate, MessagesPlaceholder, HumanMessage
+from langchain_core.messages import BaseMessage, HumanMessage
+from langchain_core.prompts import ChatPromptTemplate, MessagesPlaceholder
 from langchain_core.runnables import Runnable
 from langchain_core.tools import BaseTool
 from langchain_openai import ChatOpenAI
+from typing_extensions import Annotated
 
 from langgraph.graph import END, StateGraph
 
 # Make sure to import necessary classes for message handling
 from langchain_core.messages import FunctionMessage, AIMessage
 
+from ..metrics import AGENT_NODE_SECONDS
+from .router import TieredRouter
+
+# System prompt of each agent role
+AGENT_ROLES = {
+    "data_analysis": "Analyze the provided dataset and summarize key insights.",
+    "content_creation": "Create a detailed report/article based on the provided insights.",
+    "automation": "Automate the identified routine task based on the criteria provided.",
+    "quality_assurance": "Review the output for accuracy, quality, and adherence to guidelines.",
+    "communication": "Summarize the discussions and facilitate communication between agents.",
+}
+# Roles that only need the request run as parallel branches; the rest run in order
+# after they join, each seeing everything said before it
+PARALLEL_ROLES = ("data_analysis", "automation")
+SEQUENTIAL_ROLES = ("content_creation", "quality_assurance", "communication")
+# The supervisor of a supervised graph picks each next role instead
+SUPERVISOR_PROMPT = (
+    "You are a supervisor managing a conversation between the following workers: {team_members}."
+    " Given the user request, respond with the worker to act next. Each worker will perform a"
+    " task and respond with their results and status. When finished, respond with FINISH."
+)
+
 
 def create_agent(
     llm: ChatOpenAI,
@@ -35,15 +62,18 @@ You are chosen for a reason! You are one of the following team members: {team_me
 
 
 def agent_node(state, agent_executor, name) -> dict:
-    result = agent_executor.invoke(state)
+    result = agent_executor.invoke({"messages": state["messages"]})
     # Assuming result['output'] is the message content
     return {"messages": [HumanMessage(content=result['output'], name=name)]}
 
 
 def create_team_supervisor(
-    llm: ChatOpenAI, system_prompt: str, members: List[str]
-) -> Runnable:
-    """An LLM-based router."""
+    llm: ChatOpenAI, system_prompt: str, members: List[str], **router_options
+) -> TieredRouter:
+    """
+    An LLM-based router behind cheaper tiers (rules, a route cache, a classifier
+    trained on the LLM's decisions); `router_options` go to `TieredRouter`.
+    """
     options = ["FINISH"] + members
     function_def = {
         "name": "route",
@@ -68,10 +98,8 @@ def create_team_supervisor(
         ("system", f"Given the conversation above, who should act next? Or should we FINISH? Select one of: {options}"),
     ]).partial(options=options, team_members=", ".join(members))
     
-    llm = llm.bind_functions(functions=[function_def], function_call="route")
-    parser = JsonOutputFunctionsParser()
-    # Binding the LLM to the parser is conceptual; implement based on your setup
-    return parser.bind(llm=llm)  # This is a placeholder for actual implementation
+    llm_router = prompt | llm.bind_functions(functions=[function_def], function_call="route") | JsonOutputFunctionsParser()
+    return TieredRouter(llm_router, options, **router_options)
 
 
 # Example function for creating an agent with a specific role
@@ -79,27 +107,150 @@ def create_specific_agent(llm: ChatOpenAI, tools: List[BaseTool], system_prompt:
     prompt = ChatPromptTemplate.from_messages([
         ("system", system_prompt),
         MessagesPlaceholder(variable_name="messages"),
+        MessagesPlaceholder(variable_name="agent_scratchpad"),
     ])
     agent = create_openai_functions_agent(llm, tools, prompt)
     executor = AgentExecutor(agent=agent, tools=tools)
     return executor
 
-# Example usage for creating specific types of agents
-def setup_agents_and_graph(llm: ChatOpenAI, tools: List[BaseTool]):
-    data_analysis_agent = create_specific_agent(llm, tools, "Analyze the provided dataset and summarize key insights.")
-    content_creation_agent = create_specific_agent(llm, tools, "Create a detailed report/article based on the provided insights.")
-    automation_agent = create_specific_agent(llm, tools, "Automate the identified routine task based on the criteria provided.")
-    quality_assurance_agent = create_specific_agent(llm, tools, "Review the output for accuracy, quality, and adherence to guidelines.")
-    communication_agent = create_specific_agent(llm, tools, "Summarize the discussions and facilitate communication between agents.")
-
-    # Setup graph
-    graph = StateGraph(schema=Any)  # Define your state schema based on your application's requirements
-
-    # Add nodes to the graph for each agent
-    # Example: graph.add_node("data_analysis", lambda state: agent_node(state, data_analysis_agent, "data_analysis"))
-    # Add edges based on your application’s logic
-    # Example: graph.add_edge("data_analysis", "content_creation")
-    # Don't forget to set the entry and finish points
-    # graph.set_entry_point("entry_agent")
-    # graph.add_edge("last_agent", END)
-    return graph
\ No newline at end of file
+
+_executors: Dict[tuple, tuple] = {}
+_executors_lock = threading.Lock()
+
+
+def cached_executor(llm: ChatOpenAI, tools: List[BaseTool], system_prompt: str) -> AgentExecutor:
+    """
+    The executor for this model, tool set and prompt, built on the first call and
+    reused afterwards; executors keep no per-run state, so requests can share them.
+    """
+    key = (id(llm), tuple(id(tool) for tool in tools), system_prompt)
+    with _executors_lock:
+        entry = _executors.get(key)
+        if entry is None:
+            # The model and tools are kept with the executor so their ids stay theirs
+            entry = _executors[key] = (llm, list(tools), create_specific_agent(llm, tools, system_prompt))
+        return entry[2]
+
+
+def _merge_timings(left: Dict[str, float], right: Dict[str, float]) -> Dict[str, float]:
+    return {**left, **right}
+
+
+class AgentState(TypedDict):
+    # Parallel branches write in the same step; the reducers combine their updates
+    messages: Annotated[Sequence[BaseMessage], operator.add]
+    timings: Annotated[Dict[str, float], _merge_timings]
+    # The supervisor's latest choice, in supervised graphs
+    next: str
+
+
+class AgentGraph:
+    """
+    The multi-agent pipeline for one model and tool set, compiled once. `parallel`
+    roles run as concurrent branches that meet at a join node, then `sequential`
+    roles run in order. With a `supervisor` (see create_team_supervisor), the roles
+    instead run one at a time in the order it picks, returning to it after each,
+    until it answers FINISH. Each run's state carries every node's wall time in
+    `timings`, which also feed the agent_node_duration_seconds histogram.
+    """
+
+    def __init__(
+        self,
+        llm: ChatOpenAI,
+        tools: List[BaseTool],
+        roles: Optional[Dict[str, str]] = None,
+        parallel: Sequence[str] = PARALLEL_ROLES,
+        sequential: Sequence[str] = SEQUENTIAL_ROLES,
+        name: str = "agents",
+        supervisor: Optional[Runnable] = None,
+    ):
+        self.llm = llm
+        self.tools = list(tools)
+        self.roles = roles or AGENT_ROLES
+        self.parallel = tuple(parallel)
+        self.sequential = tuple(sequential)
+        self.name = name
+        self.supervisor = supervisor
+        self.graph = self._build_supervised() if supervisor is not None else self._build()
+        self.app = self.graph.compile()
+
+    def executor(self, role: str) -> AgentExecutor:
+        return cached_executor(self.llm, self.tools, self.roles[role])
+
+    def _build(self) -> StateGraph:
+        graph = StateGraph(AgentState)
+        graph.add_node("start", self._timed("start", lambda state: {}))
+        graph.set_entry_point("start")
+        for role in self.parallel + self.sequential:
+            executor = self.executor(role)
+            graph.add_node(role, self._timed(role, lambda state, executor=executor, role=role: agent_node(state, executor, role)))
+        for role in self.parallel:
+            graph.add_edge("start", role)
+        # Waits for every branch, then hands the combined messages on
+        graph.add_node("join", self._timed("join", lambda state: {}))
+        graph.add_edge(list(self.parallel) or "start", "join")
+        previous = "join"
+        for role in self.sequential:
+            graph.add_edge(previous, role)
+            previous = role
+        graph.add_edge(previous, END)
+        return graph
+
+    def _build_supervised(self) -> StateGraph:
+        graph = StateGraph(AgentState)
+        graph.add_node("supervisor", self._timed("supervisor", self.supervisor.invoke))
+        graph.set_entry_point("supervisor")
+        members = self.parallel + self.sequential
+        for role in members:
+            executor = self.executor(role)
+            graph.add_node(role, self._timed(role, lambda state, executor=executor, role=role: agent_node(state, executor, role)))
+            graph.add_edge(role, "supervisor")
+        graph.add_conditional_edges("supervisor", lambda state: state["next"], {**{role: role for role in members}, "FINISH": END})
+        return graph
+
+    def _timed(self, node: str, func: Callable[[dict], dict]) -> Callable[[dict], dict]:
+        def run(state: dict) -> dict:
+            start = time.perf_counter()
+            try:
+                update = func(state)
+            finally:
+                elapsed = time.perf_counter() - start
+                AGENT_NODE_SECONDS.observe(elapsed, self.name, node)
+            return {**update, "timings": {node: elapsed}}
+        return run
+
+    def invoke(self, messages: Union[str, Sequence[BaseMessage]], config: Optional[dict] = None) -> dict:
+        """
+        Run the pipeline on a request; returns the final state (messages and timings).
+        """
+        if isinstance(messages, str):
+            messages = [HumanMessage(content=messages)]
+        return self.app.invoke({"messages": list(messages), "timings": {}}, config)
+
+    async def ainvoke(self, messages: Union[str, Sequence[BaseMessage]], config: Optional[dict] = None) -> dict:
+        if isinstance(messages, str):
+            messages = [HumanMessage(content=messages)]
+        return await self.app.ainvoke({"messages": list(messages), "timings": {}}, config)
+
+
+_graphs: Dict[tuple, AgentGraph] = {}
+_graphs_lock = threading.Lock()
+
+
+def setup_agents_and_graph(llm: ChatOpenAI, tools: List[BaseTool], supervised: bool = False) -> AgentGraph:
+    """
+    The agent pipeline for this model and tool set, built on the first call and
+    shared by later ones. A `supervised` pipeline is routed by a TieredRouter, whose
+    stats appear on /metrics under its name ("supervisor").
+    """
+    key = (id(llm), tuple(id(tool) for tool in tools), supervised)
+    with _graphs_lock:
+        graph = _graphs.get(key)
+        if graph is None:
+            supervisor = None
+            if supervised:
+                members = list(PARALLEL_ROLES + SEQUENTIAL_ROLES)
+                supervisor = create_team_supervisor(llm, SUPERVISOR_PROMPT, members, name="supervisor")
+            graph = _graphs[key] = AgentGraph(llm, tools, supervisor=supervisor,
+                                             name="supervised" if supervised else "agents")
+        return graph
\ No newline at end of file
@@ -2,6 +2,7 @@ from typing import Any, Callable, List, Optional, TypedDict, Union
 
 from langchain.agents import AgentExecutor, create_openai_functions_agent
 from langchain.output_parsers.openai_functions import JsonOutputFunctionsParser
+from langchain_core.messages import HumanMessage
 from langchain_core.prompts import ChatPromptTemplate, MessagesPlaceholder
 from langchain_core.runnables import Runnable
 from langchain_core.tools import BaseTool
@@ -9,6 +10,9 @@ from langchain_openai import ChatOpenAI
 
 from langgraph.graph import END, StateGraph
 
+from .agents import AGENT_ROLES, cached_executor
+from .router import TieredRouter
+
 
 def create_agent(
     llm: ChatOpenAI,
@@ -41,9 +45,9 @@ def agent_node(state, agent, name):
 
 
 def create_team_supervisor(
-    llm: ChatOpenAI, system_prompt, members
-) -> str:
-    """An LLM-based router."""
+    llm: ChatOpenAI, system_prompt, members, **router_options
+) -> TieredRouter:
+    """An LLM-based router behind cheaper tiers; `router_options` go to `TieredRouter`."""
     options = ["FINISH"] + members
     function_def = {
         "name": "route",
@@ -73,68 +77,26 @@ def create_team_supervisor(
             ),
         ]
     ).partial(options=str(options), team_members=", ".join(members))
-    return (
+    llm_router = (
         prompt
         | llm.bind_functions(functions=[function_def], function_call="route")
         | JsonOutputFunctionsParser()
     )
-    
+    return TieredRouter(llm_router, options, **router_options)
+
+
+# Role executors are built once per model and tool set (see agents.cached_executor)
 def create_data_analysis_agent(llm, tools):
-    system_prompt = "Analyze the provided dataset and summarize key insights."
-    # Define the prompt template for data analysis tasks
-    prompt = ChatPromptTemplate.from_messages([
-        ("system", system_prompt),
-        MessagesPlaceholder(variable_name="messages"),
-    ])
-    # Create the agent
-    agent = create_openai_functions_agent(llm, tools, prompt)
-    executor = AgentExecutor(agent=agent, tools=tools)
-    return executor
-    
+    return cached_executor(llm, tools, AGENT_ROLES["data_analysis"])
+
 def create_content_creation_agent(llm, tools):
-    system_prompt = "Create a detailed report/article based on the provided insights."
-    # Define the prompt template for content creation tasks
-    prompt = ChatPromptTemplate.from_messages([
-        ("system", system_prompt),
-        MessagesPlaceholder(variable_name="messages"),
-    ])
-    # Create the agent
-    agent = create_openai_functions_agent(llm, tools, prompt)
-    executor = AgentExecutor(agent=agent, tools=tools)
-    return executor
-    
+    return cached_executor(llm, tools, AGENT_ROLES["content_creation"])
+
 def create_automation_agent(llm, tools):
-    system_prompt = "Automate the identified routine task based on the criteria provided."
-    # Define the prompt template for automation tasks
-    prompt = ChatPromptTemplate.from_messages([
-        ("system", system_prompt),
-        MessagesPlaceholder(variable_name="messages"),
-    ])
-    # Create the agent
-    agent = create_openai_functions_agent(llm, tools, prompt)
-    executor = AgentExecutor(agent=agent, tools=tools)
-    return executor
-    
+    return cached_executor(llm, tools, AGENT_ROLES["automation"])
+
 def create_quality_assurance_agent(llm, tools):
-    system_prompt = "Review the output for accuracy, quality, and adherence to guidelines."
-    # Define the prompt template for quality assurance tasks
-    prompt = ChatPromptTemplate.from_messages([
-        ("system", system_prompt),
-        MessagesPlaceholder(variable_name="messages"),
-    ])
-    # Create the agent
-    agent = create_openai_functions_agent(llm, tools, prompt)
-    executor = AgentExecutor(agent=agent, tools=tools)
-    return executor
-    
+    return cached_executor(llm, tools, AGENT_ROLES["quality_assurance"])
+
 def create_communication_agent(llm, tools):
-    system_prompt = "Summarize the discussions and facilitate communication between agents."
-    # Define the prompt template for communication tasks
-    prompt = ChatPromptTemplate.from_messages([
-        ("system", system_prompt),
-        MessagesPlaceholder(variable_name="messages"),
-    ])
-    # Create the agent
-    agent = create_openai_functions_agent(llm, tools, prompt)
-    executor = AgentExecutor(agent=agent, tools=tools)
-    return executor
\ No newline at end of file
+    return cached_executor(llm, tools, AGENT_ROLES["communication"])
@@ -0,0 +1,400 @@
+import hashlib
+import json
+import logging
+import random
+import re
+import threading
+import time
+import weakref
+from collections import Counter, OrderedDict, deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Iterable, List, NamedTuple, Optional, Sequence, Tuple
+
+import numpy as np
+from langchain_core.runnables import Runnable, RunnableConfig
+
+from ..embeddings import Embedder, HashingEmbedder
+
+logger = logging.getLogger(__name__)
+
+# Defaults for the tiered router; overridable per router.
+DEFAULT_NEIGHBOURS = 5
+DEFAULT_MIN_CONFIDENCE = 0.8
+DEFAULT_MIN_MARGIN = 0.05
+DEFAULT_MIN_SIMILARITY = 0.6
+DEFAULT_MIN_ROUTE_EXAMPLES = 20
+DEFAULT_SHADOW_RATE = 0.05
+DEFAULT_SHADOW_WINDOW = 50
+DEFAULT_MIN_SHADOW_CHECKS = 10
+DEFAULT_MAX_DISAGREEMENT = 0.1
+DEFAULT_MAX_EXAMPLES = 10000
+DEFAULT_CACHE_ENTRIES = 4096
+DEFAULT_CONTEXT_MESSAGES = 2
+DEFAULT_CONTEXT_CHARS = 2000
+DEFAULT_RECENT_DECISIONS = 1000
+
+RULE = "rule"
+CACHE = "cache"
+CLASSIFIER = "classifier"
+LLM = "llm"
+TIERS = (RULE, CACHE, CLASSIFIER, LLM)
+
+# A rule looks at the graph state and names the next route, or None to pass
+Rule = Callable[[dict], Optional[str]]
+
+
+class RouteDecision(NamedTuple):
+    """One routing decision: where it went, which tier made it, and what it cost."""
+    route: str
+    tier: str
+    confidence: float
+    seconds: float
+
+
+def mention_rule(options: Sequence[str]) -> Rule:
+    """
+    Route to a member the last message hands over to explicitly ("@member" or a final
+    line "NEXT: member"), or FINISH when it says so the same way.
+    """
+    by_name = {option.lower(): option for option in options}
+    pattern = re.compile(r"(?:^|\s)@([\w-]+)|^\s*next\s*:\s*([\w-]+)\s*$", re.IGNORECASE | re.MULTILINE)
+
+    def rule(state: dict) -> Optional[str]:
+        messages = state.get("messages") or []
+        if not messages:
+            return None
+        named = {by_name.get((at or line).lower()) for at, line in pattern.findall(_content(messages[-1]))}
+        named.discard(None)
+        return named.pop() if len(named) == 1 else None
+    return rule
+
+
+def handoff_rule(handoffs: Dict[str, str]) -> Rule:
+    """
+    Fixed successors: after `member` speaks, route to `handoffs[member]`.
+    """
+    def rule(state: dict) -> Optional[str]:
+        messages = state.get("messages") or []
+        return handoffs.get(getattr(messages[-1], "name", None)) if messages else None
+    return rule
+
+
+def _content(message) -> str:
+    content = getattr(message, "content", message)
+    return content if isinstance(content, str) else json.dumps(content, sort_keys=True, default=str)
+
+
+class RouteClassifier:
+    """
+    k-nearest-neighbour vote over embedded routing contexts with known routes. Neighbours
+    vote with their cosine similarity; confidence is the winning route's share of the
+    vote, and margin how much closer the context is to the winning route's nearest
+    example than to any other route's. No route is predicted unless the nearest example
+    has a similarity of at least `min_similarity` and the winning route has at least
+    `min_route_examples` examples. Beyond `max_examples`, the oldest examples are replaced.
+    """
+
+    def __init__(self, embedder: Embedder, neighbours: int = DEFAULT_NEIGHBOURS,
+                 min_similarity: float = DEFAULT_MIN_SIMILARITY, max_examples: int = DEFAULT_MAX_EXAMPLES,
+                 min_route_examples: int = DEFAULT_MIN_ROUTE_EXAMPLES):
+        self.embedder = embedder
+        self.neighbours = neighbours
+        self.min_similarity = min_similarity
+        self.max_examples = max_examples
+        self.min_route_examples = min_route_examples
+        self._vectors = np.zeros((0, embedder.dimensions), dtype=np.float32)
+        self._labels = np.zeros(0, dtype=np.int32)
+        self._routes: List[str] = []
+        self._label_of: Dict[str, int] = {}
+        self._counts = Counter()
+        self._next = 0
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._routes)
+
+    def add(self, vectors: np.ndarray, routes: Sequence[str]):
+        with self._lock:
+            for vector, route in zip(vectors, routes):
+                if len(self._routes) < self.max_examples:
+                    if len(self._routes) == len(self._vectors):
+                        grown = np.zeros((min(self.max_examples, max(64, 2 * len(self._vectors))), self._vectors.shape[1]),
+                                         dtype=np.float32)
+                        grown[:len(self._vectors)] = self._vectors
+                        self._vectors = grown
+                        self._labels = np.resize(self._labels, len(grown))
+                    index = len(self._routes)
+                    self._routes.append(route)
+                else:
+                    index = self._next
+                    self._counts[self._routes[index]] -= 1
+                    self._routes[index] = route
+                    self._next = (self._next + 1) % self.max_examples
+                self._vectors[index] = vector
+                self._labels[index] = self._label_of.setdefault(route, len(self._label_of))
+                self._counts[route] += 1
+
+    def examples(self) -> Dict[str, int]:
+        with self._lock:
+            return {route: count for route, count in self._counts.items() if count}
+
+    def predict(self, vector: np.ndarray) -> Tuple[Optional[str], float, float]:
+        """
+        (route, confidence, margin), or (None, 0.0, 0.0) with too few or too distant examples.
+        """
+        with self._lock:
+            count = len(self._routes)
+            if count < self.neighbours:
+                return None, 0.0, 0.0
+            similarities = self._vectors[:count] @ vector
+            labels = self._labels[:count].copy()
+            nearest = np.argpartition(-similarities, self.neighbours - 1)[:self.neighbours]
+            routes = [self._routes[index] for index in nearest]
+            counts = dict(self._counts)
+            label = dict(self._label_of)
+        if similarities[nearest].max() < self.min_similarity:
+            return None, 0.0, 0.0
+        votes: Dict[str, float] = {}
+        for index, route in zip(nearest, routes):
+            votes[route] = votes.get(route, 0.0) + max(0.0, float(similarities[index]))
+        total = sum(votes.values())
+        if not total:
+            return None, 0.0, 0.0
+        route = max(votes, key=votes.get)
+        if counts.get(route, 0) < self.min_route_examples:
+            return None, 0.0, 0.0
+        own = labels == label[route]
+        runner_up = float(similarities[~own].max()) if (~own).any() else -1.0
+        return route, votes[route] / total, float(similarities[own].max()) - runner_up
+
+
+class TieredRouter(Runnable[dict, dict]):
+    """
+    Chooses the next member like the supervisor chain it wraps, returning {"next": route},
+    but tries cheaper tiers first:
+
+    1. `rules`, in order; the first that names a route wins.
+    2. A memo of earlier decisions keyed by the conversation state (who has spoken, and
+       the latest messages).
+    3. A nearest-neighbour classifier over embedded routing contexts, trained on the LLM's
+       earlier decisions; used once its route has `min_route_examples` examples, its
+       confidence reaches `min_confidence` and its margin over the next route reaches
+       `min_margin` (see RouteClassifier).
+    4. The wrapped `llm_router`, whose answer is cached and taught to the classifier.
+
+    The classifier is kept honest against the LLM: a `shadow_rate` share of its decisions
+    is checked by the LLM in the background, and every LLM decision is compared with what
+    the classifier would have said. When more than `max_disagreement` of the last checks
+    disagree, the classifier tier is skipped until the LLM's later decisions (which it
+    keeps learning from) bring it back under.
+
+    Every decision is kept in `recent` and, with a `log_path`, appended there as a JSON
+    line; `load_log` trains a new router from such a log. `stats()` reports decisions per
+    tier, the share that skipped the LLM, the LLM time that saved, and the shadow checks.
+    Routers with a `name` are listed by `router_stats()`.
+    """
+
+    def __init__(
+        self,
+        llm_router: Runnable,
+        options: Sequence[str],
+        rules: Optional[Iterable[Rule]] = None,
+        embedder: Optional[Embedder] = None,
+        min_confidence: float = DEFAULT_MIN_CONFIDENCE,
+        min_margin: float = DEFAULT_MIN_MARGIN,
+        min_route_examples: int = DEFAULT_MIN_ROUTE_EXAMPLES,
+        neighbours: int = DEFAULT_NEIGHBOURS,
+        min_similarity: float = DEFAULT_MIN_SIMILARITY,
+        max_examples: int = DEFAULT_MAX_EXAMPLES,
+        cache_entries: int = DEFAULT_CACHE_ENTRIES,
+        context_messages: int = DEFAULT_CONTEXT_MESSAGES,
+        shadow_rate: float = DEFAULT_SHADOW_RATE,
+        max_disagreement: float = DEFAULT_MAX_DISAGREEMENT,
+        log_path: Optional[str] = None,
+        name: Optional[str] = None,
+    ):
+        self.llm_router = llm_router
+        self.options = list(options)
+        self.rules = list(rules) if rules is not None else [mention_rule(self.options)]
+        self.embedder = embedder or HashingEmbedder()
+        self.classifier = RouteClassifier(self.embedder, neighbours, min_similarity, max_examples, min_route_examples)
+        self.min_confidence = min_confidence
+        self.min_margin = min_margin
+        self.cache_entries = cache_entries
+        self.context_messages = context_messages
+        self.shadow_rate = shadow_rate
+        self.max_disagreement = max_disagreement
+        self.log_path = log_path
+        self.name = name
+        self.recent = deque(maxlen=DEFAULT_RECENT_DECISIONS)
+        self.decisions = {tier: 0 for tier in TIERS}
+        self.seconds = {tier: 0.0 for tier in TIERS}
+        self.shadow_checks = 0
+        self.shadow_skipped = 0
+        self.disagreements = 0
+        self._checks = deque(maxlen=DEFAULT_SHADOW_WINDOW)
+        self._shadow_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="router-shadow")
+        self._shadow_pending = 0
+        self._random = random.Random()
+        self._cache = OrderedDict()
+        self._lock = threading.Lock()
+        if name is not None:
+            _routers[name] = self
+
+    def _context(self, state: dict) -> Tuple[str, str]:
+        # (memo key, text the classifier embeds)
+        messages = list(state.get("messages") or [])
+        speakers = [getattr(message, "name", None) or getattr(message, "type", "") for message in messages]
+        text = "\n".join(f"{speaker}: {_content(message)}" for speaker, message in
+                         zip(speakers[-self.context_messages:], messages[-self.context_messages:]))[-DEFAULT_CONTEXT_CHARS:]
+        key = hashlib.sha256(json.dumps([speakers, text]).encode("utf-8")).hexdigest()
+        return key, text
+
+    def route(self, state: dict, config: Optional[RunnableConfig] = None) -> RouteDecision:
+        start = time.perf_counter()
+        for rule in self.rules:
+            route = rule(state)
+            if route in self.options:
+                return self._decided(route, RULE, 1.0, start)
+
+        key, text = self._context(state)
+        with self._lock:
+            route = self._cache.get(key)
+            if route is not None:
+                self._cache.move_to_end(key)
+        if route is not None:
+            return self._decided(route, CACHE, 1.0, start, text)
+
+        vector = self.embedder.embed_query(text)
+        predicted, confidence, margin = self.classifier.predict(vector)
+        if predicted is not None and (confidence < self.min_confidence or margin < self.min_margin):
+            predicted = None
+        if predicted is not None and self.classifier_trusted():
+            self._remember(key, predicted)
+            if self.shadow_rate and self._random.random() < self.shadow_rate:
+                self._shadow(state, config, key, vector, predicted)
+            return self._decided(predicted, CLASSIFIER, confidence, start, text)
+
+        route = self.llm_router.invoke(state, config)["next"]
+        self._remember(key, route)
+        self.classifier.add(vector[None, :], [route])
+        if predicted is not None:
+            # A free check: what the classifier would have said had it been trusted
+            self._checked(predicted, route)
+        return self._decided(route, LLM, 1.0, start, text)
+
+    def classifier_trusted(self) -> bool:
+        """
+        False while too many recent checks found the classifier disagreeing with the LLM.
+        """
+        with self._lock:
+            checks = len(self._checks)
+            disagreed = checks - sum(self._checks)
+        return checks < DEFAULT_MIN_SHADOW_CHECKS or disagreed <= self.max_disagreement * checks
+
+    def _shadow(self, state: dict, config: Optional[RunnableConfig], key: str, vector: np.ndarray, predicted: str):
+        # One check at a time in the background: the classifier's answer is already returned
+        with self._lock:
+            if self._shadow_pending:
+                self.shadow_skipped += 1
+                return
+            self._shadow_pending += 1
+        self._shadow_executor.submit(self._run_shadow, state, config, key, vector, predicted)
+
+    def _run_shadow(self, state: dict, config: Optional[RunnableConfig], key: str, vector: np.ndarray, predicted: str):
+        try:
+            route = self.llm_router.invoke(state, config)["next"]
+        except Exception:
+            logger.warning("Shadow routing check failed", exc_info=True)
+            return
+        finally:
+            with self._lock:
+                self._shadow_pending -= 1
+        with self._lock:
+            self.shadow_checks += 1
+        self._checked(predicted, route)
+        if route != predicted:
+            self._remember(key, route)
+            self.classifier.add(vector[None, :], [route])
+
+    def _checked(self, predicted: str, route: str):
+        with self._lock:
+            self._checks.append(predicted == route)
+            if predicted != route:
+                self.disagreements += 1
+        if predicted != route:
+            logger.info("Route classifier said %s where the LLM said %s", predicted, route)
+
+    def invoke(self, input: dict, config: Optional[RunnableConfig] = None, **kwargs: Any) -> dict:
+        return {"next": self.route(input, config).route}
+
+    def _remember(self, key: str, route: str):
+        with self._lock:
+            self._cache[key] = route
+            self._cache.move_to_end(key)
+            while len(self._cache) > self.cache_entries:
+                self._cache.popitem(last=False)
+
+    def _decided(self, route: str, tier: str, confidence: float, start: float, text: Optional[str] = None) -> RouteDecision:
+        decision = RouteDecision(route, tier, confidence, time.perf_counter() - start)
+        with self._lock:
+            self.decisions[tier] += 1
+            self.seconds[tier] += decision.seconds
+            self.recent.append(decision)
+            if self.log_path:
+                entry = {"time": time.time(), **decision._asdict(), "text": text}
+                with open(self.log_path, "a", encoding="utf-8") as f:
+                    f.write(json.dumps(entry) + "\n")
+        logger.debug("Routed to %s by %s (confidence %.2f) in %.4fs", route, tier, confidence, decision.seconds)
+        return decision
+
+    def load_log(self, path: Optional[str] = None) -> int:
+        """
+        Teach the classifier every LLM decision in a decision log; returns how many.
+        """
+        texts, routes = [], []
+        with open(path or self.log_path, "r", encoding="utf-8") as f:
+            for line in f:
+                entry = json.loads(line)
+                if entry.get("tier") == LLM and entry.get("text") is not None and entry["route"] in self.options:
+                    texts.append(entry["text"])
+                    routes.append(entry["route"])
+        if texts:
+            self.classifier.add(self.embedder.embed(texts), routes)
+        return len(texts)
+
+    def stats(self) -> dict:
+        with self._lock:
+            total = sum(self.decisions.values())
+            avoided = total - self.decisions[LLM]
+            llm_mean = self.seconds[LLM] / self.decisions[LLM] if self.decisions[LLM] else 0.0
+            cheap_seconds = sum(self.seconds[tier] for tier in TIERS if tier != LLM)
+            checks = len(self._checks)
+            recent_disagreement = (checks - sum(self._checks)) / checks if checks else 0.0
+            stats = {
+                "decisions": dict(self.decisions),
+                "seconds": {tier: round(seconds, 4) for tier, seconds in self.seconds.items()},
+                "examples": len(self.classifier),
+                "cache_entries": len(self._cache),
+                "llm_avoided_rate": avoided / total if total else 0.0,
+                # Each decision made without the LLM saved roughly one mean LLM decision
+                "seconds_saved": round(max(0.0, avoided * llm_mean - cheap_seconds), 4),
+                "shadow_checks": self.shadow_checks,
+                "shadow_skipped": self.shadow_skipped,
+                "disagreements": self.disagreements,
+                "recent_disagreement_rate": recent_disagreement,
+            }
+        stats["examples_per_route"] = self.classifier.examples()
+        stats["classifier_trusted"] = int(self.classifier_trusted())
+        return stats
+
+
+# Named routers, for /metrics; a router that is no longer used drops out
+_routers: "weakref.WeakValueDictionary[str, TieredRouter]" = weakref.WeakValueDictionary()
+
+
+def router_stats() -> Dict[str, dict]:
+    """
+    `stats()` of every named TieredRouter still in use, by name.
+    """
+    return {name: router.stats() for name, router in list(_routers.items())}
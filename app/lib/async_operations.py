@@ -0,0 +1,97 @@
+import asyncio
+import functools
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import List
+
+# Defaults for the executors; overridable per executor (see tool_config).
+DEFAULT_QUERY_WORKERS = 8
+
+
+class BlockingCallExecutor:
+    """
+    A size-limited thread pool for running blocking client calls from async code.
+    Giving each workload its own executor keeps a long ingestion from occupying the
+    threads that serve queries (and never blocks the event loop itself).
+    """
+
+    def __init__(self, max_workers: int, name: str):
+        self.max_workers = max_workers
+        self.name = name
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix=name)
+        self._lock = threading.Lock()
+        self._submitted = 0
+        self._running = 0
+        self._pending = set()
+
+    async def run(self, func, *args, **kwargs):
+        with self._lock:
+            self._submitted += 1
+        future = self._executor.submit(functools.partial(self._call, func, *args, **kwargs))
+        with self._lock:
+            self._pending.add(future)
+        future.add_done_callback(self._discard)
+        return await asyncio.wrap_future(future)
+
+    def _discard(self, future):
+        with self._lock:
+            self._pending.discard(future)
+            if future.cancelled():
+                self._submitted -= 1
+
+    def _call(self, func, *args, **kwargs):
+        with self._lock:
+            self._running += 1
+        try:
+            return func(*args, **kwargs)
+        finally:
+            with self._lock:
+                self._running -= 1
+                self._submitted -= 1
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "max_workers": self.max_workers,
+                "running": self._running,
+                "queued": self._submitted - self._running,
+            }
+
+    def shutdown(self, wait: bool = True):
+        if not wait:
+            # Drop the calls that have not started (shutdown's cancel_futures would do
+            # this, but needs Python 3.9)
+            with self._lock:
+                pending = list(self._pending)
+            for future in pending:
+                future.cancel()
+        self._executor.shutdown(wait=wait)
+
+
+class AsyncWeaviateOperations:
+    """
+    Async counterpart of WeaviateOperations; every call runs on `executor`.
+    """
+
+    def __init__(self, weaviate_ops, executor: BlockingCallExecutor):
+        self.weaviate_ops = weaviate_ops
+        self.executor = executor
+
+    async def query_data(self, *args, **kwargs):
+        return await self.executor.run(self.weaviate_ops.query_data, *args, **kwargs)
+
+    async def update_document(self, uuid, update_properties):
+        return await self.executor.run(self.weaviate_ops.update_document, uuid, update_properties)
+
+    async def delete_document(self, uuid):
+        return await self.executor.run(self.weaviate_ops.delete_document, uuid)
+
+    async def delete_documents(self, uuids: List[str]) -> int:
+        return await self.executor.run(self.weaviate_ops.delete_documents, uuids)
+
+    async def index_documents(self, documents, **writer_options) -> dict:
+        return await self.executor.run(self.weaviate_ops.index_documents, documents, **writer_options)
+
+    async def index_minio_objects(self, *args, **kwargs) -> dict:
+        return await self.executor.run(self.weaviate_ops.index_minio_objects, *args, **kwargs)
+
@@ -0,0 +1,123 @@
+from functools import lru_cache
+from typing import Callable, Iterable, Iterator, NamedTuple, Optional
+
+# Defaults for the chunker; overridable per call (see tool_config).
+DEFAULT_CHUNK_TOKENS = 512
+DEFAULT_OVERLAP_TOKENS = 64
+DEFAULT_RANGE_BYTES = 1024 * 1024
+# Used to turn token budgets into byte windows before the exact count is taken
+BYTES_PER_TOKEN = 4
+
+
+class Chunk(NamedTuple):
+    """A slice of an object's text; `offset` and `length` are in bytes of the stored object."""
+    key: str
+    etag: str
+    offset: int
+    length: int
+    content: str
+
+
+@lru_cache(maxsize=None)
+def default_token_counter() -> Callable[[str], int]:
+    """
+    Count tokens with tiktoken's cl100k_base encoding when it is available,
+    otherwise estimate from the UTF-8 length. Built once per process: loading the
+    encoding may mean a download attempt.
+    """
+    try:
+        import tiktoken
+        encoding = tiktoken.get_encoding("cl100k_base")
+    except Exception:
+        # Not installed, or the encoding file cannot be fetched (offline containers)
+        return lambda text: max(1, len(text.encode("utf-8")) // BYTES_PER_TOKEN)
+    return lambda text: len(encoding.encode(text, disallowed_special=()))
+
+
+def read_range(client, bucket_name: str, object_name: str, offset: int, length: int) -> bytes:
+    """
+    One ranged GET: up to `length` bytes of an object starting at `offset`.
+    """
+    response = client.get_object(bucket_name, object_name, offset=offset, length=length)
+    try:
+        return response.read()
+    finally:
+        response.close()
+        response.release_conn()
+
+
+def _split_point(window: bytes, minimum: int) -> int:
+    # Prefer a paragraph break, then a line break, then a space, past `minimum`
+    for separator in (b"\n\n", b"\n", b" "):
+        index = window.rfind(separator, minimum)
+        if index != -1:
+            return index + len(separator)
+    # No boundary at all: cut hard, but never inside a UTF-8 sequence
+    index = len(window)
+    while index > minimum and (window[index - 1] & 0xC0) == 0x80:
+        index -= 1
+    if index > minimum and window[index - 1] >= 0xC0:
+        index -= 1
+    return index if index > minimum else len(window)
+
+
+def _overlap_start(buffer: bytearray, end: int, overlap_bytes: int) -> int:
+    # Keep the overlap under half the chunk so every step makes progress
+    overlap_bytes = min(overlap_bytes, end // 2)
+    if overlap_bytes <= 0:
+        return end
+    start = end - overlap_bytes
+    # Start the overlap on a word so chunks do not begin mid-token
+    space = buffer.find(b" ", start, end)
+    return space + 1 if space != -1 and space + 1 < end else end
+
+
+def chunk_stream(
+    blocks: Iterable[bytes],
+    key: str,
+    etag: str,
+    chunk_tokens: int = DEFAULT_CHUNK_TOKENS,
+    overlap_tokens: int = DEFAULT_OVERLAP_TOKENS,
+    count_tokens: Optional[Callable[[str], int]] = None,
+) -> Iterator[Chunk]:
+    """
+    Split a stream of UTF-8 byte blocks into chunks of at most `chunk_tokens` tokens,
+    cutting on paragraph, line or word boundaries, with about `overlap_tokens` of overlap
+    between neighbours. Only the current window is held in memory.
+    """
+    count_tokens = count_tokens or default_token_counter()
+    window_bytes = chunk_tokens * BYTES_PER_TOKEN
+    overlap_bytes = min(overlap_tokens * BYTES_PER_TOKEN, window_bytes // 2)
+    blocks = iter(blocks)
+    buffer = bytearray()
+    buffer_offset = 0
+    exhausted = False
+
+    while True:
+        while not exhausted and len(buffer) <= window_bytes:
+            block = next(blocks, None)
+            if block is None:
+                exhausted = True
+            else:
+                buffer += block
+        if not buffer:
+            return
+
+        limit = min(len(buffer), window_bytes)
+        while True:
+            final = exhausted and limit == len(buffer)
+            end = limit if final else _split_point(bytes(buffer[:limit]), limit // 2)
+            text = buffer[:end].decode("utf-8", errors="replace")
+            tokens = count_tokens(text)
+            if tokens <= chunk_tokens or end <= 1:
+                break
+            # Dense text (code, CJK): shrink the window in proportion and try again
+            limit = max(1, int(end * chunk_tokens / tokens * 0.95))
+
+        yield Chunk(key, etag, buffer_offset, end, text)
+        if exhausted and end == len(buffer):
+            return
+        start = _overlap_start(buffer, end, overlap_bytes)
+        del buffer[:start]
+        buffer_offset += start
+
@@ -0,0 +1,194 @@
+import logging
+import os
+import threading
+from typing import Optional
+
+import certifi
+import urllib3
+import weaviate
+from minio import Minio
+from weaviate.config import Config, ConnectionConfig
+
+from .metrics import InstrumentedHTTPAdapter, InstrumentedPoolManager
+
+logger = logging.getLogger(__name__)
+
+# Defaults for pooled clients; see ClientRegistry.configure and tool_config.
+DEFAULT_POOL_SIZE = 32
+DEFAULT_CONNECT_TIMEOUT = 5.0
+DEFAULT_READ_TIMEOUT = 60.0
+DEFAULT_RETRIES = 3
+DEFAULT_BACKOFF = 0.2
+RETRY_STATUSES = (500, 502, 503, 504)
+
+
+def _retry(retries: int) -> urllib3.Retry:
+    # Only idempotent methods are retried, as in minio's own default client
+    return urllib3.Retry(total=retries, backoff_factor=DEFAULT_BACKOFF, status_forcelist=RETRY_STATUSES)
+
+
+class ClientRegistry:
+    """
+    Process-wide cache of MinIO and Weaviate clients, one per endpoint and credentials,
+    each backed by a tuned keep-alive connection pool.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._minio = {}
+        self._weaviate = {}
+        self.pool_options = {
+            "pool_size": DEFAULT_POOL_SIZE,
+            "connect_timeout": DEFAULT_CONNECT_TIMEOUT,
+            "read_timeout": DEFAULT_READ_TIMEOUT,
+            "retries": DEFAULT_RETRIES,
+        }
+
+    def configure(self, **pool_options):
+        """
+        Set the pool_size, connect_timeout, read_timeout and retries used for clients created from now on.
+        """
+        unknown = set(pool_options) - set(self.pool_options)
+        if unknown:
+            raise ValueError(f"Unknown pool options: {sorted(unknown)}")
+        self.pool_options.update(pool_options)
+
+    def minio(
+        self,
+        endpoint: str,
+        access_key: str,
+        secret_key: str,
+        secure: bool = False,
+        **pool_options,
+    ) -> Minio:
+        """
+        Return the shared MinIO client for these credentials, creating it on first use.
+        Pool options only take effect when the client is created.
+        """
+        key = (endpoint, access_key, secret_key, secure)
+        with self._lock:
+            entry = self._minio.get(key)
+            if entry is None:
+                options = {**self.pool_options, **pool_options}
+                pool_size = options["pool_size"]
+                http_client = InstrumentedPoolManager(
+                    maxsize=pool_size,
+                    block=True,  # wait for a free connection rather than open throwaway ones
+                    timeout=urllib3.Timeout(connect=options["connect_timeout"], read=options["read_timeout"]),
+                    retries=_retry(options["retries"]),
+                    cert_reqs="CERT_REQUIRED",
+                    ca_certs=os.environ.get("SSL_CERT_FILE") or certifi.where(),
+                )
+                client = Minio(endpoint, access_key=access_key, secret_key=secret_key, secure=secure, http_client=http_client)
+                entry = self._minio[key] = (client, http_client, pool_size)
+            return entry[0]
+
+    def weaviate(
+        self,
+        url: str,
+        api_key: Optional[str] = None,
+        **pool_options,
+    ) -> weaviate.Client:
+        """
+        Return the shared Weaviate client for this URL and key, creating it on first use.
+        Pool options only take effect when the client is created.
+        """
+        key = (url, api_key or None)
+        with self._lock:
+            entry = self._weaviate.get(key)
+            if entry is None:
+                options = {**self.pool_options, **pool_options}
+                pool_size = options["pool_size"]
+                client = weaviate.Client(
+                    url,
+                    auth_client_secret=weaviate.AuthApiKey(api_key) if api_key else None,
+                    timeout_config=(options["connect_timeout"], options["read_timeout"]),
+                    additional_config=Config(connection_config=ConnectionConfig(
+                        session_pool_connections=pool_size,
+                        session_pool_maxsize=pool_size,
+                    )),
+                )
+                # The client mounts an adapter without retries; replace it with one that has them
+                # (and records request metrics). ConnectionConfig has no retry setting, so this
+                # goes through the private v3 session (weaviate-client<4 in requirements.txt)
+                adapter = InstrumentedHTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size, max_retries=_retry(options["retries"]))
+                session = client._connection._session
+                session.mount("http://", adapter)
+                session.mount("https://", adapter)
+                entry = self._weaviate[key] = (client, adapter, pool_size)
+            return entry[0]
+
+    def health(self) -> dict:
+        """
+        Probe every registered backend; returns {"minio": {...}, "weaviate": {...}} keyed by endpoint.
+        """
+        with self._lock:
+            minio_clients = list(self._minio.items())
+            weaviate_clients = list(self._weaviate.items())
+        report = {"minio": {}, "weaviate": {}}
+        for (endpoint, *_), (client, _, _) in minio_clients:
+            try:
+                client.list_buckets()
+                report["minio"][endpoint] = "ok"
+            except Exception as e:
+                report["minio"][endpoint] = f"error: {e}"
+        for (url, _), (client, _, _) in weaviate_clients:
+            try:
+                report["weaviate"][url] = "ok" if client.is_ready() else "not ready"
+            except Exception as e:
+                report["weaviate"][url] = f"error: {e}"
+        return report
+
+    def stats(self) -> dict:
+        """
+        Connection pool utilization per backend: connections checked out, idle kept-alive
+        connections, connections created, requests served and the configured pool size.
+        """
+        with self._lock:
+            minio_pools = [(key[0], http_client.pools, size) for key, (_, http_client, size) in self._minio.items()]
+            weaviate_pools = [(key[0], adapter.poolmanager.pools, size) for key, (_, adapter, size) in self._weaviate.items()]
+        return {
+            "minio": {endpoint: self._pool_stats(pools, size) for endpoint, pools, size in minio_pools},
+            "weaviate": {url: self._pool_stats(pools, size) for url, pools, size in weaviate_pools},
+        }
+
+    @staticmethod
+    def _pool_stats(pools, size: int) -> dict:
+        in_use = idle = created = requests = 0
+        for host in list(pools.keys()):
+            pool = pools.get(host)
+            if pool is None or pool.pool is None:
+                continue
+            created += pool.num_connections
+            requests += pool.num_requests
+            # Free slots hold either a kept-alive connection or None (never opened)
+            slots = list(pool.pool.queue)
+            idle += sum(1 for conn in slots if conn is not None)
+            in_use += pool.pool.maxsize - len(slots)
+        return {"pool_size": size, "in_use": in_use, "idle": idle, "created": created, "requests": requests}
+
+    def close(self):
+        """
+        Close every pooled connection and forget all clients.
+        """
+        with self._lock:
+            minio_clients, self._minio = self._minio, {}
+            weaviate_clients, self._weaviate = self._weaviate, {}
+        for _, http_client, _ in minio_clients.values():
+            http_client.clear()
+        for client, _, _ in weaviate_clients.values():
+            try:
+                client._connection.close()
+            except Exception:
+                logger.exception("Failed to close Weaviate client")
+
+
+registry = ClientRegistry()
+
+
+def get_minio_client(endpoint: str, access_key: str, secret_key: str, secure: bool = False, **pool_options) -> Minio:
+    return registry.minio(endpoint, access_key, secret_key, secure, **pool_options)
+
+
+def get_weaviate_client(url: str, api_key: Optional[str] = None, **pool_options) -> weaviate.Client:
+    return registry.weaviate(url, api_key, **pool_options)
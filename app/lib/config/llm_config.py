@@ -7,3 +7,28 @@ LMSTUDIO_ENDPOINT = 'http://cda-DESKTOP:9999/v1'
 
 # OpenAI Configuration
 OPENAI_API_KEY = 'not-needed'
+
+# LLM response cache (content-addressed, SQLite-backed). Set LLM_CACHE_BUCKET to
+# mirror entries to MinIO so replicas share them. LLM_CACHE_PATH is relative to the
+# app directory unless absolute; its directory is created when missing.
+LLM_CACHE_ENABLED = True
+LLM_CACHE_PATH = 'data/llm-cache.sqlite'
+LLM_CACHE_MAX_ENTRIES = 100000
+LLM_CACHE_MAX_BYTES = 1024 * 1024 * 1024
+LLM_CACHE_BUCKET = ''
+
+# Models are built on first use (lib/models.py). Names listed in MODEL_WARMUP are
+# built in the background at startup instead; a model that fails to build is
+# retried after MODEL_RETRY_INTERVAL seconds.
+MODEL_WARMUP = ['indexing']
+MODEL_RETRY_INTERVAL = 30.0
+
+# Document processing LLM calls (lib/rate_limit.py): the account's request and token
+# budgets per minute (0 disables a bucket; provider rate-limit headers override them
+# once seen), the most requests in flight, retries of 429/5xx answers, and documents
+# sent to the model per batch while indexing
+LLM_REQUESTS_PER_MINUTE = 500
+LLM_TOKENS_PER_MINUTE = 200000
+LLM_MAX_CONCURRENCY = 16
+LLM_MAX_RETRIES = 6
+LLM_PROCESS_BATCH_SIZE = 64
@@ -1,22 +1,144 @@
 
+# Shared client pools (lib/clients.py): connections kept alive per endpoint,
+# timeouts in seconds, and retries for idempotent requests
+CLIENT_POOL_SIZE = 32
+CLIENT_CONNECT_TIMEOUT = 5.0
+CLIENT_READ_TIMEOUT = 60.0
+CLIENT_RETRIES = 3
+
+# Threads serving /query, /update and /delete, kept apart from indexing jobs
+# so ingestion cannot starve queries
+QUERY_EXECUTOR_WORKERS = 8
+
+# Background indexing jobs (lib/jobs.py): jobs running at once across all buckets,
+# where job checkpoints are kept (relative to the app directory unless absolute),
+# and seconds between checkpoints of a running job
+INDEX_JOB_CONCURRENCY = 2
+INDEX_JOB_CHECKPOINT_DIR = 'data/index-jobs'
+INDEX_JOB_CHECKPOINT_INTERVAL = 30.0
+
 # Configuration settings for Weaviate
 WEAVIATE_ENDPOINT = 'http://weaviate:8080'
 WEAVIATE_API_KEY = ''
 
+# Batch writer tuning: starting/min/max batch size, the per-request latency the
+# writer steers towards (seconds), and the longest an object may wait buffered
+WEAVIATE_BATCH_SIZE = 100
+WEAVIATE_MIN_BATCH_SIZE = 10
+WEAVIATE_MAX_BATCH_SIZE = 1000
+WEAVIATE_BATCH_TARGET_LATENCY = 1.0
+WEAVIATE_BATCH_FLUSH_INTERVAL = 5.0
+
+# Client-side embeddings (lib/embeddings.py): backend is 'sentence-transformers',
+# 'hashing' (deterministic bag-of-words vectors, for tests and benchmarks) or ''
+# to write objects without vectors and leave vectorizing to Weaviate. Texts per
+# embedding batch and embedding threads are tuned apart from the batch writer.
+EMBEDDING_BACKEND = ''
+EMBEDDING_MODEL = 'sentence-transformers/all-MiniLM-L6-v2'
+EMBEDDING_DEVICE = 'cpu'
+EMBEDDING_DIMENSIONS = 384
+EMBEDDING_BATCH_SIZE = 256
+EMBEDDING_WORKERS = 2
+
+# /query result cache (lib/query_cache.py): results cached per process, LRU
+# beyond QUERY_CACHE_MAX_ENTRIES and for at most QUERY_CACHE_TTL seconds. Set
+# QUERY_CACHE_BUCKET to share results and invalidations between replicas.
+QUERY_CACHE_ENABLED = True
+QUERY_CACHE_MAX_ENTRIES = 1024
+QUERY_CACHE_TTL = 30.0
+QUERY_CACHE_BUCKET = ''
+
+# Class export/import (python -m lib.weaviate_export): shard format ('jsonl.gz',
+# 'jsonl.zst' or 'parquet'), objects per shard, and shards imported in parallel
+EXPORT_FORMAT = 'jsonl.gz'
+EXPORT_SHARD_SIZE = 100000
+IMPORT_WORKERS = 4
+
 # Configuration settings for MinIO
 MINIO_ENDPOINT = 'minio:9000'
 MINIO_ACCESS_KEY = 'minio'
 MINIO_SECRET_KEY = 'minio123'
 MINIO_BUCKET = 'langchain-bucket'
 
+# Streaming loader tuning: concurrent GETs, objects fetched ahead, and the
+# ceiling on bytes held by fetched-but-unconsumed objects
+MINIO_MAX_WORKERS = 8
+MINIO_PREFETCH_DEPTH = 32
+MINIO_MAX_BUFFERED_BYTES = 64 * 1024 * 1024
+
+# Large transfers through MinioTool: bytes per multipart part / ranged GET,
+# and parts in flight at once
+MINIO_TRANSFER_PART_SIZE = 64 * 1024 * 1024
+MINIO_TRANSFER_PARALLELISM = 8
+
+# WritingTool documents (lib/document_store.py): a bucket to keep them in (empty
+# keeps them local only), and how fragmented a document's edits may get before
+# it is rewritten
+WRITING_DOCUMENTS_BUCKET = ''
+WRITING_DOCUMENTS_MAX_PIECES = 4096
+
+# python_repl tool (lib/repl_pool.py): warm worker subprocesses, runs per worker
+# before it is replaced, per-run CPU seconds and wall-clock timeout, per-worker
+# memory cap, modules each worker preloads, and how many runs may queue for a
+# worker (and for how long)
+REPL_WORKERS = 4
+REPL_MAX_RUNS = 50
+REPL_CPU_SECONDS = 30.0
+REPL_TIMEOUT = 60.0
+REPL_MEMORY_BYTES = 2 * 1024 * 1024 * 1024
+REPL_WARM_MODULES = ['numpy', 'pandas', 'matplotlib.pyplot']
+REPL_MAX_WAITING = 64
+REPL_QUEUE_TIMEOUT = 120.0
+
+# scrape_webpages (lib/web_fetch.py): connections in flight overall and per host,
+# minimum seconds between requests to one host, the directory of cached pages
+# (relative to the app directory unless absolute; empty disables the cache), and a
+# bucket to mirror page text to (empty: none)
+WEB_MAX_CONNECTIONS = 16
+WEB_MAX_PER_HOST = 2
+WEB_HOST_INTERVAL = 0.5
+WEB_TIMEOUT = 20.0
+WEB_CACHE_DIR = 'data/web-cache'
+WEB_MIRROR_BUCKET = ''
+
+# Chunking: index objects as token-bounded chunks read through ranged GETs of
+# CHUNK_RANGE_BYTES, instead of one document per object
+CHUNKING_ENABLED = True
+CHUNK_TOKENS = 512
+CHUNK_OVERLAP_TOKENS = 64
+CHUNK_RANGE_BYTES = 1024 * 1024
+
+# Incremental indexing manifests, one per indexed bucket ({bucket} is substituted):
+# kept in INDEX_MANIFEST_BUCKET/INDEX_MANIFEST_OBJECT when a bucket is set,
+# otherwise in the local file INDEX_MANIFEST_PATH (relative to the app directory
+# unless absolute)
+INDEX_MANIFEST_PATH = 'data/index-manifest-{bucket}.json'
+INDEX_MANIFEST_BUCKET = ''
+INDEX_MANIFEST_OBJECT = 'index-manifest-{bucket}.json'
+# Minimum seconds between manifest writes triggered by single-object (event) updates
+INDEX_MANIFEST_SAVE_INTERVAL = 30.0
+
+# /minio-event ingestion queue: pending events before the webhook answers 429,
+# worker threads, the window (seconds) in which repeat events for a key coalesce,
+# and how long shutdown drains the queue before dropping what is left
+EVENT_QUEUE_MAX_SIZE = 10000
+EVENT_QUEUE_WORKERS = 4
+EVENT_COALESCE_WINDOW = 1.0
+EVENT_QUEUE_STOP_TIMEOUT = 30.0
+
 # Configuration for tools
 minio_tool_config = {
-    "minio_url": tool_config.MINIO_ENDPOINT,
-    "access_key": tool_config.MINIO_ACCESS_KEY,
-    "secret_key": tool_config.MINIO_SECRET_KEY,
+    "minio_url": MINIO_ENDPOINT,
+    "access_key": MINIO_ACCESS_KEY,
+    "secret_key": MINIO_SECRET_KEY,
     "secure": False  # Set secure=True if using HTTPS
 }
+embedding_model_options = (
+    {"model_name": EMBEDDING_MODEL, "device": EMBEDDING_DEVICE, "batch_size": EMBEDDING_BATCH_SIZE}
+    if EMBEDDING_BACKEND == 'sentence-transformers'
+    else {"dimensions": EMBEDDING_DIMENSIONS}
+)
 weaviate_tool_config = {
-    "url": tool_config.WEAVIATE_ENDPOINT,
-    "api_key": tool_config.WEAVIATE_API_KEY
+    "url": WEAVIATE_ENDPOINT,
+    "api_key": WEAVIATE_API_KEY
 }
\ No newline at end of file
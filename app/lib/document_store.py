@@ -0,0 +1,297 @@
+import json
+import mmap
+import os
+import threading
+from pathlib import Path
+from typing import List, Optional, Sequence, Tuple
+
+import numpy as np
+from minio.error import S3Error
+
+# Defaults for the document store; overridable per store (see tool_config).
+DEFAULT_MAX_PIECES = 4096
+DEFAULT_MAX_ADDED_LINES = 10000
+
+EDIT_LOG_SUFFIX = ".edits"
+
+_FILE = 0
+_ADDED = 1
+
+
+def _split_lines(text: str) -> List[str]:
+    # Lines with their terminators, as readlines() returns them in text mode
+    text = text.replace("\r\n", "\n")
+    lines = text.split("\n")
+    return [line + "\n" for line in lines[:-1]] + ([lines[-1]] if lines[-1] else [])
+
+
+class Document:
+    """
+    One text file, read through `mmap` and a line-offset index and edited through a
+    piece table: the document is a list of pieces, each a run of lines from either the
+    file or the added lines. Reads and inserts cost the lines touched plus the number of
+    pieces, not the size of the file. Inserts are appended to an edit log beside the
+    file (`<name>.edits`) so they survive restarts; `compact` writes the whole document
+    back out and clears the log.
+    """
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        self.log_path = self.path.with_name(self.path.name + EDIT_LOG_SUFFIX)
+        self._file = None
+        self._mm: Optional[mmap.mmap] = None
+        self._starts = np.zeros(0, dtype=np.int64)
+        self._size = 0
+        self._added: List[str] = []
+        self._pieces: List[List[int]] = []
+        self._stat = None
+        self._open()
+
+    def _open(self):
+        self.close()
+        self._file = open(self.path, "rb")
+        self._size = os.fstat(self._file.fileno()).st_size
+        if self._size:
+            self._mm = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+            newlines = np.flatnonzero(np.frombuffer(self._mm, dtype=np.uint8) == 0x0A)
+            starts = np.concatenate(([0], newlines + 1))
+            self._starts = starts[starts < self._size]
+        else:
+            self._starts = np.zeros(0, dtype=np.int64)
+        self._added = []
+        self._pieces = [[_FILE, 0, len(self._starts)]] if len(self._starts) else []
+        self._stat = self._file_stat()
+        if self.log_path.exists():
+            with open(self.log_path, "r", encoding="utf-8") as log:
+                for entry in log:
+                    self._apply(json.loads(entry)["inserts"])
+
+    def _file_stat(self) -> Tuple[int, int]:
+        stat = self.path.stat()
+        return stat.st_mtime_ns, stat.st_size
+
+    def changed_on_disk(self) -> bool:
+        try:
+            return self._file_stat() != self._stat
+        except FileNotFoundError:
+            return True
+
+    def close(self):
+        if self._mm is not None:
+            # Views handed out by reads are already decoded, so the map can go
+            self._mm.close()
+            self._mm = None
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    @property
+    def line_count(self) -> int:
+        return sum(piece[2] for piece in self._pieces)
+
+    @property
+    def edits_pending(self) -> int:
+        return len(self._added)
+
+    def _file_lines(self, first: int, count: int) -> List[str]:
+        start = int(self._starts[first])
+        end = int(self._starts[first + count]) if first + count < len(self._starts) else self._size
+        return _split_lines(self._mm[start:end].decode("utf-8"))
+
+    def read_lines(self, start: int = 0, end: Optional[int] = None) -> List[str]:
+        """
+        Lines [start, end) with their terminators; negative and out-of-range bounds
+        behave as list slicing does.
+        """
+        start, end, _ = slice(start, end).indices(self.line_count)
+        lines: List[str] = []
+        position = 0
+        for source, first, count in self._pieces:
+            if position >= end:
+                break
+            if position + count > start:
+                skip = max(0, start - position)
+                take = min(count, end - position) - skip
+                if source == _FILE:
+                    lines.extend(self._file_lines(first + skip, take))
+                else:
+                    lines.extend(self._added[first + skip:first + skip + take])
+            position += count
+        return lines
+
+    def insert(self, inserts: Sequence[Tuple[int, str]]):
+        """
+        Apply (line_number, text) inserts in order, each before 1-indexed `line_number`
+        of the document as the previous inserts left it, and log them.
+        """
+        entry = [[int(line_number), text] for line_number, text in inserts]
+        with open(self.log_path, "a", encoding="utf-8") as log:
+            log.write(json.dumps({"inserts": entry}) + "\n")
+        self._apply(entry)
+
+    def _apply(self, inserts):
+        for line_number, text in inserts:
+            self._insert_piece(line_number - 1, [text + "\n"])
+
+    def _insert_piece(self, at: int, lines: List[str]):
+        piece = [_ADDED, len(self._added), len(lines)]
+        self._added.extend(lines)
+        position = 0
+        for index, (source, first, count) in enumerate(self._pieces):
+            if at <= position + count:
+                offset = at - position
+                if offset == 0:
+                    self._pieces.insert(index, piece)
+                elif offset == count:
+                    self._pieces.insert(index + 1, piece)
+                else:
+                    self._pieces[index:index + 1] = [[source, first, offset], piece, [source, first + offset, count - offset]]
+                return
+            position += count
+        self._pieces.append(piece)
+
+    def needs_compaction(self, max_pieces: int, max_added_lines: int) -> bool:
+        return len(self._pieces) > max_pieces or len(self._added) > max_added_lines
+
+    def compact(self):
+        """
+        Write the current document over the file (atomically) and drop the edit log.
+        """
+        temporary = self.path.with_name(f".{self.path.name}.compact")
+        with open(temporary, "w", encoding="utf-8", newline="") as out:
+            for source, first, count in self._pieces:
+                if source == _FILE:
+                    start = int(self._starts[first])
+                    end = int(self._starts[first + count]) if first + count < len(self._starts) else self._size
+                    out.write(self._mm[start:end].decode("utf-8"))
+                else:
+                    out.writelines(self._added[first:first + count])
+        self.close()
+        os.replace(temporary, self.path)
+        self.log_path.unlink(missing_ok=True)
+        self._open()
+
+
+class DocumentStore:
+    """
+    The documents under `directory`, opened once and kept open. With a MinIO `client` and
+    `bucket_name`, documents missing locally are fetched from `prefix` in the bucket,
+    every edit uploads the (small) edit log, and writes and compactions upload the
+    document itself, so only compaction moves whole documents.
+    """
+
+    def __init__(self, directory, client=None, bucket_name: Optional[str] = None, prefix: str = "documents/",
+                 max_pieces: int = DEFAULT_MAX_PIECES, max_added_lines: int = DEFAULT_MAX_ADDED_LINES):
+        self.directory = Path(directory)
+        self.client = client
+        self.bucket_name = bucket_name
+        self.prefix = prefix
+        self.max_pieces = max_pieces
+        self.max_added_lines = max_added_lines
+        self._documents = {}
+        self._lock = threading.Lock()
+
+    def _path(self, name: str) -> Path:
+        return self.directory / name
+
+    def _object(self, path: Path) -> str:
+        return self.prefix + path.relative_to(self.directory).as_posix()
+
+    def _synced(self) -> bool:
+        return self.client is not None and bool(self.bucket_name)
+
+    def _fetch(self, path: Path):
+        if not self._synced():
+            return
+        for local in (path, path.with_name(path.name + EDIT_LOG_SUFFIX)):
+            try:
+                self.client.fget_object(self.bucket_name, self._object(local), str(local))
+            except S3Error as e:
+                if e.code != "NoSuchKey":
+                    raise
+
+    def _upload(self, local: Path):
+        if self._synced():
+            self.client.fput_object(self.bucket_name, self._object(local), str(local))
+
+    def _document(self, name: str) -> Document:
+        # Called with the lock held
+        path = self._path(name)
+        document = self._documents.get(name)
+        if document is not None and not document.changed_on_disk():
+            return document
+        if document is not None:
+            document.close()
+        if not path.exists():
+            self._fetch(path)
+        document = self._documents[name] = Document(path)
+        return document
+
+    def read(self, name: str, start: int = 0, end: Optional[int] = None) -> List[str]:
+        with self._lock:
+            return self._document(name).read_lines(start, end)
+
+    def line_count(self, name: str) -> int:
+        with self._lock:
+            return self._document(name).line_count
+
+    def write(self, name: str, content: str):
+        """
+        Replace a document's content.
+        """
+        with self._lock:
+            path = self._path(name)
+            document = self._documents.pop(name, None)
+            if document is not None:
+                document.close()
+            path.parent.mkdir(parents=True, exist_ok=True)
+            with open(path, "w", encoding="utf-8") as f:
+                f.write(content)
+            log_path = path.with_name(path.name + EDIT_LOG_SUFFIX)
+            log_path.unlink(missing_ok=True)
+            self._upload(path)
+            if self._synced():
+                self.client.remove_object(self.bucket_name, self._object(log_path))
+
+    def insert(self, name: str, inserts: Sequence[Tuple[int, str]]) -> Optional[int]:
+        """
+        Insert text before 1-indexed line numbers, applied in the order given against the
+        document as it grows. Returns None, or the first out-of-range line number, in which
+        case nothing is changed.
+        """
+        with self._lock:
+            document = self._document(name)
+            lines = document.line_count
+            for line_number, _ in inserts:
+                if not 1 <= line_number <= lines + 1:
+                    return line_number
+                lines += 1
+            document.insert(inserts)
+            if document.needs_compaction(self.max_pieces, self.max_added_lines):
+                self._compact(name, document)
+            else:
+                self._upload(document.log_path)
+            return None
+
+    def compact(self, name: Optional[str] = None):
+        """
+        Fold pending edits into the files, for one document or all of them.
+        """
+        with self._lock:
+            names = [name] if name is not None else list(self._documents)
+            for document_name in names:
+                document = self._document(document_name)
+                if document.edits_pending:
+                    self._compact(document_name, document)
+
+    def _compact(self, name: str, document: Document):
+        document.compact()
+        self._upload(document.path)
+        if self._synced():
+            self.client.remove_object(self.bucket_name, self._object(document.log_path))
+
+    def close(self):
+        with self._lock:
+            for document in self._documents.values():
+                document.close()
+            self._documents.clear()
@@ -0,0 +1,195 @@
+import abc
+import re
+import threading
+import time
+import uuid as uuid_lib
+import zlib
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Optional, Sequence
+
+import numpy as np
+
+# Defaults for the embedding stage; overridable per writer (see tool_config).
+DEFAULT_DIMENSIONS = 384
+DEFAULT_EMBED_BATCH_SIZE = 256
+DEFAULT_EMBED_WORKERS = 2
+DEFAULT_SENTENCE_TRANSFORMER_MODEL = "sentence-transformers/all-MiniLM-L6-v2"
+
+_TOKEN = re.compile(r"\w+", re.UNICODE)
+
+
+class Embedder(abc.ABC):
+    """
+    Turns a batch of texts into one float32 matrix, a row per text.
+    """
+
+    dimensions: int
+
+    @abc.abstractmethod
+    def embed(self, texts: Sequence[str]) -> np.ndarray:
+        ...
+
+    def embed_query(self, text: str) -> np.ndarray:
+        return self.embed([text])[0]
+
+
+class HashingEmbedder(Embedder):
+    """
+    Deterministic bag-of-words vectors: every token is hashed (crc32) to a signed bucket
+    and rows are L2-normalized. No model and no randomness, so the same text always gets
+    the same vector in every process; meant for tests and for running without a model.
+    """
+
+    def __init__(self, dimensions: int = DEFAULT_DIMENSIONS):
+        self.dimensions = dimensions
+
+    def embed(self, texts: Sequence[str]) -> np.ndarray:
+        vectors = np.zeros((len(texts), self.dimensions), dtype=np.float32)
+        for row, text in enumerate(texts):
+            tokens = _TOKEN.findall(text.lower())
+            if not tokens:
+                continue
+            hashes = np.fromiter((zlib.crc32(token.encode("utf-8")) for token in tokens), dtype=np.uint32, count=len(tokens))
+            signs = np.where(hashes & 0x80000000, -1.0, 1.0).astype(np.float32)
+            np.add.at(vectors[row], hashes % self.dimensions, signs)
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        vectors /= np.where(norms == 0, 1, norms)
+        return vectors
+
+
+class SentenceTransformerEmbedder(Embedder):
+    """
+    A local sentence-transformers model, run on CPU unless `device` says otherwise.
+    Requires the optional `sentence-transformers` package.
+    """
+
+    def __init__(self, model_name: str = DEFAULT_SENTENCE_TRANSFORMER_MODEL, device: str = "cpu",
+                 batch_size: int = DEFAULT_EMBED_BATCH_SIZE):
+        try:
+            from sentence_transformers import SentenceTransformer
+        except ImportError as e:
+            raise ImportError("SentenceTransformerEmbedder requires `pip install sentence-transformers`") from e
+        self.model = SentenceTransformer(model_name, device=device)
+        self.dimensions = self.model.get_sentence_embedding_dimension()
+        self.batch_size = batch_size
+
+    def embed(self, texts: Sequence[str]) -> np.ndarray:
+        vectors = self.model.encode(list(texts), batch_size=self.batch_size, convert_to_numpy=True,
+                                    normalize_embeddings=True, show_progress_bar=False)
+        return vectors.astype(np.float32, copy=False)
+
+
+def get_embedder(backend: str, **options) -> Optional[Embedder]:
+    """
+    Build the embedder named by `backend` ("hashing" or "sentence-transformers");
+    an empty backend means objects are written without vectors.
+    """
+    if not backend:
+        return None
+    if backend == "hashing":
+        return HashingEmbedder(**options)
+    if backend == "sentence-transformers":
+        return SentenceTransformerEmbedder(**options)
+    raise ValueError(f"Unknown embedding backend: {backend}")
+
+
+class EmbeddingWriter:
+    """
+    Wraps an `AdaptiveBatchWriter` with an embedding stage. Objects are collected into
+    batches of `batch_size` texts, embedded together on `workers` threads while earlier
+    batches are being written, and passed on to the writer with their vectors.
+
+    Embedding batch size and parallelism are tuned here, apart from the writer's
+    own batch sizing, since the two stages saturate at different sizes.
+    """
+
+    def __init__(self, writer, embedder: Embedder, batch_size: int = DEFAULT_EMBED_BATCH_SIZE,
+                 workers: int = DEFAULT_EMBED_WORKERS, text_property: str = "content"):
+        self.writer = writer
+        self.embedder = embedder
+        self.batch_size = batch_size
+        self.workers = workers
+        self.text_property = text_property
+        self.embedded = 0
+        self.embed_seconds = 0.0
+        self._pending = []
+        self._in_flight = deque()
+        self._lock = threading.Lock()
+        self._pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="embed")
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    @property
+    def succeeded(self) -> int:
+        return self.writer.succeeded
+
+    @property
+    def failed(self) -> int:
+        return self.writer.failed
+
+    @property
+    def errors(self) -> list:
+        return self.writer.errors
+
+    def add(self, properties: dict, class_name: str, uuid: Optional[str] = None, vector: Optional[Sequence[float]] = None) -> str:
+        """
+        Queue an object for embedding and writing and return its UUID. Objects that already
+        carry a vector go straight to the writer.
+        """
+        if vector is not None:
+            return self.writer.add(properties, class_name, uuid=uuid, vector=vector)
+        object_uuid = str(uuid or uuid_lib.uuid4())
+        with self._lock:
+            self._pending.append((properties, class_name, object_uuid))
+            full = len(self._pending) >= self.batch_size
+        if full:
+            self._submit()
+        return object_uuid
+
+    def flush(self):
+        """
+        Embed everything queued, wait for it to reach the writer and flush the writer.
+        """
+        self._submit()
+        while self._in_flight:
+            self._in_flight.popleft().result()
+        return self.writer.flush()
+
+    def close(self):
+        try:
+            self.flush()
+        finally:
+            self._pool.shutdown(wait=True)
+            self.writer.close()
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "embedded": self.embedded,
+                "embed_seconds": self.embed_seconds,
+                "texts_per_second": self.embedded / self.embed_seconds if self.embed_seconds else 0.0,
+            }
+
+    def _submit(self):
+        with self._lock:
+            items, self._pending = self._pending, []
+        if not items:
+            return
+        # Backpressure: never more than two batches per worker waiting or being embedded
+        while len(self._in_flight) >= self.workers * 2:
+            self._in_flight.popleft().result()
+        self._in_flight.append(self._pool.submit(self._embed_and_write, items))
+
+    def _embed_and_write(self, items: List[tuple]):
+        start = time.monotonic()
+        vectors = self.embedder.embed([properties.get(self.text_property) or "" for properties, _, _ in items])
+        with self._lock:
+            self.embedded += len(items)
+            self.embed_seconds += time.monotonic() - start
+        for (properties, class_name, object_uuid), vector in zip(items, vectors):
+            self.writer.add(properties, class_name, uuid=object_uuid, vector=vector)
@@ -0,0 +1,185 @@
+import logging
+import threading
+import time
+from collections import OrderedDict, deque
+from typing import Callable, Optional
+
+logger = logging.getLogger(__name__)
+
+# Defaults for the ingestion queue; overridable per queue (see tool_config).
+DEFAULT_MAX_SIZE = 10000
+DEFAULT_WORKERS = 4
+DEFAULT_COALESCE_WINDOW = 1.0
+DEFAULT_STOP_TIMEOUT = 30.0
+THROUGHPUT_WINDOW = 60.0
+
+
+class _PendingEvent:
+    __slots__ = ("event_name", "bucket", "key", "enqueued_at")
+
+    def __init__(self, event_name: str, bucket: str, key: str, enqueued_at: float):
+        self.event_name = event_name
+        self.bucket = bucket
+        self.key = key
+        self.enqueued_at = enqueued_at
+
+
+class EventIngestQueue:
+    """
+    Bounded in-process queue that hands bucket notifications to a pool of worker threads.
+
+    Events for the same bucket/key that arrive within `coalesce_window` seconds of each
+    other collapse into one, keeping the most recent event name. A key is never handled
+    by two workers at once. `handler(event_name, bucket, key)` does the actual work.
+    """
+
+    def __init__(
+        self,
+        handler: Callable[[str, str, str], None],
+        max_size: int = DEFAULT_MAX_SIZE,
+        workers: int = DEFAULT_WORKERS,
+        coalesce_window: float = DEFAULT_COALESCE_WINDOW,
+    ):
+        self.handler = handler
+        self.max_size = max_size
+        self.workers = workers
+        self.coalesce_window = coalesce_window
+
+        self._pending = OrderedDict()
+        self._in_flight = set()
+        self._cond = threading.Condition()
+        self._stopping = False
+        self._threads = []
+
+        self._completed = deque()
+        self.enqueued = 0
+        self.coalesced = 0
+        self.rejected = 0
+        self.processed = 0
+        self.failed = 0
+        self.dropped = 0
+        self.last_lag = 0.0
+
+    def start(self):
+        with self._cond:
+            self._stopping = False
+        for i in range(self.workers):
+            thread = threading.Thread(target=self._work, name=f"event-ingest-{i}", daemon=True)
+            thread.start()
+            self._threads.append(thread)
+
+    def stop(self, timeout: Optional[float] = DEFAULT_STOP_TIMEOUT):
+        """
+        Stop accepting work and let workers drain what is already queued for up to
+        `timeout` seconds (None: however long it takes). Events still queued then are
+        dropped and logged; handlers already running finish on their own.
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._cond:
+            self._stopping = True
+            self._cond.notify_all()
+        for thread in self._threads:
+            thread.join(None if deadline is None else max(deadline - time.monotonic(), 0.0))
+        with self._cond:
+            dropped = len(self._pending)
+            in_flight = len(self._in_flight)
+            self._pending.clear()
+            self.dropped += dropped
+            self._cond.notify_all()
+        if dropped or in_flight:
+            logger.warning("Event queue stopped after %gs: dropped %d queued events, %d still in flight",
+                           timeout, dropped, in_flight)
+        self._threads = []
+
+    def submit(self, event_name: str, bucket: str, key: str, timeout: float = 0.0) -> bool:
+        """
+        Queue an event. Waits up to `timeout` seconds for room when the queue is full and
+        returns False if there still is none.
+        """
+        now = time.monotonic()
+        with self._cond:
+            pending = self._pending.get((bucket, key))
+            if pending is not None:
+                pending.event_name = event_name
+                self.coalesced += 1
+                return True
+            deadline = now + timeout
+            while len(self._pending) >= self.max_size:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0 or self._stopping:
+                    self.rejected += 1
+                    return False
+                self._cond.wait(remaining)
+            self._pending[(bucket, key)] = _PendingEvent(event_name, bucket, key, now)
+            self.enqueued += 1
+            self._cond.notify_all()
+        return True
+
+    def metrics(self) -> dict:
+        now = time.monotonic()
+        with self._cond:
+            oldest = next(iter(self._pending.values()), None)
+            self._trim_completed(now)
+            return {
+                "depth": len(self._pending),
+                "in_flight": len(self._in_flight),
+                "max_size": self.max_size,
+                "workers": self.workers,
+                "enqueued": self.enqueued,
+                "coalesced": self.coalesced,
+                "rejected": self.rejected,
+                "processed": self.processed,
+                "failed": self.failed,
+                "dropped": self.dropped,
+                "oldest_lag_seconds": now - oldest.enqueued_at if oldest else 0.0,
+                "last_lag_seconds": self.last_lag,
+                "throughput_per_second": len(self._completed) / THROUGHPUT_WINDOW,
+            }
+
+    def _next_ready(self, now: float) -> Optional[_PendingEvent]:
+        for identity, event in self._pending.items():
+            if now - event.enqueued_at < self.coalesce_window and not self._stopping:
+                # Insertion order means every later event is younger still
+                return None
+            if identity not in self._in_flight:
+                del self._pending[identity]
+                return event
+        return None
+
+    def _work(self):
+        while True:
+            with self._cond:
+                while True:
+                    now = time.monotonic()
+                    event = self._next_ready(now)
+                    if event is not None:
+                        break
+                    if self._stopping and not self._pending:
+                        return
+                    # Sleep until the oldest runnable event leaves its window, or until
+                    # a submit/completion notifies us; keys in flight wait for completion.
+                    waiting = next((e for i, e in self._pending.items() if i not in self._in_flight), None)
+                    wait = self.coalesce_window - (now - waiting.enqueued_at) if waiting else None
+                    self._cond.wait(max(wait, 0.001) if wait is not None else None)
+                self._in_flight.add((event.bucket, event.key))
+                self.last_lag = now - event.enqueued_at
+                self._cond.notify_all()
+            try:
+                self.handler(event.event_name, event.bucket, event.key)
+                failed = False
+            except Exception:
+                logger.exception("Failed to handle %s for %s/%s", event.event_name, event.bucket, event.key)
+                failed = True
+            with self._cond:
+                self._in_flight.discard((event.bucket, event.key))
+                if failed:
+                    self.failed += 1
+                else:
+                    self.processed += 1
+                    self._completed.append(time.monotonic())
+                    self._trim_completed(self._completed[-1])
+                self._cond.notify_all()
+
+    def _trim_completed(self, now: float):
+        while self._completed and now - self._completed[0] > THROUGHPUT_WINDOW:
+            self._completed.popleft()
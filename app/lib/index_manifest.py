@@ -0,0 +1,156 @@
+import io
+import json
+import os
+import tempfile
+import threading
+import time
+from typing import Dict, Iterable, List, NamedTuple, Optional
+
+from minio.error import S3Error
+
+MANIFEST_VERSION = 1
+
+
+class ManifestDiff(NamedTuple):
+    """Objects that need (re)indexing, keys that disappeared, and how many were skipped."""
+    changed: List
+    deleted: List[str]
+    unchanged: int
+
+
+class LocalManifestStore:
+    """Keeps the manifest as a JSON file on local disk."""
+
+    def __init__(self, path: str):
+        self.path = path
+
+    def read(self) -> Optional[dict]:
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return None
+
+    def write(self, data: dict):
+        # Write-then-rename so a crash never leaves a truncated manifest behind
+        directory = os.path.dirname(os.path.abspath(self.path))
+        os.makedirs(directory, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=directory, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                json.dump(data, f)
+            os.replace(tmp_path, self.path)
+        except BaseException:
+            os.unlink(tmp_path)
+            raise
+
+
+class MinioManifestStore:
+    """Keeps the manifest as a JSON object in a MinIO bucket so every replica shares it."""
+
+    def __init__(self, client, bucket_name: str, object_name: str = "index-manifest.json"):
+        self.client = client
+        self.bucket_name = bucket_name
+        self.object_name = object_name
+
+    def read(self) -> Optional[dict]:
+        try:
+            response = self.client.get_object(self.bucket_name, self.object_name)
+        except S3Error as e:
+            if e.code == "NoSuchKey":
+                return None
+            raise
+        try:
+            return json.loads(response.data)
+        finally:
+            response.close()
+            response.release_conn()
+
+    def write(self, data: dict):
+        payload = json.dumps(data).encode("utf-8")
+        self.client.put_object(self.bucket_name, self.object_name, io.BytesIO(payload),
+                               length=len(payload), content_type="application/json")
+
+
+class IndexManifest:
+    """
+    Maps each indexed object key to the ETag and size it had when indexed and to the
+    Weaviate UUIDs created from it, so a run only touches objects that changed.
+    """
+
+    def __init__(self, store, save_interval: float = 0.0):
+        self.store = store
+        self.save_interval = save_interval
+        self._lock = threading.Lock()
+        self._dirty = False
+        self._last_save = 0.0
+        data = store.read() or {}
+        self.entries: Dict[str, dict] = data.get("objects", {})
+
+    def diff(self, objects: Iterable, detect_deletions: bool = True) -> ManifestDiff:
+        """
+        Compare a bucket listing against the manifest. Pass `detect_deletions=False` when
+        `objects` is only part of the bucket.
+        """
+        changed, seen, unchanged = [], set(), 0
+        for obj in objects:
+            seen.add(obj.object_name)
+            entry = self.entries.get(obj.object_name)
+            if entry is None or entry["etag"] != obj.etag or entry["size"] != obj.size:
+                changed.append(obj)
+            else:
+                unchanged += 1
+        deleted = []
+        if detect_deletions:
+            with self._lock:
+                deleted = [key for key in self.entries if key not in seen]
+        return ManifestDiff(changed, deleted, unchanged)
+
+    def record(self, key: str, etag: str, size: int, uuids: List[str]) -> List[str]:
+        """
+        Record the UUIDs now indexed for `key` and return the ones they replace.
+        """
+        with self._lock:
+            previous = self.entries.get(key)
+            self.entries[key] = {"etag": etag, "size": size, "uuids": list(uuids)}
+            self._dirty = True
+        if previous is None:
+            return []
+        # Deterministic IDs are reused when an object is re-indexed; only drop the others
+        current = set(uuids)
+        return [uuid for uuid in previous["uuids"] if uuid not in current]
+
+    def forget(self, key: str) -> List[str]:
+        """
+        Drop `key` from the manifest and return its UUIDs.
+        """
+        with self._lock:
+            entry = self.entries.pop(key, None)
+            self._dirty = self._dirty or entry is not None
+        return entry["uuids"] if entry else []
+
+    def retry(self, key: str, uuids: Iterable[str] = ()):
+        """
+        Make the next run index `key` again while keeping track of its UUIDs and of
+        `uuids` (objects it may still have from before), so they are replaced then.
+        """
+        with self._lock:
+            entry = self.entries.get(key)
+            known = list(entry["uuids"]) if entry else []
+            seen = set(known)
+            known += [uuid for uuid in uuids if uuid not in seen]
+            self.entries[key] = {"etag": None, "size": None, "uuids": known}
+            self._dirty = True
+
+    def save(self, force: bool = True):
+        """
+        Persist the manifest. With `force=False` the write is skipped when nothing changed
+        or the previous save was less than `save_interval` seconds ago.
+        """
+        with self._lock:
+            if not force and (not self._dirty or time.monotonic() - self._last_save < self.save_interval):
+                return
+            data = {"version": MANIFEST_VERSION, "objects": dict(self.entries)}
+            self._dirty = False
+            self._last_save = time.monotonic()
+        self.store.write(data)
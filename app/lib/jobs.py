@@ -0,0 +1,240 @@
+import json
+import logging
+import os
+import threading
+import time
+import uuid as uuid_lib
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+# Defaults for the job manager; overridable per manager (see tool_config).
+DEFAULT_MAX_CONCURRENT_JOBS = 2
+DEFAULT_CHECKPOINT_INTERVAL = 30.0
+
+PENDING = "pending"
+RUNNING = "running"
+COMPLETED = "completed"
+FAILED = "failed"
+CANCELLED = "cancelled"
+ACTIVE_STATUSES = (PENDING, RUNNING)
+
+
+class IndexJob:
+    """
+    Progress of one bucket indexing run. The runner reports through `begin`,
+    `cancelled` and `object_done`; everything else reads `to_dict`.
+    """
+
+    def __init__(self, job_id: str, bucket: str, manager: "JobManager", last_key: Optional[str] = None,
+                 processed: int = 0, failed: int = 0, created_at: Optional[float] = None):
+        self.id = job_id
+        self.bucket = bucket
+        self.status = PENDING
+        self.last_key = last_key
+        self.processed = processed
+        self.failed = failed
+        self.total = None
+        self.error = None
+        self.result = None
+        self.created_at = created_at or time.time()
+        self.started_at = None
+        self.finished_at = None
+        self._manager = manager
+        self._cancel = threading.Event()
+        self._lock = threading.Lock()
+        self._processed_at_start = processed
+        self._done_key = last_key
+        self._last_checkpoint = time.monotonic()
+
+    def begin(self, total: Optional[int]):
+        with self._lock:
+            # On resume the remaining work is what is left after the checkpoint
+            self.total = None if total is None else self.processed + total
+
+    def cancelled(self) -> bool:
+        return self._cancel.is_set()
+
+    def cancel(self):
+        self._cancel.set()
+
+    def object_done(self, key: str, checkpoint: Callable[[], int]):
+        """
+        Called after all of `key`'s documents are queued. `checkpoint` flushes pending writes,
+        persists the manifest and returns the number of failed writes so far; it is only
+        invoked when a checkpoint is due.
+        """
+        with self._lock:
+            self.processed += 1
+            self._done_key = key
+        if time.monotonic() - self._last_checkpoint >= self._manager.checkpoint_interval:
+            failed = checkpoint()
+            with self._lock:
+                self.last_key = key
+                self.failed = failed
+            self._last_checkpoint = time.monotonic()
+            self._manager.save_checkpoint(self)
+
+    def to_dict(self) -> dict:
+        with self._lock:
+            running_for = (self.finished_at or time.time()) - self.started_at if self.started_at else 0.0
+            done_this_run = self.processed - self._processed_at_start
+            return {
+                "id": self.id,
+                "bucket": self.bucket,
+                "status": self.status,
+                "processed": self.processed,
+                "failed": self.failed,
+                "remaining": None if self.total is None else max(self.total - self.processed, 0),
+                "throughput_per_second": done_this_run / running_for if running_for > 0 else 0.0,
+                "last_key": self.last_key,
+                "created_at": self.created_at,
+                "started_at": self.started_at,
+                "finished_at": self.finished_at,
+                "error": self.error,
+            }
+
+
+class JobManager:
+    """
+    Runs bucket indexing jobs in the background with bounded global concurrency.
+
+    `runner(job)` performs the indexing, resuming after `job.last_key` when it is set,
+    and returns a result dict. Job state is checkpointed to one JSON file per job in
+    `checkpoint_dir`, so `resume()` can restart interrupted jobs after a crash; it also
+    creates the directory, and must run before the first `submit`.
+    """
+
+    def __init__(
+        self,
+        runner: Callable[[IndexJob], dict],
+        checkpoint_dir: str,
+        max_concurrent: int = DEFAULT_MAX_CONCURRENT_JOBS,
+        checkpoint_interval: float = DEFAULT_CHECKPOINT_INTERVAL,
+    ):
+        self.runner = runner
+        self.checkpoint_dir = checkpoint_dir
+        self.max_concurrent = max_concurrent
+        self.checkpoint_interval = checkpoint_interval
+        self._jobs: Dict[str, IndexJob] = {}
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=max_concurrent, thread_name_prefix="index-job")
+        # Jobs cancelled by shutdown rather than by a user; they stay pending
+        self._interrupted = set()
+
+    def submit(self, bucket: str) -> IndexJob:
+        """
+        Start indexing `bucket`, or return the job already active for it.
+        """
+        with self._lock:
+            for job in self._jobs.values():
+                if job.bucket == bucket and job.status in ACTIVE_STATUSES:
+                    return job
+            job = IndexJob(uuid_lib.uuid4().hex, bucket, self)
+            self._jobs[job.id] = job
+        self.save_checkpoint(job)
+        self._executor.submit(self._run, job)
+        return job
+
+    def resume(self) -> List[IndexJob]:
+        """
+        Load every checkpoint and restart the jobs that had not finished.
+        """
+        os.makedirs(self.checkpoint_dir, exist_ok=True)
+        resumed = []
+        for name in sorted(os.listdir(self.checkpoint_dir)):
+            if not name.endswith(".json"):
+                continue
+            try:
+                with open(os.path.join(self.checkpoint_dir, name), "r", encoding="utf-8") as f:
+                    state = json.load(f)
+            except (OSError, ValueError):
+                logger.exception("Skipping unreadable job checkpoint %s", name)
+                continue
+            job = IndexJob(state["id"], state["bucket"], self, last_key=state.get("last_key"),
+                           processed=state.get("processed", 0), failed=state.get("failed", 0),
+                           created_at=state.get("created_at"))
+            job.status = PENDING if state.get("status") == RUNNING else state.get("status", PENDING)
+            job.finished_at = state.get("finished_at")
+            job.error = state.get("error")
+            with self._lock:
+                if job.id in self._jobs:
+                    continue
+                self._jobs[job.id] = job
+            if job.status in ACTIVE_STATUSES:
+                self._executor.submit(self._run, job)
+                resumed.append(job)
+        return resumed
+
+    def get(self, job_id: str) -> Optional[IndexJob]:
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def list(self) -> List[IndexJob]:
+        with self._lock:
+            return sorted(self._jobs.values(), key=lambda job: job.created_at, reverse=True)
+
+    def cancel(self, job_id: str) -> Optional[IndexJob]:
+        job = self.get(job_id)
+        if job is not None and job.status in ACTIVE_STATUSES:
+            job.cancel()
+        return job
+
+    def stats(self) -> dict:
+        with self._lock:
+            statuses = [job.status for job in self._jobs.values()]
+        return {
+            "max_concurrent": self.max_concurrent,
+            "running": statuses.count(RUNNING),
+            "pending": statuses.count(PENDING),
+        }
+
+    def shutdown(self):
+        """
+        Cancel active jobs (they stay resumable from their last checkpoint) and wait for them.
+        """
+        with self._lock:
+            active = [job for job in self._jobs.values() if job.status in ACTIVE_STATUSES and not job.cancelled()]
+            self._interrupted.update(job.id for job in active)
+        for job in active:
+            job.cancel()
+        self._executor.shutdown(wait=True)
+        for job in active:
+            # Jobs that completed or failed meanwhile keep their status
+            if job.status in ACTIVE_STATUSES:
+                job.status = PENDING
+                self.save_checkpoint(job)
+
+    def save_checkpoint(self, job: IndexJob):
+        state = job.to_dict()
+        path = os.path.join(self.checkpoint_dir, f"{job.id}.json")
+        tmp_path = path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(state, f)
+        os.replace(tmp_path, path)
+
+    def _cancelled_status(self, job: IndexJob) -> str:
+        # Interrupted by shutdown rather than by a user: resume on next start
+        with self._lock:
+            return PENDING if job.id in self._interrupted else CANCELLED
+
+    def _run(self, job: IndexJob):
+        if job.cancelled():
+            job.status = self._cancelled_status(job)
+            self.save_checkpoint(job)
+            return
+        job.status = RUNNING
+        job.started_at = time.time()
+        try:
+            job.result = self.runner(job)
+            # The runner has flushed everything it queued, so all of it is a safe resume point
+            job.last_key = job._done_key
+            job.failed = job.result.get("failed", job.failed)
+            job.status = self._cancelled_status(job) if job.cancelled() else COMPLETED
+        except Exception as e:
+            logger.exception("Index job %s for bucket %s failed", job.id, job.bucket)
+            job.status = FAILED
+            job.error = str(e)
+        job.finished_at = time.time()
+        self.save_checkpoint(job)
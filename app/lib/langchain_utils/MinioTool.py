@@ -1,21 +1,33 @@
+from typing import Any
+
 from langchain.tools import BaseTool
-from minio import Minio
 from minio.error import S3Error
 
+from ..clients import get_minio_client
+from ..transfers import DEFAULT_PART_SIZE, DEFAULT_PARALLELISM, ChecksumMismatch, ParallelTransfer
+
 class MinioTool(BaseTool):
     name = "minio"
     description = "Interact with MinIO object storage."
+    config: dict = {}
+    minio_client: Any = None
+    transfer: Any = None
 
-    def __init__(self, minio_url, access_key, secret_key, secure=False):
+    def __init__(self, minio_url, access_key, secret_key, secure=False, part_size=DEFAULT_PART_SIZE, parallelism=DEFAULT_PARALLELISM):
         """
         Initialize the MinIO client.
         :param minio_url: URL of the MinIO server.
         :param access_key: Access key for MinIO.
         :param secret_key: Secret key for MinIO.
         :param secure: Use secure connection.
+        :param part_size: Size of each part of large uploads and downloads, in bytes.
+        :param parallelism: Parts transferred concurrently.
         """
+        super().__init__()
+        self.config = {"endpoint": minio_url, "access_key": access_key, "secret_key": secret_key, "secure": secure}
         try:
-            self.minio_client = Minio(minio_url, access_key=access_key, secret_key=secret_key, secure=secure)
+            self.minio_client = get_minio_client(minio_url, access_key, secret_key, secure)
+            self.transfer = ParallelTransfer(self.minio_client, part_size=part_size, parallelism=parallelism)
         except Exception as e:
             raise ValueError(f"Failed to initialize MinioTool: {e}")
 
@@ -41,16 +53,16 @@ class MinioTool(BaseTool):
             
     def upload_file(self, bucket_name, object_name, file_path):
         try:
-            self.minio_client.fput_object(bucket_name, object_name, file_path)
-            return {"status": "success", "message": f"File {file_path} uploaded as {object_name} in bucket {bucket_name}"}
-        except S3Error as e:
+            result = self.transfer.upload_file(bucket_name, object_name, file_path)
+            return {"status": "success", "message": f"File {file_path} uploaded as {object_name} in bucket {bucket_name}", **result}
+        except (S3Error, OSError) as e:
             return {"status": "error", "message": str(e)}
 
     def download_file(self, bucket_name, object_name, file_path):
         try:
-            self.minio_client.fget_object(bucket_name, object_name, file_path)
-            return {"status": "success", "message": f"File {object_name} downloaded from bucket {bucket_name} to {file_path}"}
-        except S3Error as e:
+            result = self.transfer.download_file(bucket_name, object_name, file_path)
+            return {"status": "success", "message": f"File {object_name} downloaded from bucket {bucket_name} to {file_path}", **result}
+        except (S3Error, OSError, ChecksumMismatch) as e:
             return {"status": "error", "message": str(e)}
 
     def list_objects(self, bucket_name):
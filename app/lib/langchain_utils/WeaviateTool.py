@@ -1,32 +1,53 @@
+from typing import Any
+
 from langchain.tools import BaseTool
-import weaviate
+
+from ..clients import get_weaviate_client
+from ..weaviate_batch import AdaptiveBatchWriter
+from ..weaviate_query import DEFAULT_PAGE_SIZE, compile_query
 
 class WeaviateTool(BaseTool):
     name = "weaviate"
     description = "Interact with Weaviate object storage."
+    config: dict = {}
+    client: Any = None
 
     def __init__(self, weaviate_url, weaviate_api_key=None):
-        # Initialize the Weaviate client
-        self.client = weaviate.Client(url=weaviate_url, api_key=weaviate_api_key)
+        super().__init__()
+        self.config = {"url": weaviate_url, "api_key": weaviate_api_key}
+        # Shared, pooled Weaviate client
+        self.client = get_weaviate_client(weaviate_url, weaviate_api_key)
 
-    def run(self, action, class_name, properties, where_filter=None):
+    def run(self, action, class_name, properties, where_filter=None, near_vector=None, limit=None):
         # Choose the action
         if action == 'get':
-            return self.get_objects(class_name, properties, where_filter)
+            return self.get_objects(class_name, properties, where_filter, near_vector, limit)
         elif action == 'create':
             return self.create_object(class_name, properties)
+        elif action == 'create_many':
+            return self.create_objects(class_name, properties)
         else:
             return {"error": f"Action '{action}' not supported"}
 
-    def get_objects(self, class_name, properties, where_filter=None):
+    def _run(self, action, class_name, properties, **kwargs):
+        return self.run(action, class_name, properties, **kwargs)
+
+    def get_objects(self, class_name, properties, where_filter=None, near_vector=None, limit=None):
         try:
-            # Build the query
+            # Build the query (compiled once per shape) and execute it
             query = self._build_query(class_name, properties, where_filter)
-            # Execute the query
-            return self.client.query.get(class_name, properties).with_where(where_filter).do()
+            return query.execute(self.client, vector=near_vector, limit=limit)
         except Exception as e:
             return {"status": "error", "message": str(e)}
 
+    def iter_objects(self, class_name, properties, where_filter=None, near_vector=None, page_size=DEFAULT_PAGE_SIZE):
+        """
+        Yield every matching object page by page, holding one page in memory at a time.
+        Unfiltered walks use the `after` cursor and can cover any number of objects.
+        """
+        query = self._build_query(class_name, properties, where_filter)
+        return query.iter_objects(self.client, page_size=page_size, vector=near_vector)
+
     def create_object(self, class_name, properties):
         try:
             # Create the object
@@ -35,9 +56,22 @@ class WeaviateTool(BaseTool):
         except Exception as e:
             return {"status": "error", "message": str(e)}
 
+    def create_objects(self, class_name, objects):
+        try:
+            # Create the objects through the batch API
+            errors = []
+            with AdaptiveBatchWriter(self.client, on_error=errors.extend) as writer:
+                for properties in objects:
+                    writer.add(properties, class_name)
+            if errors:
+                return {"status": "error", "message": f"{len(errors)} of {writer.succeeded + writer.failed} objects failed",
+                        "errors": [error._asdict() for error in errors]}
+            return {"status": "success", "message": f"{writer.succeeded} objects created successfully"}
+        except Exception as e:
+            return {"status": "error", "message": str(e)}
+
     def _build_query(self, class_name, properties, where_filter):
-        # Implement query building logic if necessary
-        pass
+        return compile_query(class_name, properties, where_filter)
 
 # Example usage
 #weaviate_tool = WeaviateTool(weaviate_url="http://localhost:8080", weaviate_api_key="YOUR_API_KEY")
@@ -0,0 +1,180 @@
+import hashlib
+import io
+import logging
+import os
+import sqlite3
+import threading
+import time
+from typing import Any, Optional
+
+from langchain_core.caches import RETURN_VAL_TYPE, BaseCache
+from langchain_core.load import dumps, loads
+from minio.error import S3Error
+
+logger = logging.getLogger(__name__)
+
+# Defaults for the LLM cache; overridable per cache (see llm_config).
+DEFAULT_MAX_ENTRIES = 100000
+DEFAULT_MAX_BYTES = 1024 * 1024 * 1024
+
+
+def cache_key(prompt: str, llm_string: str) -> str:
+    """
+    Content address of one LLM call: the model and its parameters plus the rendered prompt
+    (template and document text together).
+    """
+    digest = hashlib.sha256()
+    digest.update(llm_string.encode("utf-8"))
+    digest.update(b"\0")
+    digest.update(prompt.encode("utf-8"))
+    return digest.hexdigest()
+
+
+class DiskLLMCache(BaseCache):
+    """
+    Content-addressed LLM response cache kept in a local SQLite file.
+
+    Entries are evicted least-recently-used once the cache holds more than `max_entries`
+    responses or `max_bytes` of serialized output. With a MinIO `client` and `bucket_name`,
+    every new entry is also written to the bucket and local misses are looked up there,
+    so replicas share what any of them has computed. When MinIO fails, the error is logged
+    and the cache carries on with its local copy.
+    Install it for every model in the process with `set_llm_cache`.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        max_entries: int = DEFAULT_MAX_ENTRIES,
+        max_bytes: int = DEFAULT_MAX_BYTES,
+        client=None,
+        bucket_name: Optional[str] = None,
+        prefix: str = "llm-cache/",
+    ):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.client = client
+        self.bucket_name = bucket_name
+        self.prefix = prefix
+        self.hits = 0
+        self.misses = 0
+        self.remote_hits = 0
+        self.evictions = 0
+        self.remote_errors = 0
+
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS llm_cache ("
+            " key TEXT PRIMARY KEY, value TEXT NOT NULL, size INTEGER NOT NULL, last_access REAL NOT NULL)"
+        )
+        self._db.execute("CREATE INDEX IF NOT EXISTS llm_cache_last_access ON llm_cache (last_access)")
+        self._entries, self._bytes = self._db.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM llm_cache").fetchone()
+
+    def lookup(self, prompt: str, llm_string: str) -> Optional[RETURN_VAL_TYPE]:
+        key = cache_key(prompt, llm_string)
+        with self._lock:
+            row = self._db.execute("SELECT value FROM llm_cache WHERE key = ?", (key,)).fetchone()
+            if row is not None:
+                self._db.execute("UPDATE llm_cache SET last_access = ? WHERE key = ?", (time.time(), key))
+                self.hits += 1
+                return loads(row[0])
+        value = self._remote_get(key)
+        if value is None:
+            with self._lock:
+                self.misses += 1
+            return None
+        with self._lock:
+            self.hits += 1
+            self.remote_hits += 1
+            self._store(key, value)
+        return loads(value)
+
+    def update(self, prompt: str, llm_string: str, return_val: RETURN_VAL_TYPE) -> None:
+        key = cache_key(prompt, llm_string)
+        value = dumps(list(return_val))
+        with self._lock:
+            self._store(key, value)
+        self._remote_put(key, value)
+
+    def clear(self, **kwargs: Any) -> None:
+        with self._lock:
+            self._db.execute("DELETE FROM llm_cache")
+            self._entries, self._bytes = 0, 0
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": self._entries,
+                "bytes": self._bytes,
+                "hits": self.hits,
+                "remote_hits": self.remote_hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "remote_errors": self.remote_errors,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+            }
+
+    def _store(self, key: str, value: str):
+        size = len(value.encode("utf-8"))
+        previous = self._db.execute("SELECT size FROM llm_cache WHERE key = ?", (key,)).fetchone()
+        self._db.execute(
+            "INSERT OR REPLACE INTO llm_cache (key, value, size, last_access) VALUES (?, ?, ?, ?)",
+            (key, value, size, time.time()),
+        )
+        if previous is None:
+            self._entries += 1
+        self._bytes += size - (previous[0] if previous else 0)
+        self._evict()
+
+    def _evict(self):
+        while self._entries > self.max_entries or self._bytes > self.max_bytes:
+            # Drop the least recently used 1% (at least one row) per round trip
+            batch = max(1, self._entries // 100)
+            rows = self._db.execute(
+                "SELECT key, size FROM llm_cache ORDER BY last_access LIMIT ?", (batch,)
+            ).fetchall()
+            if not rows:
+                break
+            self._db.executemany("DELETE FROM llm_cache WHERE key = ?", [(key,) for key, _ in rows])
+            self._entries -= len(rows)
+            self._bytes -= sum(size for _, size in rows)
+            self.evictions += len(rows)
+
+    def _remote_get(self, key: str) -> Optional[str]:
+        if self.client is None:
+            return None
+        try:
+            response = self.client.get_object(self.bucket_name, self.prefix + key)
+            try:
+                return response.data.decode("utf-8")
+            finally:
+                response.close()
+                response.release_conn()
+        except S3Error as e:
+            if e.code == "NoSuchKey":
+                return None
+            self._remote_failed("read", key)
+        except Exception:
+            self._remote_failed("read", key)
+        return None
+
+    def _remote_put(self, key: str, value: str):
+        if self.client is None:
+            return
+        payload = value.encode("utf-8")
+        try:
+            self.client.put_object(self.bucket_name, self.prefix + key, io.BytesIO(payload),
+                                   length=len(payload), content_type="application/json")
+        except Exception:
+            self._remote_failed("write", key)
+
+    def _remote_failed(self, action: str, key: str):
+        # Called from an except block; the entry is still served from (or kept in) SQLite
+        logger.warning("MinIO %s of LLM cache entry %s failed", action, key, exc_info=True)
+        with self._lock:
+            self.remote_errors += 1
@@ -0,0 +1,291 @@
+import json
+import threading
+import time
+import uuid as uuid_lib
+from collections import deque
+from datetime import datetime, timezone
+from typing import Callable, List, NamedTuple, Optional, Sequence
+
+from langchain_core.messages import AIMessage, BaseMessage, HumanMessage, SystemMessage
+
+from .embeddings import Embedder, HashingEmbedder
+from .weaviate_batch import AdaptiveBatchWriter
+from .weaviate_query import compile_query
+
+MEMORY_CLASS = "LangchainMemoryObject"
+
+# Defaults for conversation memory; overridable per memory.
+DEFAULT_RECENT_MESSAGES = 8
+DEFAULT_COMPACT_MESSAGES = 8
+DEFAULT_FLUSH_MESSAGES = 4
+DEFAULT_TOKEN_BUDGET = 2000
+DEFAULT_RECALL_LIMIT = 4
+
+# Rough size of a token in characters, for budgeting prompts without a tokenizer
+CHARS_PER_TOKEN = 4
+
+TURN = "turn"
+STATE = "state"
+
+# Namespace of memory object IDs; a session's turns and state always map to the same objects
+MEMORY_NAMESPACE = uuid_lib.UUID("0b8e6f0a-3c1d-5e4f-8a7b-9d2c6e1f3a54")
+
+_ROLES = {"human": HumanMessage, "ai": AIMessage}
+
+# (summary so far, messages to fold in) -> new summary
+Summarizer = Callable[[str, Sequence[BaseMessage]], str]
+
+
+def estimate_tokens(text: str) -> int:
+    return len(text) // CHARS_PER_TOKEN + 1
+
+
+def _timestamp(seconds: float) -> str:
+    return datetime.fromtimestamp(seconds, timezone.utc).isoformat()
+
+
+class MemoryRecord(NamedTuple):
+    """One LangchainMemoryObject: a conversation turn or a session's state."""
+    uuid: str
+    content: str
+    tags: List[str]
+    timestamp: float
+    metadata: dict
+
+
+class Turn(NamedTuple):
+    index: int
+    role: str
+    content: str
+    timestamp: float
+
+    def message(self) -> BaseMessage:
+        return _ROLES[self.role](content=self.content)
+
+
+class MemoryStore:
+    """
+    LangchainMemoryObject persistence: records are embedded in one batch and upserted
+    through the batch writer, and turns are searched by vector within a session.
+    """
+
+    def __init__(self, client, embedder: Optional[Embedder] = None, class_name: str = MEMORY_CLASS,
+                 writer_options: Optional[dict] = None):
+        self.client = client
+        self.embedder = embedder or HashingEmbedder()
+        self.class_name = class_name
+        self.writer_options = writer_options or {}
+
+    def save(self, records: Sequence[MemoryRecord]):
+        if not records:
+            return
+        vectors = self.embedder.embed([record.content for record in records])
+        with AdaptiveBatchWriter(self.client, flush_interval=0, **self.writer_options) as writer:
+            for record, vector in zip(records, vectors):
+                properties = {
+                    "content": record.content,
+                    "timestamp": _timestamp(record.timestamp),
+                    "tags": record.tags,
+                    "metadata": json.dumps(record.metadata),
+                }
+                writer.add(properties, self.class_name, uuid=record.uuid, vector=vector)
+            errors = writer.flush()
+        if errors:
+            raise RuntimeError(f"Could not save {len(errors)} memories: {errors[0].message}")
+
+    def get(self, uuid: str) -> Optional[dict]:
+        obj = self.client.data_object.get_by_id(uuid, class_name=self.class_name)
+        return obj["properties"] if obj else None
+
+    def search(self, tags: Sequence[str], vector, limit: int) -> List[dict]:
+        """
+        The `limit` objects carrying every one of `tags` nearest to `vector`.
+        """
+        where = {"operator": "And", "operands": [
+            {"path": ["tags"], "operator": "ContainsAny", "valueTextArray": [tag]} for tag in tags
+        ]}
+        query = compile_query(self.class_name, ["content", "timestamp", "metadata"], where)
+        return query.objects(self.client, vector=[float(value) for value in vector], limit=limit)
+
+
+def llm_summarizer(llm) -> Summarizer:
+    """
+    A Summarizer that asks `llm` to fold new messages into the running summary.
+    """
+    def summarize(summary: str, messages: Sequence[BaseMessage]) -> str:
+        transcript = "\n".join(f"{message.type}: {message.content}" for message in messages)
+        prompt = (
+            "Progressively summarize the conversation, keeping names, facts, decisions and open tasks.\n\n"
+            f"Current summary:\n{summary or '(none)'}\n\nNew lines:\n{transcript}\n\nNew summary:"
+        )
+        response = llm.invoke(prompt)
+        return getattr(response, "content", response)
+    return summarize
+
+
+class ConversationMemory:
+    """
+    Chat history for one session that stays within `token_budget` however long it runs.
+
+    The last `recent_messages` messages are kept verbatim in a ring buffer. Once
+    `compact_messages` more have accumulated, the oldest are folded into a running
+    summary by `summarizer` and written to `store` as LangchainMemoryObject turns
+    (tagged with the session, embedded), from where `messages_for` recalls the ones
+    most similar to the new input. The summary and the buffered messages are saved as
+    the session's state object every `flush_messages` messages, so `load` restores a
+    session after a restart.
+    """
+
+    def __init__(
+        self,
+        session_id: str,
+        store: Optional[MemoryStore] = None,
+        summarizer: Optional[Summarizer] = None,
+        recent_messages: int = DEFAULT_RECENT_MESSAGES,
+        compact_messages: int = DEFAULT_COMPACT_MESSAGES,
+        flush_messages: int = DEFAULT_FLUSH_MESSAGES,
+        token_budget: int = DEFAULT_TOKEN_BUDGET,
+        recall_limit: int = DEFAULT_RECALL_LIMIT,
+    ):
+        self.session_id = session_id
+        self.store = store
+        self.summarizer = summarizer
+        self.recent_messages = recent_messages
+        self.compact_messages = compact_messages
+        self.flush_messages = flush_messages
+        self.token_budget = token_budget
+        self.recall_limit = recall_limit
+        self.summary = ""
+        self.recent = deque()
+        self.next_index = 0
+        self.compactions = 0
+        self._pending: List[Turn] = []
+        self._unsaved = 0
+        self._lock = threading.RLock()
+
+    @property
+    def session_tag(self) -> str:
+        return f"session:{self.session_id}"
+
+    def _uuid(self, name) -> str:
+        return str(uuid_lib.uuid5(MEMORY_NAMESPACE, f"{self.session_id}/{name}"))
+
+    @classmethod
+    def load(cls, session_id: str, store: MemoryStore, **options) -> "ConversationMemory":
+        """
+        A session's memory as last saved, or an empty one.
+        """
+        memory = cls(session_id, store, **options)
+        properties = store.get(memory._uuid(STATE))
+        if properties:
+            state = json.loads(properties.get("metadata") or "{}")
+            memory.summary = properties.get("content") or ""
+            memory.next_index = state.get("next_index", 0)
+            memory.recent.extend(Turn(*turn) for turn in state.get("recent", []))
+        return memory
+
+    def add_message(self, role: str, content: str):
+        if role not in _ROLES:
+            raise ValueError(f"Unknown role {role!r}; expected one of {sorted(_ROLES)}")
+        with self._lock:
+            self.recent.append(Turn(self.next_index, role, content, time.time()))
+            self.next_index += 1
+            self._unsaved += 1
+            if len(self.recent) >= self.recent_messages + self.compact_messages:
+                self.compact()
+            elif self._unsaved >= self.flush_messages:
+                self.flush()
+
+    def add_turn(self, human: str, ai: str):
+        self.add_message("human", human)
+        self.add_message("ai", ai)
+
+    def compact(self):
+        """
+        Fold everything but the last `recent_messages` messages into the summary and
+        queue them for the store.
+        """
+        with self._lock:
+            evicted = [self.recent.popleft() for _ in range(max(0, len(self.recent) - self.recent_messages))]
+            if not evicted:
+                return
+            if self.summarizer is not None:
+                self.summary = self.summarizer(self.summary, [turn.message() for turn in evicted])
+            self._pending.extend(evicted)
+            self.compactions += 1
+            self.flush()
+
+    def flush(self):
+        """
+        Write compacted turns and the session state to the store in one batch.
+        """
+        with self._lock:
+            if self.store is None:
+                self._pending, self._unsaved = [], 0
+                return
+            records = [
+                MemoryRecord(self._uuid(turn.index), f"{turn.role}: {turn.content}",
+                             [self.session_tag, TURN, turn.role], turn.timestamp,
+                             {"session": self.session_id, "index": turn.index, "role": turn.role})
+                for turn in self._pending
+            ]
+            records.append(MemoryRecord(
+                self._uuid(STATE), self.summary, [self.session_tag, STATE], time.time(),
+                {"session": self.session_id, "next_index": self.next_index, "recent": [list(turn) for turn in self.recent]},
+            ))
+            self.store.save(records)
+            self._pending, self._unsaved = [], 0
+
+    def recall(self, text: str) -> List[str]:
+        """
+        Stored turns of this session most similar to `text`, best first.
+        """
+        if self.store is None or not self.recall_limit or not text:
+            return []
+        vector = self.store.embedder.embed_query(text)
+        return [result["content"] for result in self.store.search([self.session_tag, TURN], vector, self.recall_limit)]
+
+    def messages_for(self, text: str = "") -> List[BaseMessage]:
+        """
+        The history to send with `text`: as many recent messages as fit the budget
+        (newest first, at least the last), then the summary and recalled turns in what
+        remains, as one system message ahead of them.
+        """
+        with self._lock:
+            turns = list(self.recent)
+            summary = self.summary
+        budget = self.token_budget
+        kept: List[BaseMessage] = []
+        for turn in reversed(turns):
+            cost = estimate_tokens(turn.content)
+            if kept and cost > budget:
+                break
+            kept.append(turn.message())
+            budget -= cost
+        kept.reverse()
+
+        context = []
+        if summary and estimate_tokens(summary) < budget:
+            context.append(f"Summary of the earlier conversation:\n{summary}")
+            budget -= estimate_tokens(context[-1])
+        recalled = []
+        for memory in self.recall(text):
+            cost = estimate_tokens(memory)
+            if cost < budget:
+                recalled.append(memory)
+                budget -= cost
+        if recalled:
+            context += ["Relevant earlier messages:"] + recalled
+        if context:
+            return [SystemMessage(content="\n".join(context))] + kept
+        return kept
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "messages": self.next_index,
+                "recent": len(self.recent),
+                "compactions": self.compactions,
+                "summary_tokens": estimate_tokens(self.summary) if self.summary else 0,
+                "pending": len(self._pending),
+            }
@@ -0,0 +1,378 @@
+import abc
+import bisect
+import math
+import re
+import threading
+import time
+from typing import Callable, Dict, Optional, Sequence, Tuple
+from urllib.parse import parse_qs, unquote, urlsplit
+
+import urllib3
+from langchain_core.callbacks import BaseCallbackHandler
+from requests.adapters import HTTPAdapter
+
+# Latency buckets in seconds, from sub-millisecond cache hits to minute-long LLM calls
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+_GRAPHQL_CLASS = re.compile(rb"Get\s*\{\s*(\w+)")
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _format_value(value: float) -> str:
+    if value == math.inf:
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class _Metric(abc.ABC):
+    kind = ""
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._children = {}
+        self._lock = threading.Lock()
+
+    def labels(self, *values: str):
+        """
+        The series for these label values, in `labelnames` order. Hot paths can keep the
+        returned child instead of looking it up on every observation.
+        """
+        child = self._children.get(values)
+        if child is None:
+            if len(values) != len(self.labelnames):
+                raise ValueError(f"{self.name} expects labels {self.labelnames}, got {values}")
+            with self._lock:
+                child = self._children.setdefault(values, self._new_child())
+        return child
+
+    @abc.abstractmethod
+    def _new_child(self):
+        ...
+
+    @abc.abstractmethod
+    def _render_child(self, values, child):
+        ...
+
+    def render(self):
+        yield f"# HELP {self.name} {self.documentation}"
+        yield f"# TYPE {self.name} {self.kind}"
+        for values, child in sorted(self._children.items()):
+            yield from self._render_child(values, child)
+
+
+class _CounterChild:
+    __slots__ = ("value", "_lock")
+
+    def __init__(self):
+        self.value = 0
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1):
+        with self._lock:
+            self.value += amount
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def _new_child(self):
+        return _CounterChild()
+
+    def inc(self, *values: str, amount: float = 1):
+        self.labels(*values).inc(amount)
+
+    def _render_child(self, values, child):
+        yield f"{self.name}{_format_labels(self.labelnames, values)} {_format_value(child.value)}"
+
+
+class _HistogramChild:
+    __slots__ = ("bounds", "counts", "sum", "_lock")
+
+    def __init__(self, bounds: Tuple[float, ...]):
+        self.bounds = bounds
+        self.counts = [0] * (len(bounds) + 1)
+        self.sum = 0.0
+        self._lock = threading.Lock()
+
+    def observe(self, value: float):
+        index = bisect.bisect_left(self.bounds, value)
+        with self._lock:
+            self.counts[index] += 1
+            self.sum += value
+
+    def time(self):
+        return _Timer(self)
+
+
+class _Timer:
+    __slots__ = ("child", "start")
+
+    def __init__(self, child: _HistogramChild):
+        self.child = child
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.child.observe(time.perf_counter() - self.start)
+
+
+class Histogram(_Metric):
+    """
+    Cumulative-bucket histogram. Observations only bump one bucket count; buckets are
+    accumulated when rendered.
+    """
+
+    kind = "histogram"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (), buckets: Sequence[float] = DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def _new_child(self):
+        return _HistogramChild(self.buckets)
+
+    def observe(self, value: float, *values: str):
+        self.labels(*values).observe(value)
+
+    def _render_child(self, values, child):
+        with child._lock:
+            counts, total = list(child.counts), child.sum
+        cumulative = 0
+        for bound, count in zip(self.buckets + (math.inf,), counts):
+            cumulative += count
+            labels = _format_labels(self.labelnames, values, f'le="{_format_value(bound)}"')
+            yield f"{self.name}_bucket{labels} {cumulative}"
+        labels = _format_labels(self.labelnames, values)
+        yield f"{self.name}_sum{labels} {_format_value(total)}"
+        yield f"{self.name}_count{labels} {cumulative}"
+
+
+class MetricsRegistry:
+    """
+    Holds the process's metrics and renders them in the Prometheus text format. Besides
+    counters and histograms, `register_stats` exposes the numeric values of an existing
+    stats() dict as gauges, read at scrape time.
+    """
+
+    def __init__(self):
+        self._metrics: Dict[str, _Metric] = {}
+        self._stats: Dict[str, Tuple[str, Callable[[], dict]]] = {}
+        self._lock = threading.Lock()
+
+    def counter(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Counter:
+        return self._register(Counter(name, documentation, labelnames))
+
+    def histogram(self, name: str, documentation: str, labelnames: Sequence[str] = (), buckets: Sequence[float] = DEFAULT_BUCKETS) -> Histogram:
+        return self._register(Histogram(name, documentation, labelnames, buckets))
+
+    def register_stats(self, prefix: str, documentation: str, stats: Callable[[], dict]):
+        """
+        Publish every numeric (or nested numeric) value of `stats()` as a gauge named
+        `<prefix>_<key>`; nested dicts add their keys to the name.
+        """
+        with self._lock:
+            self._stats[prefix] = (documentation, stats)
+
+    def _register(self, metric: _Metric):
+        with self._lock:
+            existing = self._metrics.get(metric.name)
+            if existing is not None:
+                if type(existing) is not type(metric) or existing.labelnames != metric.labelnames:
+                    raise ValueError(f"Metric {metric.name} is already registered differently")
+                return existing
+            self._metrics[metric.name] = metric
+            return metric
+
+    def render(self) -> str:
+        with self._lock:
+            metrics = list(self._metrics.values())
+            stats = list(self._stats.items())
+        lines = []
+        for metric in metrics:
+            lines.extend(metric.render())
+        for prefix, (documentation, source) in stats:
+            try:
+                values = source()
+            except Exception as e:
+                lines.append(f"# {prefix} unavailable: {_escape(e)}")
+                continue
+            for name, value in self._flatten(prefix, values):
+                lines.append(f"# HELP {name} {documentation}")
+                lines.append(f"# TYPE {name} gauge")
+                lines.append(f"{name} {_format_value(value)}")
+        return "\n".join(lines) + "\n"
+
+    @classmethod
+    def _flatten(cls, prefix: str, values):
+        for key, value in values.items():
+            name = re.sub(r"[^a-zA-Z0-9_]", "_", f"{prefix}_{key}")
+            if isinstance(value, bool):
+                yield name, int(value)
+            elif isinstance(value, (int, float)):
+                yield name, value
+            elif isinstance(value, dict):
+                yield from cls._flatten(name, value)
+
+
+metrics = MetricsRegistry()
+
+MINIO_REQUEST_SECONDS = metrics.histogram("minio_request_duration_seconds", "MinIO request latency until the response headers (whole body when preloaded).", ("operation", "bucket"))
+MINIO_BYTES = metrics.counter("minio_bytes_total", "Bytes sent to and received from MinIO.", ("operation", "bucket", "direction"))
+MINIO_ERRORS = metrics.counter("minio_errors_total", "MinIO requests that failed or returned an error status.", ("operation", "bucket", "status"))
+WEAVIATE_REQUEST_SECONDS = metrics.histogram("weaviate_request_duration_seconds", "Weaviate request latency.", ("operation", "class"))
+WEAVIATE_BYTES = metrics.counter("weaviate_bytes_total", "Bytes sent to and received from Weaviate.", ("operation", "class", "direction"))
+WEAVIATE_ERRORS = metrics.counter("weaviate_errors_total", "Weaviate requests that failed or returned an error status.", ("operation", "class", "status"))
+WEAVIATE_OBJECTS = metrics.counter("weaviate_objects_written_total", "Objects sent through batch writes, by outcome.", ("class", "result"))
+LLM_REQUEST_SECONDS = metrics.histogram("llm_request_duration_seconds", "LLM call latency.", ("model",))
+LLM_TOKENS = metrics.counter("llm_tokens_total", "Tokens reported by the model provider.", ("model", "kind"))
+LLM_ERRORS = metrics.counter("llm_errors_total", "LLM calls that raised.", ("model",))
+AGENT_NODE_SECONDS = metrics.histogram("agent_node_duration_seconds", "Agent graph node latency.", ("graph", "node"))
+
+
+def _minio_operation(method: str, key: str, query: dict) -> str:
+    if not key:
+        if "location" in query:
+            return "get_bucket_location"
+        if "delete" in query:
+            return "remove_objects"
+        return {"GET": "list_objects", "HEAD": "bucket_exists", "PUT": "make_bucket", "DELETE": "remove_bucket"}.get(method, method.lower())
+    if "uploadId" in query:
+        return {"PUT": "upload_part", "GET": "list_parts", "POST": "complete_multipart_upload",
+                "DELETE": "abort_multipart_upload"}.get(method, method.lower())
+    if "uploads" in query:
+        return "create_multipart_upload"
+    return {"GET": "get_object", "HEAD": "stat_object", "PUT": "put_object", "DELETE": "remove_object"}.get(method, method.lower())
+
+
+class InstrumentedPoolManager(urllib3.PoolManager):
+    """
+    The MinIO client's HTTP pool, recording every request's latency, bytes and errors
+    labelled with the S3 operation and bucket (MinIO is addressed path-style).
+    """
+
+    def urlopen(self, method, url, redirect=True, **kw):
+        parts = urlsplit(url)
+        bucket, _, key = unquote(parts.path).lstrip("/").partition("/")
+        operation = _minio_operation(method, key, parse_qs(parts.query, keep_blank_values=True) if parts.query else {})
+        body = kw.get("body")
+        start = time.perf_counter()
+        try:
+            response = super().urlopen(method, url, redirect=redirect, **kw)
+        except Exception as e:
+            MINIO_ERRORS.inc(operation, bucket, type(e).__name__)
+            raise
+        MINIO_REQUEST_SECONDS.labels(operation, bucket).observe(time.perf_counter() - start)
+        if body:
+            MINIO_BYTES.labels(operation, bucket, "sent").inc(len(body))
+        received = response.headers.get("Content-Length")
+        if received:
+            MINIO_BYTES.labels(operation, bucket, "received").inc(int(received))
+        if response.status >= 400:
+            MINIO_ERRORS.inc(operation, bucket, str(response.status))
+        return response
+
+
+def _weaviate_operation(method: str, path: str, body) -> Tuple[str, str]:
+    parts = path.split("?", 1)[0].strip("/").split("/")[1:]  # drop the /v1 prefix
+    if not parts:
+        return "root", ""
+    if parts[0] == "graphql":
+        match = _GRAPHQL_CLASS.search(body[:256]) if isinstance(body, bytes) else None
+        return "graphql", match.group(1).decode() if match else ""
+    if parts[0] == "batch":
+        return f"batch_{parts[1] if len(parts) > 1 else 'objects'}", ""
+    if parts[0] == "objects":
+        class_name = parts[1] if len(parts) > 2 else ""
+        return {"GET": "get_object", "HEAD": "object_exists", "POST": "create_object", "PUT": "replace_object",
+                "PATCH": "update_object", "DELETE": "delete_object"}.get(method, method.lower()), class_name
+    if parts[0] == "schema":
+        return "schema", parts[1] if len(parts) > 1 else ""
+    return parts[0].lstrip("."), ""
+
+
+class InstrumentedHTTPAdapter(HTTPAdapter):
+    """
+    The Weaviate client's connection adapter, recording every request's latency, bytes
+    and errors labelled with the operation and, where the request names one, the class.
+    """
+
+    def send(self, request, **kwargs):
+        body = request.body.encode("utf-8") if isinstance(request.body, str) else request.body
+        operation, class_name = _weaviate_operation(request.method, request.path_url, body)
+        start = time.perf_counter()
+        try:
+            response = super().send(request, **kwargs)
+        except Exception as e:
+            WEAVIATE_ERRORS.inc(operation, class_name, type(e).__name__)
+            raise
+        WEAVIATE_REQUEST_SECONDS.labels(operation, class_name).observe(time.perf_counter() - start)
+        if body:
+            WEAVIATE_BYTES.labels(operation, class_name, "sent").inc(len(body))
+        received = response.headers.get("Content-Length")
+        if received:
+            WEAVIATE_BYTES.labels(operation, class_name, "received").inc(int(received))
+        if response.status_code >= 400:
+            WEAVIATE_ERRORS.inc(operation, class_name, str(response.status_code))
+        return response
+
+
+class LLMMetricsHandler(BaseCallbackHandler):
+    """
+    LangChain callback recording call latency, provider-reported token usage and errors
+    per model. Attach it through a model's `callbacks`.
+    """
+
+    def __init__(self):
+        self._started: Dict[object, Tuple[float, str]] = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _model(serialized: Optional[dict], kwargs: dict) -> str:
+        params = kwargs.get("invocation_params") or {}
+        model = params.get("model_name") or params.get("model")
+        if not model and serialized:
+            model = (serialized.get("kwargs") or {}).get("model_name") or (serialized.get("kwargs") or {}).get("model")
+        return model or params.get("_type") or "unknown"
+
+    def _start(self, serialized, run_id, kwargs):
+        with self._lock:
+            self._started[run_id] = (time.perf_counter(), self._model(serialized, kwargs))
+
+    def on_llm_start(self, serialized, prompts, *, run_id, **kwargs):
+        self._start(serialized, run_id, kwargs)
+
+    def on_chat_model_start(self, serialized, messages, *, run_id, **kwargs):
+        self._start(serialized, run_id, kwargs)
+
+    def on_llm_end(self, response, *, run_id, **kwargs):
+        with self._lock:
+            start, model = self._started.pop(run_id, (None, "unknown"))
+        if start is not None:
+            LLM_REQUEST_SECONDS.labels(model).observe(time.perf_counter() - start)
+        usage = (response.llm_output or {}).get("token_usage") or {}
+        for kind in ("prompt_tokens", "completion_tokens"):
+            if usage.get(kind):
+                LLM_TOKENS.labels(model, kind[:-len("_tokens")]).inc(usage[kind])
+
+    def on_llm_error(self, error, *, run_id, **kwargs):
+        with self._lock:
+            _, model = self._started.pop(run_id, (None, "unknown"))
+        LLM_ERRORS.inc(model)
+
+
+llm_metrics = LLMMetricsHandler()
@@ -1,9 +1,28 @@
-from minio import Minio
-from typing import List
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import closing
+from itertools import groupby
+from typing import Callable, Iterable, Iterator, List, NamedTuple, Optional, Tuple
+
+from .chunking import DEFAULT_RANGE_BYTES, Chunk, chunk_stream, read_range
+from .clients import get_minio_client
+
+# Defaults for the streaming loader; overridable per call (see tool_config).
+DEFAULT_MAX_WORKERS = 8
+DEFAULT_PREFETCH_DEPTH = 32
+DEFAULT_MAX_BUFFERED_BYTES = 64 * 1024 * 1024
+
+
+class MinioDocument(NamedTuple):
+    """A decoded MinIO object as yielded by the streaming loader."""
+    key: str
+    etag: str
+    content: str
+
 
 class MinioOperations:
     def __init__(self, endpoint: str, access_key: str, secret_key: str, secure: bool = False):
-        self.client = Minio(endpoint, access_key=access_key, secret_key=secret_key, secure=secure)
+        self.client = get_minio_client(endpoint, access_key, secret_key, secure)
 
     def list_objects_in_bucket(self, bucket_name: str) -> List[str]:
         """
@@ -12,23 +31,134 @@ class MinioOperations:
         objects = self.client.list_objects(bucket_name)
         return [obj.object_name for obj in objects]
 
+    def iter_objects(self, bucket_name: str, prefix: Optional[str] = None, recursive: bool = True, start_after: Optional[str] = None) -> Iterator:
+        """
+        Lazily iterate over the objects in a bucket in key order, skipping directory placeholders.
+        With `start_after`, listing begins after that key (used to resume interrupted runs).
+        """
+        for obj in self.client.list_objects(bucket_name, prefix=prefix, recursive=recursive, start_after=start_after):
+            if not obj.is_dir:
+                yield obj
+
     def get_object_content(self, bucket_name: str, object_name: str) -> str:
         """
         Retrieve the content of a specified object.
         """
         response = self.client.get_object(bucket_name, object_name)
-        return response.data.decode('utf-8')
+        try:
+            return response.data.decode('utf-8')
+        finally:
+            response.close()
+            response.release_conn()
 
-def load_documents_from_minio(bucket: str, endpoint: str, access_key: str, secret_key: str, secure: bool = False) -> List[str]:
+    def stream_documents(
+        self,
+        bucket_name: str,
+        objects: Optional[Iterable] = None,
+        prefix: Optional[str] = None,
+        max_workers: int = DEFAULT_MAX_WORKERS,
+        prefetch: int = DEFAULT_PREFETCH_DEPTH,
+        max_buffered_bytes: int = DEFAULT_MAX_BUFFERED_BYTES,
+    ) -> Iterator[MinioDocument]:
+        """
+        Yield (key, etag, content) for each object in listing order while fetching ahead.
+
+        GETs run on a bounded thread pool. At most `prefetch` objects are in flight or
+        waiting to be consumed, and their combined listed size stays under
+        `max_buffered_bytes` (a single object larger than the ceiling is fetched alone).
+        `objects` may be a pre-filtered listing; by default the whole bucket is listed lazily.
+        """
+        listing = iter(objects) if objects is not None else self.iter_objects(bucket_name, prefix=prefix)
+        requests = ((obj, obj.size or 0) for obj in listing)
+        fetch = lambda obj: self.get_object_content(bucket_name, obj.object_name)
+        with closing(_prefetched(requests, fetch, max_workers, prefetch, max_buffered_bytes)) as fetched:
+            for obj, content in fetched:
+                yield MinioDocument(obj.object_name, obj.etag, content)
+
+    def stream_chunks(
+        self,
+        bucket_name: str,
+        objects: Optional[Iterable] = None,
+        prefix: Optional[str] = None,
+        max_workers: int = DEFAULT_MAX_WORKERS,
+        prefetch: int = DEFAULT_PREFETCH_DEPTH,
+        max_buffered_bytes: int = DEFAULT_MAX_BUFFERED_BYTES,
+        range_bytes: int = DEFAULT_RANGE_BYTES,
+        **chunk_options,
+    ) -> Iterator[Chunk]:
+        """
+        Yield token-bounded chunks with (key, etag, offset, length) provenance for each object
+        in listing order, reading every object through ranged GETs of `range_bytes`.
+        The ranged GETs are fetched ahead like `stream_documents` fetches objects, under the
+        same `max_workers`, `prefetch` and `max_buffered_bytes` bounds.
+        See `lib.chunking.chunk_stream` for the accepted chunk options.
+        """
+        listing = iter(objects) if objects is not None else self.iter_objects(bucket_name, prefix=prefix)
+
+        def ranges():
+            for obj in listing:
+                for offset in range(0, obj.size or 0, range_bytes):
+                    length = min(range_bytes, obj.size - offset)
+                    yield (obj, offset, length), length
+
+        fetch = lambda request: read_range(self.client, bucket_name, request[0].object_name, request[1], request[2])
+        with closing(_prefetched(ranges(), fetch, max_workers, prefetch, max_buffered_bytes)) as blocks:
+            for obj, object_blocks in groupby(blocks, key=lambda block: block[0][0]):
+                yield from chunk_stream((data for _, data in object_blocks), obj.object_name, obj.etag, **chunk_options)
+
+
+def _prefetched(
+    requests: Iterable[Tuple[object, int]],
+    fetch: Callable,
+    max_workers: int,
+    prefetch: int,
+    max_buffered_bytes: int,
+) -> Iterator[Tuple[object, object]]:
+    # (request, fetch(request)) in order for (request, size) pairs, with the fetches run
+    # ahead on a bounded pool: at most `prefetch` in flight or waiting to be consumed, and
+    # their combined size under `max_buffered_bytes` (a larger request is fetched alone)
+    pending = deque()
+    buffered = 0
+    pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="minio-get")
+    try:
+        for request, size in requests:
+            while pending and (len(pending) >= prefetch or buffered + size > max_buffered_bytes):
+                done, future, done_size = pending.popleft()
+                buffered -= done_size
+                yield done, future.result()
+            pending.append((request, pool.submit(fetch, request), size))
+            buffered += size
+        while pending:
+            done, future, _ = pending.popleft()
+            yield done, future.result()
+    finally:
+        # Abandoned early: drop the GETs that have not started (shutdown's
+        # cancel_futures would do this, but needs Python 3.9)
+        for _, future, _ in pending:
+            future.cancel()
+        pool.shutdown(wait=False)
+
+
+def stream_documents_from_minio(
+    bucket: str,
+    endpoint: str,
+    access_key: str,
+    secret_key: str,
+    secure: bool = False,
+    **stream_options,
+) -> Iterator[MinioDocument]:
     """
-    Load documents from a specified MinIO bucket.
+    Stream documents from a specified MinIO bucket as they arrive.
+    See `MinioOperations.stream_documents` for the accepted options.
     """
     minio_ops = MinioOperations(endpoint, access_key, secret_key, secure)
-    object_names = minio_ops.list_objects_in_bucket(bucket)
+    return minio_ops.stream_documents(bucket, **stream_options)
 
-    documents = []
-    for object_name in object_names:
-        content = minio_ops.get_object_content(bucket, object_name)
-        documents.append(content)
 
-    return documents
\ No newline at end of file
+def load_documents_from_minio(bucket: str, endpoint: str, access_key: str, secret_key: str, secure: bool = False) -> List[str]:
+    """
+    Load documents from a specified MinIO bucket.
+    Holds every document in memory; prefer `stream_documents_from_minio` for large buckets.
+    """
+    documents = stream_documents_from_minio(bucket, endpoint, access_key, secret_key, secure)
+    return [document.content for document in documents]
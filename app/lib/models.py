@@ -0,0 +1,191 @@
+import logging
+import threading
+import time
+from typing import Any, AsyncIterator, Callable, Dict, Iterable, Iterator, List, Optional
+
+from langchain_core.language_models import LanguageModelInput
+from langchain_core.messages import BaseMessage
+from langchain_core.runnables import Runnable, RunnableConfig
+
+logger = logging.getLogger(__name__)
+
+# Defaults for the model registry; overridable per registry (see llm_config).
+DEFAULT_RETRY_INTERVAL = 30.0
+
+REGISTERED = "registered"
+LOADING = "loading"
+READY = "ready"
+FAILED = "failed"
+
+
+class ModelUnavailable(RuntimeError):
+    """
+    A model whose factory failed; raised again without retrying until `retry_after` passes.
+    """
+
+    def __init__(self, name: str, error: Exception, retry_after: float):
+        super().__init__(f"Model {name!r} is unavailable: {error}")
+        self.name = name
+        self.error = error
+        self.retry_after = retry_after
+
+
+class _Entry:
+    def __init__(self, name: str, factory: Callable[[], Any], output_type: Any):
+        self.name = name
+        self.factory = factory
+        self.output_type = output_type
+        self.model = None
+        self.status = REGISTERED
+        self.error: Optional[Exception] = None
+        self.failed_at = 0.0
+        self.load_seconds: Optional[float] = None
+        self.lock = threading.Lock()
+
+    def to_dict(self) -> dict:
+        return {
+            "status": self.status,
+            "load_seconds": None if self.load_seconds is None else round(self.load_seconds, 4),
+            "error": None if self.error is None else str(self.error),
+        }
+
+
+class ModelRegistry:
+    """
+    Models built on first use. Each factory does its own imports and client
+    construction, so neither runs at app import, and a backend that cannot be
+    built only fails the routes that use it. `warm_up` builds models ahead of
+    their first request on a background thread.
+    """
+
+    def __init__(self, retry_interval: float = DEFAULT_RETRY_INTERVAL):
+        self.retry_interval = retry_interval
+        self._entries: Dict[str, _Entry] = {}
+        self._lock = threading.Lock()
+
+    def register(self, name: str, factory: Callable[[], Any], output_type: Any = BaseMessage):
+        """
+        Add a model built by `factory()` when first needed. `output_type` is what the
+        model returns (a message for chat models, str for completion LLMs), used for
+        the schema of routes serving it.
+        """
+        with self._lock:
+            if name in self._entries:
+                raise ValueError(f"Model {name!r} is already registered")
+            self._entries[name] = _Entry(name, factory, output_type)
+
+    def _entry(self, name: str) -> _Entry:
+        entry = self._entries.get(name)
+        if entry is None:
+            raise KeyError(f"Unknown model {name!r}")
+        return entry
+
+    def get(self, name: str):
+        """
+        The model registered as `name`, built on the first call. Concurrent first calls
+        wait for one build. A failed build raises ModelUnavailable until `retry_interval`
+        has passed, then the next call tries again.
+        """
+        entry = self._entry(name)
+        if entry.model is not None:
+            return entry.model
+        with entry.lock:
+            if entry.model is not None:
+                return entry.model
+            if entry.status == FAILED and time.monotonic() - entry.failed_at < self.retry_interval:
+                raise ModelUnavailable(name, entry.error, entry.failed_at + self.retry_interval - time.monotonic())
+            entry.status = LOADING
+            start = time.perf_counter()
+            try:
+                model = entry.factory()
+            except Exception as e:
+                entry.status, entry.error, entry.failed_at = FAILED, e, time.monotonic()
+                entry.load_seconds = time.perf_counter() - start
+                logger.warning("Could not build model %s: %s", name, e)
+                raise ModelUnavailable(name, e, self.retry_interval) from e
+            entry.load_seconds = time.perf_counter() - start
+            entry.status, entry.error, entry.model = READY, None, model
+            logger.info("Built model %s in %.3fs", name, entry.load_seconds)
+            return model
+
+    def lazy(self, name: str) -> "LazyModel":
+        """
+        A runnable standing in for `name`: cheap to create and to mount as a route,
+        it builds the model on its first call.
+        """
+        return LazyModel(self, name, self._entry(name).output_type)
+
+    def warm_up(self, names: Optional[Iterable[str]] = None, background: bool = True) -> Optional[threading.Thread]:
+        """
+        Build `names` (default: every registered model) now, on a daemon thread unless
+        `background` is False. Failures are recorded, not raised; requests retry them.
+        """
+        with self._lock:
+            names = list(self._entries) if names is None else list(names)
+
+        def build():
+            for name in names:
+                try:
+                    self.get(name)
+                except (ModelUnavailable, KeyError) as e:
+                    logger.warning("Model warm-up skipped %s: %s", name, e)
+
+        if not background:
+            build()
+            return None
+        thread = threading.Thread(target=build, name="model-warm-up", daemon=True)
+        thread.start()
+        return thread
+
+    def stats(self) -> dict:
+        with self._lock:
+            entries = list(self._entries.values())
+        return {
+            "models": {entry.name: entry.to_dict() for entry in entries},
+            **{status: sum(entry.status == status for entry in entries) for status in (REGISTERED, LOADING, READY, FAILED)},
+        }
+
+
+class LazyModel(Runnable[LanguageModelInput, Any]):
+    """
+    Runnable proxy for a registry model; every call resolves the model first.
+    """
+
+    def __init__(self, registry: ModelRegistry, name: str, output_type: Any = BaseMessage):
+        self.registry = registry
+        self.name = name
+        self._output_type = output_type
+
+    @property
+    def InputType(self) -> Any:
+        return LanguageModelInput
+
+    @property
+    def OutputType(self) -> Any:
+        return self._output_type
+
+    @property
+    def model(self):
+        return self.registry.get(self.name)
+
+    def invoke(self, input: LanguageModelInput, config: Optional[RunnableConfig] = None, **kwargs: Any) -> Any:
+        return self.model.invoke(input, config, **kwargs)
+
+    async def ainvoke(self, input: LanguageModelInput, config: Optional[RunnableConfig] = None, **kwargs: Any) -> Any:
+        return await self.model.ainvoke(input, config, **kwargs)
+
+    def batch(self, inputs: List[LanguageModelInput], config=None, *, return_exceptions: bool = False, **kwargs: Any) -> List[Any]:
+        return self.model.batch(inputs, config, return_exceptions=return_exceptions, **kwargs)
+
+    async def abatch(self, inputs: List[LanguageModelInput], config=None, *, return_exceptions: bool = False, **kwargs: Any) -> List[Any]:
+        return await self.model.abatch(inputs, config, return_exceptions=return_exceptions, **kwargs)
+
+    def stream(self, input: LanguageModelInput, config: Optional[RunnableConfig] = None, **kwargs: Any) -> Iterator[Any]:
+        yield from self.model.stream(input, config, **kwargs)
+
+    async def astream(self, input: LanguageModelInput, config: Optional[RunnableConfig] = None, **kwargs: Any) -> AsyncIterator[Any]:
+        async for chunk in self.model.astream(input, config, **kwargs):
+            yield chunk
+
+
+registry = ModelRegistry()
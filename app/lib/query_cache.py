@@ -0,0 +1,211 @@
+import hashlib
+import io
+import json
+import logging
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable, Optional, Sequence
+
+import numpy as np
+from minio.deleteobjects import DeleteObject
+from minio.error import S3Error
+
+logger = logging.getLogger(__name__)
+
+# Defaults for the query cache; overridable per cache (see tool_config).
+DEFAULT_MAX_ENTRIES = 1024
+DEFAULT_TTL = 30.0
+
+_COMMUTATIVE_OPERATORS = ("And", "Or")
+
+
+def _normalize_where(where):
+    # Operand order of And/Or does not change the result, so sort it out of the key
+    if isinstance(where, dict):
+        normalized = {key: _normalize_where(value) for key, value in where.items()}
+        if where.get("operator") in _COMMUTATIVE_OPERATORS and isinstance(normalized.get("operands"), list):
+            normalized["operands"] = sorted(normalized["operands"], key=lambda operand: json.dumps(operand, sort_keys=True))
+        return normalized
+    if isinstance(where, list):
+        return [_normalize_where(value) for value in where]
+    return where
+
+
+def query_cache_key(class_name: str, properties: Sequence[str], where: Optional[dict] = None,
+                    limit: Optional[int] = None, vector: Optional[Sequence[float]] = None) -> str:
+    """
+    Stable key of a query: property order, And/Or operand order and float noise below
+    float32 precision do not change it. The class name stays readable as the prefix.
+    """
+    digest = hashlib.sha256()
+    digest.update(json.dumps({
+        "properties": sorted(set(properties)),
+        "where": _normalize_where(where),
+        "limit": limit,
+    }, sort_keys=True).encode("utf-8"))
+    if vector is not None:
+        digest.update(np.asarray(vector, dtype=np.float32).tobytes())
+    return f"{class_name}/{digest.hexdigest()}"
+
+
+class MinioQueryCacheBackend:
+    """
+    Shares cached results between replicas through a bucket, one object per query under
+    `prefix/<class>/`. Invalidating a class removes its objects for every replica.
+    MinIO failures are logged and counted, never raised: a failed read is a miss and a
+    failed write or invalidation leaves other replicas' copies to expire by TTL.
+    """
+
+    def __init__(self, client, bucket_name: str, prefix: str = "query-cache/"):
+        self.client = client
+        self.bucket_name = bucket_name
+        self.prefix = prefix
+        self.errors = 0
+        self._lock = threading.Lock()
+
+    def get(self, key: str):
+        try:
+            response = self.client.get_object(self.bucket_name, self.prefix + key)
+            try:
+                entry = json.loads(response.data)
+            finally:
+                response.close()
+                response.release_conn()
+        except S3Error as e:
+            if e.code != "NoSuchKey":
+                self._failed("read", key)
+            return None
+        except Exception:
+            self._failed("read", key)
+            return None
+        if entry["expires_at"] < time.time():
+            return None
+        return entry["value"]
+
+    def set(self, key: str, value, ttl: float):
+        payload = json.dumps({"expires_at": time.time() + ttl, "value": value}).encode("utf-8")
+        try:
+            self.client.put_object(self.bucket_name, self.prefix + key, io.BytesIO(payload),
+                                   length=len(payload), content_type="application/json")
+        except Exception:
+            self._failed("write", key)
+
+    def invalidate(self, class_name: str):
+        try:
+            objects = self.client.list_objects(self.bucket_name, prefix=f"{self.prefix}{class_name}/", recursive=True)
+            for error in self.client.remove_objects(self.bucket_name, (DeleteObject(obj.object_name) for obj in objects)):
+                logger.warning("Could not remove cached query %s: %s", error.name, error.message)
+                with self._lock:
+                    self.errors += 1
+        except Exception:
+            self._failed("invalidation", class_name)
+
+    def _failed(self, action: str, key: str):
+        # Called from an except block; the caller goes on as if there were no shared cache
+        logger.warning("MinIO %s of query cache entry %s failed", action, key, exc_info=True)
+        with self._lock:
+            self.errors += 1
+
+
+class QueryCache:
+    """
+    In-process LRU cache of query results with a TTL, invalidated per class.
+
+    Each class has a generation that writes bump; a result is only stored if its class
+    was not written to while the query ran, so a query racing a write cannot cache
+    pre-write data. Responses carrying GraphQL `errors` are returned but never cached.
+    With a shared `backend`, local misses are looked up there and new
+    results written through. Invalidation reaches other replicas through the backend;
+    their local copies are bounded by `ttl`.
+    """
+
+    def __init__(self, max_entries: int = DEFAULT_MAX_ENTRIES, ttl: float = DEFAULT_TTL, backend=None):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.backend = backend
+        self.hits = 0
+        self.shared_hits = 0
+        self.misses = 0
+        self.bypassed = 0
+        self.evictions = 0
+        self.invalidations = 0
+        self._entries = OrderedDict()
+        self._generations = {}
+        self._lock = threading.Lock()
+
+    def get_or_load(self, class_name: str, key: str, load: Callable[[], object], bypass: bool = False):
+        """
+        Return the cached result for `key`, or run `load()` and cache what it returns.
+        With `bypass`, `load()` always runs and its result replaces any cached one.
+        """
+        now = time.monotonic()
+        with self._lock:
+            generation = self._generations.get(class_name, 0)
+            if bypass:
+                self.bypassed += 1
+            else:
+                entry = self._entries.get(key)
+                if entry is not None and entry[0] > now:
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return entry[1]
+        if not bypass and self.backend is not None:
+            value = self.backend.get(key)
+            if value is not None:
+                with self._lock:
+                    self.hits += 1
+                    self.shared_hits += 1
+                    self._store(class_name, key, value, generation)
+                return value
+        if not bypass:
+            with self._lock:
+                self.misses += 1
+
+        value = load()
+        # Weaviate reports query errors in the response body rather than failing the request
+        if isinstance(value, dict) and "errors" in value:
+            return value
+        with self._lock:
+            stored = self._store(class_name, key, value, generation)
+        if stored and self.backend is not None:
+            self.backend.set(key, value, self.ttl)
+        return value
+
+    def invalidate(self, class_name: str):
+        """
+        Drop every cached result for `class_name`, here and in the shared backend.
+        """
+        with self._lock:
+            self._generations[class_name] = self._generations.get(class_name, 0) + 1
+            prefix = f"{class_name}/"
+            for key in [key for key in self._entries if key.startswith(prefix)]:
+                del self._entries[key]
+            self.invalidations += 1
+        if self.backend is not None:
+            self.backend.invalidate(class_name)
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "hits": self.hits,
+                "shared_hits": self.shared_hits,
+                "misses": self.misses,
+                "bypassed": self.bypassed,
+                "evictions": self.evictions,
+                "invalidations": self.invalidations,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "backend_errors": self.backend.errors if self.backend is not None else 0,
+            }
+
+    def _store(self, class_name: str, key: str, value, generation: int) -> bool:
+        if self._generations.get(class_name, 0) != generation:
+            return False
+        self._entries[key] = (time.monotonic() + self.ttl, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+        return True
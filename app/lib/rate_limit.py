@@ -0,0 +1,357 @@
+import asyncio
+import random
+import re
+import threading
+import time
+from datetime import datetime, timezone
+from typing import Optional
+
+import httpx
+
+# Defaults for LLM rate limiting; overridable per limiter (see llm_config).
+DEFAULT_REQUESTS_PER_MINUTE = 500
+DEFAULT_TOKENS_PER_MINUTE = 200000
+DEFAULT_MAX_CONCURRENCY = 16
+DEFAULT_MIN_CONCURRENCY = 1
+DEFAULT_MAX_RETRIES = 6
+DEFAULT_BASE_DELAY = 0.5
+DEFAULT_MAX_DELAY = 60.0
+DEFAULT_EXPECTED_OUTPUT_TOKENS = 512
+
+# Rough size of a token in request bytes, to charge the token bucket before the
+# provider has counted the prompt
+BYTES_PER_TOKEN = 4
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+
+_DURATION_PART = re.compile(r"(\d+(?:\.\d+)?)(ms|s|m|h)")
+_DURATION_UNITS = {"ms": 0.001, "s": 1.0, "m": 60.0, "h": 3600.0}
+
+
+def parse_duration(value: Optional[str]) -> Optional[float]:
+    """
+    Seconds in a rate-limit header value: plain seconds ("1.5"), Go-style durations
+    ("6m0s", "20ms", as OpenAI sends them) or an RFC 3339 time (Anthropic).
+    """
+    if not value:
+        return None
+    value = value.strip()
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    parts = _DURATION_PART.findall(value)
+    if parts and "".join(number + unit for number, unit in parts) == value:
+        return sum(float(number) * _DURATION_UNITS[unit] for number, unit in parts)
+    try:
+        moment = datetime.fromisoformat(value.replace("Z", "+00:00"))
+    except ValueError:
+        return None
+    if moment.tzinfo is None:
+        moment = moment.replace(tzinfo=timezone.utc)
+    return max(0.0, (moment - datetime.now(timezone.utc)).total_seconds())
+
+
+def _header_float(headers, *names: str) -> Optional[float]:
+    for name in names:
+        value = headers.get(name)
+        if value is not None:
+            try:
+                return float(value)
+            except ValueError:
+                return None
+    return None
+
+
+class TokenBucket:
+    """
+    `rate` units per second up to `capacity` banked. Not thread-safe; RateLimiter
+    guards its buckets with its own lock. A rate of 0 means unlimited.
+    """
+
+    def __init__(self, rate: float, capacity: Optional[float] = None):
+        self.rate = rate
+        self.capacity = capacity if capacity is not None else rate * 60
+        self.level = self.capacity
+        self._updated = time.monotonic()
+
+    def _refill(self, now: float):
+        self.level = min(self.capacity, self.level + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def wait_time(self, amount: float, now: float) -> float:
+        """
+        Seconds until `amount` is available (0 if it is now). Requests larger than the
+        capacity only wait for a full bucket.
+        """
+        if not self.rate:
+            return 0.0
+        self._refill(now)
+        needed = min(amount, self.capacity) - self.level
+        return 0.0 if needed <= 0 else needed / self.rate
+
+    def take(self, amount: float):
+        # May go negative (a request larger than the bucket, or a charge corrected later)
+        if self.rate:
+            self.level -= amount
+
+    def sync(self, limit: Optional[float], remaining: Optional[float], now: float):
+        """
+        Adopt what the provider reports: `limit` per minute and `remaining` right now.
+        """
+        if limit:
+            self.rate, self.capacity = limit / 60.0, limit
+        if remaining is not None and self.rate:
+            self._refill(now)
+            self.level = min(self.level, remaining)
+
+
+class RateLimiter:
+    """
+    Client-side limits for one provider account: token buckets on requests and on
+    tokens per minute, and a cap on requests in flight that grows by one after each
+    round of successes and halves on a 429 (AIMD). Buckets are resynchronised from
+    the provider's rate-limit headers, and a 429 pauses every caller until its
+    Retry-After has passed.
+    """
+
+    def __init__(
+        self,
+        requests_per_minute: float = DEFAULT_REQUESTS_PER_MINUTE,
+        tokens_per_minute: float = DEFAULT_TOKENS_PER_MINUTE,
+        max_concurrency: int = DEFAULT_MAX_CONCURRENCY,
+        min_concurrency: int = DEFAULT_MIN_CONCURRENCY,
+    ):
+        self.requests = TokenBucket(requests_per_minute / 60.0, requests_per_minute)
+        self.tokens = TokenBucket(tokens_per_minute / 60.0, tokens_per_minute)
+        self.max_concurrency = max_concurrency
+        self.min_concurrency = min_concurrency
+        self.concurrency = max_concurrency
+        self.in_flight = 0
+        self.paused_until = 0.0
+        self.admitted = 0
+        self.rate_limited = 0
+        self.waited_seconds = 0.0
+        self._successes = 0
+        self._condition = threading.Condition()
+
+    def _wait_time(self, tokens: float, now: float) -> float:
+        # Called with the condition held; 0 means the request was admitted
+        if self.in_flight >= self.concurrency:
+            return -1.0
+        wait = max(self.paused_until - now, self.requests.wait_time(1, now), self.tokens.wait_time(tokens, now))
+        if wait > 0:
+            return wait
+        self.requests.take(1)
+        self.tokens.take(tokens)
+        self.in_flight += 1
+        self.admitted += 1
+        return 0.0
+
+    def acquire(self, tokens: float):
+        """
+        Block until a request estimated at `tokens` may be sent; pair with `release`.
+        """
+        start = time.monotonic()
+        with self._condition:
+            while True:
+                wait = self._wait_time(tokens, time.monotonic())
+                if wait == 0:
+                    break
+                # A negative wait is a full concurrency window: released slots notify
+                self._condition.wait(None if wait < 0 else wait)
+            self.waited_seconds += time.monotonic() - start
+
+    async def acquire_async(self, tokens: float):
+        start = time.monotonic()
+        while True:
+            with self._condition:
+                wait = self._wait_time(tokens, time.monotonic())
+            if wait == 0:
+                break
+            await asyncio.sleep(0.01 if wait < 0 else wait)
+        with self._condition:
+            self.waited_seconds += time.monotonic() - start
+
+    def release(self, succeeded: bool = True):
+        with self._condition:
+            self.in_flight -= 1
+            if succeeded:
+                self._successes += 1
+                if self._successes >= self.concurrency and self.concurrency < self.max_concurrency:
+                    self.concurrency += 1
+                    self._successes = 0
+            self._condition.notify_all()
+
+    def observe(self, headers):
+        """
+        Resynchronise the buckets from a response's rate-limit headers (OpenAI's
+        x-ratelimit-* or Anthropic's anthropic-ratelimit-*).
+        """
+        with self._condition:
+            now = time.monotonic()
+            self.requests.sync(
+                _header_float(headers, "x-ratelimit-limit-requests", "anthropic-ratelimit-requests-limit"),
+                _header_float(headers, "x-ratelimit-remaining-requests", "anthropic-ratelimit-requests-remaining"),
+                now,
+            )
+            self.tokens.sync(
+                _header_float(headers, "x-ratelimit-limit-tokens", "anthropic-ratelimit-tokens-limit"),
+                _header_float(headers, "x-ratelimit-remaining-tokens", "anthropic-ratelimit-tokens-remaining"),
+                now,
+            )
+
+    def throttled(self, retry_after: Optional[float]):
+        """
+        The provider answered 429: halve the concurrency cap and pause admissions for
+        `retry_after` seconds when it said how long.
+        """
+        with self._condition:
+            self.rate_limited += 1
+            self._successes = 0
+            self.concurrency = max(self.min_concurrency, self.concurrency // 2)
+            if retry_after:
+                self.paused_until = max(self.paused_until, time.monotonic() + retry_after)
+
+    def stats(self) -> dict:
+        with self._condition:
+            return {
+                "concurrency": self.concurrency,
+                "in_flight": self.in_flight,
+                "admitted": self.admitted,
+                "rate_limited": self.rate_limited,
+                "waited_seconds": round(self.waited_seconds, 3),
+                "requests_available": round(self.requests.level, 1) if self.requests.rate else None,
+                "tokens_available": round(self.tokens.level) if self.tokens.rate else None,
+            }
+
+
+def backoff(attempt: int, base_delay: float = DEFAULT_BASE_DELAY, max_delay: float = DEFAULT_MAX_DELAY) -> float:
+    """
+    Full-jitter exponential backoff: uniform in [0, min(max_delay, base_delay * 2**attempt)].
+    """
+    return random.uniform(0, min(max_delay, base_delay * 2 ** attempt))
+
+
+class _RetryPolicy:
+    def __init__(self, limiter: RateLimiter, max_retries: int, base_delay: float, max_delay: float, expected_output_tokens: int):
+        self.limiter = limiter
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.expected_output_tokens = expected_output_tokens
+
+    def estimate(self, request: httpx.Request) -> int:
+        return len(request.content) // BYTES_PER_TOKEN + self.expected_output_tokens
+
+    def delay(self, attempt: int, response: Optional[httpx.Response]) -> Optional[float]:
+        """
+        Seconds to wait before retrying, or None when the outcome is final.
+        """
+        if response is not None:
+            if response.status_code not in RETRY_STATUSES:
+                self.limiter.observe(response.headers)
+                self.limiter.release(succeeded=True)
+                return None
+            retry_after = parse_duration(response.headers.get("retry-after"))
+            if response.status_code == 429:
+                self.limiter.observe(response.headers)
+                self.limiter.throttled(retry_after)
+            self.limiter.release(succeeded=False)
+        else:
+            retry_after = None
+            self.limiter.release(succeeded=False)
+        if attempt >= self.max_retries:
+            return None
+        return max(retry_after or 0.0, backoff(attempt, self.base_delay, self.max_delay))
+
+
+class RateLimitedTransport(httpx.BaseTransport):
+    """
+    httpx transport for an LLM client (pass it via `httpx.Client(transport=...)` as the
+    model's `http_client`). Each request waits for the limiter, and 429s, 5xx answers
+    and connection failures are retried with jittered backoff, honouring Retry-After.
+    Only requests that reach the network are limited, so LLM cache hits stay free.
+    Give the model client max_retries=0 so the two retry loops do not compound.
+    """
+
+    def __init__(
+        self,
+        limiter: RateLimiter,
+        transport: Optional[httpx.BaseTransport] = None,
+        max_retries: int = DEFAULT_MAX_RETRIES,
+        base_delay: float = DEFAULT_BASE_DELAY,
+        max_delay: float = DEFAULT_MAX_DELAY,
+        expected_output_tokens: int = DEFAULT_EXPECTED_OUTPUT_TOKENS,
+    ):
+        self.limiter = limiter
+        self.transport = transport or httpx.HTTPTransport()
+        self.policy = _RetryPolicy(limiter, max_retries, base_delay, max_delay, expected_output_tokens)
+
+    def handle_request(self, request: httpx.Request) -> httpx.Response:
+        request.read()
+        tokens = self.policy.estimate(request)
+        attempt = 0
+        while True:
+            self.limiter.acquire(tokens)
+            try:
+                response = self.transport.handle_request(request)
+            except httpx.TransportError:
+                delay = self.policy.delay(attempt, None)
+                if delay is None:
+                    raise
+                time.sleep(delay)
+                attempt += 1
+                continue
+            delay = self.policy.delay(attempt, response)
+            if delay is None:
+                return response
+            response.close()
+            time.sleep(delay)
+            attempt += 1
+
+    def close(self):
+        self.transport.close()
+
+
+class AsyncRateLimitedTransport(httpx.AsyncBaseTransport):
+    """
+    The asyncio counterpart of RateLimitedTransport, for a model's `http_async_client`.
+    """
+
+    def __init__(
+        self,
+        limiter: RateLimiter,
+        transport: Optional[httpx.AsyncBaseTransport] = None,
+        max_retries: int = DEFAULT_MAX_RETRIES,
+        base_delay: float = DEFAULT_BASE_DELAY,
+        max_delay: float = DEFAULT_MAX_DELAY,
+        expected_output_tokens: int = DEFAULT_EXPECTED_OUTPUT_TOKENS,
+    ):
+        self.limiter = limiter
+        self.transport = transport or httpx.AsyncHTTPTransport()
+        self.policy = _RetryPolicy(limiter, max_retries, base_delay, max_delay, expected_output_tokens)
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        await request.aread()
+        tokens = self.policy.estimate(request)
+        attempt = 0
+        while True:
+            await self.limiter.acquire_async(tokens)
+            try:
+                response = await self.transport.handle_async_request(request)
+            except httpx.TransportError:
+                delay = self.policy.delay(attempt, None)
+                if delay is None:
+                    raise
+                await asyncio.sleep(delay)
+                attempt += 1
+                continue
+            delay = self.policy.delay(attempt, response)
+            if delay is None:
+                return response
+            await response.aclose()
+            await asyncio.sleep(delay)
+            attempt += 1
+
+    async def aclose(self):
+        await self.transport.aclose()
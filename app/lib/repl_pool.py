@@ -0,0 +1,353 @@
+import contextlib
+import io
+import json
+import logging
+import os
+import select
+import signal
+import subprocess
+import sys
+import threading
+import time
+import traceback
+from pathlib import Path
+from typing import List, NamedTuple, Optional, Sequence
+
+logger = logging.getLogger(__name__)
+
+# Defaults for the REPL worker pool; overridable per pool (see tool_config).
+DEFAULT_WORKERS = 4
+DEFAULT_MAX_RUNS = 50
+DEFAULT_CPU_SECONDS = 30.0
+DEFAULT_MEMORY_BYTES = 2 * 1024 * 1024 * 1024
+DEFAULT_TIMEOUT = 60.0
+DEFAULT_QUEUE_TIMEOUT = 120.0
+DEFAULT_MAX_WAITING = 64
+DEFAULT_WARM_MODULES = ("numpy", "pandas", "matplotlib.pyplot")
+
+# Workers are single-threaded by design: one run at a time, and numeric libraries must
+# not spread a run over threads the CPU limit would count anyway
+_WORKER_ENV = {
+    "MPLBACKEND": "Agg",
+    "OMP_NUM_THREADS": "1",
+    "OPENBLAS_NUM_THREADS": "1",
+    "MKL_NUM_THREADS": "1",
+    "PYTHONUNBUFFERED": "1",
+}
+
+_APP_ROOT = Path(__file__).resolve().parents[1]
+
+
+class ReplResult(NamedTuple):
+    """One run: what the code printed, the error it ended with (if any), and how long it took."""
+    output: str
+    error: Optional[str]
+    seconds: float
+
+
+class ReplPoolBusy(RuntimeError):
+    """Too many runs are already waiting for a worker."""
+
+
+class CpuLimitExceeded(Exception):
+    pass
+
+
+class _WorkerLost(Exception):
+    pass
+
+
+# Worker side: runs in the subprocess, started through `python -c` so nothing of the
+# API process (or its __main__) is imported there
+
+def _serve(warm_modules: Sequence[str], memory_bytes: int):
+    # The protocol gets private copies of stdin/stdout; code that writes to file
+    # descriptors 0/1 directly (os.system, C extensions) cannot corrupt it
+    requests = os.fdopen(os.dup(0), "r", encoding="utf-8")
+    replies = os.fdopen(os.dup(1), "w", encoding="utf-8")
+    devnull = os.open(os.devnull, os.O_RDWR)
+    os.dup2(devnull, 0)
+    os.dup2(devnull, 1)
+
+    try:
+        import resource
+    except ImportError:
+        resource = None
+    if resource is not None and memory_bytes:
+        resource.setrlimit(resource.RLIMIT_AS, (memory_bytes, memory_bytes))
+
+    def cpu_exceeded(signum, frame):
+        raise CpuLimitExceeded("CPU time limit exceeded")
+    if resource is not None:
+        signal.signal(signal.SIGXCPU, cpu_exceeded)
+
+    warmed, failed = [], []
+    for module in warm_modules:
+        try:
+            __import__(module)
+            warmed.append(module)
+        except Exception as e:
+            failed.append(f"{module}: {e!r}")
+    replies.write(json.dumps({"ready": True, "warmed": warmed, "failed": failed}) + "\n")
+    replies.flush()
+
+    for line in requests:
+        request = json.loads(line)
+        if resource is not None:
+            # RLIMIT_CPU counts the process's whole life, so each run gets the time used so far plus its budget
+            usage = resource.getrusage(resource.RUSAGE_SELF)
+            used = usage.ru_utime + usage.ru_stime
+            _, hard = resource.getrlimit(resource.RLIMIT_CPU)
+            soft = int(used + request["cpu_seconds"]) + 1
+            resource.setrlimit(resource.RLIMIT_CPU, (soft if hard == resource.RLIM_INFINITY else min(soft, hard), hard))
+        output = io.StringIO()
+        error, fatal = None, False
+        started = time.perf_counter()
+        try:
+            with contextlib.redirect_stdout(output), contextlib.redirect_stderr(output):
+                exec(request["code"], {"__name__": "__main__", "__builtins__": __builtins__})
+        except (CpuLimitExceeded, MemoryError) as e:
+            error, fatal = repr(e), True
+        except BaseException as e:
+            error = "".join(traceback.format_exception_only(type(e), e)).strip()
+        finally:
+            if resource is not None:
+                resource.setrlimit(resource.RLIMIT_CPU, (hard, hard))
+        replies.write(json.dumps({
+            "output": output.getvalue(), "error": error, "fatal": fatal,
+            "seconds": time.perf_counter() - started,
+        }) + "\n")
+        replies.flush()
+        if fatal:
+            return
+
+
+# Pool side
+
+class _Worker:
+    def __init__(self, cwd: Optional[str], warm_modules: Sequence[str], memory_bytes: int):
+        env = dict(os.environ, **_WORKER_ENV)
+        env["PYTHONPATH"] = os.pathsep.join(filter(None, [str(_APP_ROOT), env.get("PYTHONPATH")]))
+        bootstrap = f"from lib.repl_pool import _serve; _serve({list(warm_modules)!r}, {int(memory_bytes)!r})"
+        self.process = subprocess.Popen(
+            [sys.executable, "-c", bootstrap], cwd=cwd, env=env,
+            stdin=subprocess.PIPE, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL,
+        )
+        self.runs = 0
+        self._buffer = b""
+
+    def _read(self, deadline: Optional[float]) -> dict:
+        fd = self.process.stdout.fileno()
+        while b"\n" not in self._buffer:
+            remaining = None if deadline is None else deadline - time.monotonic()
+            if remaining is not None and remaining <= 0:
+                raise TimeoutError
+            readable, _, _ = select.select([fd], [], [], remaining)
+            if not readable:
+                raise TimeoutError
+            chunk = os.read(fd, 65536)
+            if not chunk:
+                raise _WorkerLost(f"worker exited with status {self.process.wait()}")
+            self._buffer += chunk
+        line, self._buffer = self._buffer.split(b"\n", 1)
+        return json.loads(line)
+
+    def ready(self, timeout: float) -> dict:
+        return self._read(time.monotonic() + timeout)
+
+    def run(self, code: str, cpu_seconds: float, timeout: float) -> dict:
+        self.runs += 1
+        try:
+            self.process.stdin.write((json.dumps({"code": code, "cpu_seconds": cpu_seconds}) + "\n").encode("utf-8"))
+            self.process.stdin.flush()
+        except (BrokenPipeError, OSError) as e:
+            raise _WorkerLost(repr(e))
+        return self._read(time.monotonic() + timeout)
+
+    def kill(self):
+        if self.process.poll() is None:
+            self.process.kill()
+        self.process.wait()
+        for stream in (self.process.stdin, self.process.stdout):
+            with contextlib.suppress(OSError):
+                stream.close()
+
+
+class ReplPool:
+    """
+    Runs Python code in a pool of warm worker subprocesses instead of in the API process.
+
+    Each worker imports `warm_modules` once when it starts, so runs do not pay for them,
+    and executes one run at a time in a fresh namespace with its working directory at
+    `cwd`. A run may use `cpu_seconds` of CPU time and `timeout` seconds of wall time,
+    and a worker's address space is capped at `memory_bytes`. Workers are replaced after
+    `max_runs` runs and whenever one breaks a limit or dies; replacements start in the
+    background. Callers wait for a free worker for up to `queue_timeout` seconds;
+    beyond `max_waiting` waiting callers, `run` raises ReplPoolBusy at once.
+    """
+
+    def __init__(
+        self,
+        workers: int = DEFAULT_WORKERS,
+        max_runs: int = DEFAULT_MAX_RUNS,
+        cpu_seconds: float = DEFAULT_CPU_SECONDS,
+        memory_bytes: int = DEFAULT_MEMORY_BYTES,
+        timeout: float = DEFAULT_TIMEOUT,
+        queue_timeout: float = DEFAULT_QUEUE_TIMEOUT,
+        max_waiting: int = DEFAULT_MAX_WAITING,
+        warm_modules: Sequence[str] = DEFAULT_WARM_MODULES,
+        cwd: Optional[str] = None,
+    ):
+        self.workers = workers
+        self.max_runs = max_runs
+        self.cpu_seconds = cpu_seconds
+        self.memory_bytes = memory_bytes
+        self.timeout = timeout
+        self.queue_timeout = queue_timeout
+        self.max_waiting = max_waiting
+        self.warm_modules = list(warm_modules)
+        self.cwd = None if cwd is None else str(cwd)
+
+        self._idle: List[_Worker] = []
+        self._busy = 0
+        self._starting = 0
+        self._waiting = 0
+        self._cond = threading.Condition()
+        self._stopping = False
+
+        self.runs = 0
+        self.errors = 0
+        self.recycled = 0
+        self.rejected = 0
+        self.start_failures = 0
+        self.wait_seconds = 0.0
+        self.run_seconds = 0.0
+
+    def start(self):
+        """
+        Start the workers in the background; `run` also does this on first use.
+        """
+        with self._cond:
+            self._stopping = False
+            self._fill()
+
+    def stop(self):
+        with self._cond:
+            self._stopping = True
+            idle, self._idle = self._idle, []
+            self._cond.notify_all()
+        for worker in idle:
+            worker.kill()
+
+    def _fill(self):
+        # Called with the lock held
+        while not self._stopping and len(self._idle) + self._busy + self._starting < self.workers:
+            self._starting += 1
+            threading.Thread(target=self._spawn, name="repl-worker-start", daemon=True).start()
+
+    def _spawn(self):
+        worker = None
+        try:
+            worker = _Worker(self.cwd, self.warm_modules, self.memory_bytes)
+            hello = worker.ready(self.timeout + 60.0)
+            if hello.get("failed"):
+                logger.warning("REPL worker could not preload %s", ", ".join(hello["failed"]))
+        except Exception:
+            logger.exception("Could not start a REPL worker")
+            if worker is not None:
+                worker.kill()
+            with self._cond:
+                self._starting -= 1
+                self.start_failures += 1
+                self._cond.notify_all()
+            return
+        with self._cond:
+            self._starting -= 1
+            if self._stopping:
+                worker.kill()
+                return
+            self._idle.append(worker)
+            self._cond.notify_all()
+
+    def _acquire(self) -> _Worker:
+        started = time.monotonic()
+        deadline = started + self.queue_timeout
+        with self._cond:
+            if self._waiting >= self.max_waiting:
+                self.rejected += 1
+                raise ReplPoolBusy(f"{self._waiting} runs are already waiting for a Python worker")
+            self._waiting += 1
+            try:
+                while not self._idle:
+                    self._fill()
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0 or self._stopping:
+                        self.rejected += 1
+                        raise ReplPoolBusy(f"No Python worker became free within {self.queue_timeout:.0f}s")
+                    # Retry a failed start at most once a second
+                    self._cond.wait(min(remaining, 1.0))
+                worker = self._idle.pop(0)
+                self._busy += 1
+            finally:
+                self._waiting -= 1
+            self.wait_seconds += time.monotonic() - started
+        return worker
+
+    def _release(self, worker: _Worker, healthy: bool):
+        recycle = not healthy or worker.runs >= self.max_runs
+        if recycle:
+            worker.kill()
+        with self._cond:
+            self._busy -= 1
+            if recycle:
+                self.recycled += 1
+                self._fill()
+            elif self._stopping:
+                worker.kill()
+            else:
+                self._idle.append(worker)
+            self._cond.notify_all()
+
+    def run(self, code: str, timeout: Optional[float] = None) -> ReplResult:
+        """
+        Execute `code` in a worker and return what it printed. Errors in the code come
+        back in the result; ReplPoolBusy is raised when no worker can be had.
+        """
+        timeout = self.timeout if timeout is None else timeout
+        worker = self._acquire()
+        started = time.perf_counter()
+        healthy = False
+        try:
+            reply = worker.run(code, self.cpu_seconds, timeout)
+            healthy = not reply["fatal"]
+            result = ReplResult(reply["output"], reply["error"], reply["seconds"])
+        except TimeoutError:
+            result = ReplResult("", f"Timed out after {timeout:.0f}s", time.perf_counter() - started)
+        except _WorkerLost as e:
+            # Usually the memory limit hit outside Python (e.g. in a C extension)
+            result = ReplResult("", f"Python worker died ({e})", time.perf_counter() - started)
+        finally:
+            self._release(worker, healthy)
+        with self._cond:
+            self.runs += 1
+            self.run_seconds += result.seconds
+            if result.error is not None:
+                self.errors += 1
+        return result
+
+    def stats(self) -> dict:
+        with self._cond:
+            return {
+                "workers": self.workers,
+                "idle": len(self._idle),
+                "busy": self._busy,
+                "starting": self._starting,
+                "waiting": self._waiting,
+                "runs": self.runs,
+                "errors": self.errors,
+                "recycled": self.recycled,
+                "rejected": self.rejected,
+                "start_failures": self.start_failures,
+                "mean_wait_seconds": self.wait_seconds / self.runs if self.runs else 0.0,
+                "mean_run_seconds": self.run_seconds / self.runs if self.runs else 0.0,
+            }
@@ -0,0 +1,99 @@
+import argparse
+import re
+import subprocess
+import sys
+import time
+from collections import defaultdict
+from typing import Dict, List, Tuple
+
+# Defaults for the import-time report; overridable on the command line.
+DEFAULT_TOP = 25
+
+_IMPORTTIME_LINE = re.compile(r"^import time:\s+(\d+)\s+\|\s+(\d+)\s+\|(\s*)(\S+)$")
+
+
+class StartupProfile:
+    """
+    Wall time of app startup split into named phases. Create it first thing in
+    main.py and call `mark(name)` as each phase ends; a phase runs from the
+    previous mark (or the profile's creation) to its own.
+    """
+
+    def __init__(self):
+        self.started = self._last = time.perf_counter()
+        self.modules_at_start = len(sys.modules)
+        self.phases: List[Tuple[str, float]] = []
+        self.ready_seconds = None
+
+    def mark(self, name: str):
+        now = time.perf_counter()
+        self.phases.append((name, now - self._last))
+        self._last = now
+
+    def ready(self):
+        """
+        Mark startup complete (the app is about to serve requests).
+        """
+        self.ready_seconds = time.perf_counter() - self.started
+
+    def report(self) -> dict:
+        return {
+            "phases": [{"name": name, "seconds": round(seconds, 4)} for name, seconds in self.phases],
+            "ready_seconds": None if self.ready_seconds is None else round(self.ready_seconds, 4),
+            "modules_loaded": len(sys.modules) - self.modules_at_start,
+        }
+
+
+def import_times(module: str, python: str = sys.executable) -> List[Tuple[str, int, int]]:
+    """
+    (module, self µs, cumulative µs) for every module imported by `import module`, from
+    a fresh interpreter run with `-X importtime`.
+    """
+    completed = subprocess.run([python, "-X", "importtime", "-c", f"import {module}"],
+                               capture_output=True, text=True)
+    # A failed import would profile only the modules loaded before the failure
+    if completed.returncode != 0:
+        errors = [line for line in completed.stderr.splitlines() if not line.startswith("import time:")]
+        raise RuntimeError(f"import {module} failed:\n" + "\n".join(errors)[-2000:])
+    times = []
+    for line in completed.stderr.splitlines():
+        match = _IMPORTTIME_LINE.match(line)
+        if match:
+            times.append((match.group(4), int(match.group(1)), int(match.group(2))))
+    return times
+
+
+def by_package(times: List[Tuple[str, int, int]]) -> Dict[str, int]:
+    """
+    Self time (µs) summed per top-level package, largest first.
+    """
+    totals = defaultdict(int)
+    for module, self_us, _ in times:
+        totals[module.split(".", 1)[0]] += self_us
+    return dict(sorted(totals.items(), key=lambda item: item[1], reverse=True))
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Where import time goes when loading a module (default: main).")
+    parser.add_argument("module", nargs="?", default="main")
+    parser.add_argument("--top", type=int, default=DEFAULT_TOP)
+    args = parser.parse_args(argv)
+
+    try:
+        times = import_times(args.module)
+    except RuntimeError as e:
+        print(e, file=sys.stderr)
+        return 1
+    total = sum(self_us for _, self_us, _ in times)
+    print(f"{len(times)} modules, {total / 1e6:.3f}s importing {args.module}\n")
+    print(f"{'package':<40} {'self s':>8} {'share':>7}")
+    for package, self_us in list(by_package(times).items())[:args.top]:
+        print(f"{package:<40} {self_us / 1e6:>8.3f} {self_us / total:>7.1%}")
+    print(f"\n{'slowest imports (cumulative)':<60} {'s':>8}")
+    for module, _, cumulative_us in sorted(times, key=lambda item: item[2], reverse=True)[:args.top]:
+        print(f"{module:<60} {cumulative_us / 1e6:>8.3f}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,22 +1,40 @@
-from typing import Annotated, List, Tuple, Union
+from pathlib import Path
+from typing import List
 
-import matplotlib.pyplot as plt
-from langchain_community.document_loaders import WebBaseLoader
 from langchain_community.tools.tavily_search import TavilySearchResults
 from langchain_core.tools import tool
-from langsmith import trace
+
+from ..clients import get_minio_client
+from ..config import tool_config
+from ..web_fetch import WebFetcher
 
 tavily_tool = TavilySearchResults(max_results=5)
 
+_APP_ROOT = Path(__file__).resolve().parents[2]
+
+# Pages are fetched concurrently, politely per host, and reused or revalidated from the
+# on-disk cache on later runs (WEB_CACHE_DIR is relative to the app directory)
+web_fetcher = WebFetcher(
+    cache_dir=_APP_ROOT / tool_config.WEB_CACHE_DIR if tool_config.WEB_CACHE_DIR else None,
+    max_connections=tool_config.WEB_MAX_CONNECTIONS,
+    max_per_host=tool_config.WEB_MAX_PER_HOST,
+    host_interval=tool_config.WEB_HOST_INTERVAL,
+    timeout=tool_config.WEB_TIMEOUT,
+    client=get_minio_client(tool_config.MINIO_ENDPOINT, tool_config.MINIO_ACCESS_KEY, tool_config.MINIO_SECRET_KEY)
+    if tool_config.WEB_MIRROR_BUCKET else None,
+    bucket_name=tool_config.WEB_MIRROR_BUCKET or None,
+)
+
 
 @tool
 def scrape_webpages(urls: List[str]) -> str:
     """Use requests and bs4 to scrape the provided web pages for detailed information."""
-    loader = WebBaseLoader(urls)
-    docs = loader.load()
+    pages = web_fetcher.fetch_many(urls)
     return "\n\n".join(
         [
-            f'<Document name="{doc.metadata.get("title", "")}">\n{doc.page_content}\n</Document>'
-            for doc in docs
+            f'<Document name="{page.title}">\n{page.text}\n</Document>'
+            if page.error is None else
+            f'<Document name="{page.url}">\nCould not fetch this page: {page.error}\n</Document>'
+            for page in pages
         ]
-    )
\ No newline at end of file
+    )
@@ -1,13 +1,28 @@
 from pathlib import Path
 from tempfile import TemporaryDirectory
-from typing import Dict, Optional
+from typing import Dict, List, Optional
 
-from langchain_experimental.utilities import PythonREPL
-from typing_extensions import TypedDict
+from langchain_core.tools import tool
+from typing_extensions import Annotated, TypedDict
+
+from ..clients import get_minio_client
+from ..config import tool_config
+from ..document_store import DocumentStore
+from ..repl_pool import ReplPool, ReplPoolBusy
 
 _TEMP_DIRECTORY = TemporaryDirectory()
 WORKING_DIRECTORY = Path(_TEMP_DIRECTORY.name)
 
+# Reads and edits go through line indexes and edit logs instead of rewriting files;
+# with WRITING_DOCUMENTS_BUCKET set, documents are also kept in MinIO
+documents = DocumentStore(
+    WORKING_DIRECTORY,
+    client=get_minio_client(tool_config.MINIO_ENDPOINT, tool_config.MINIO_ACCESS_KEY, tool_config.MINIO_SECRET_KEY)
+    if tool_config.WRITING_DOCUMENTS_BUCKET else None,
+    bucket_name=tool_config.WRITING_DOCUMENTS_BUCKET or None,
+    max_pieces=tool_config.WRITING_DOCUMENTS_MAX_PIECES,
+)
+
 
 @tool
 def create_outline(
@@ -15,9 +30,7 @@ def create_outline(
     file_name: Annotated[str, "File path to save the outline."],
 ) -> Annotated[str, "Path of the saved outline file."]:
     """Create and save an outline."""
-    with (WORKING_DIRECTORY / file_name).open("w") as file:
-        for i, point in enumerate(points):
-            file.write(f"{i + 1}. {point}\n")
+    documents.write(file_name, "".join(f"{i + 1}. {point}\n" for i, point in enumerate(points)))
     return f"Outline saved to {file_name}"
 
 
@@ -28,11 +41,8 @@ def read_document(
     end: Annotated[Optional[int], "The end line. Default is None"] = None,
 ) -> str:
     """Read the specified document."""
-    with (WORKING_DIRECTORY / file_name).open("r") as file:
-        lines = file.readlines()
-    if start is not None:
-        start = 0
-    return "\n".join(lines[start:end])
+    # Only the requested lines are decoded
+    return "\n".join(documents.read(file_name, start or 0, end))
 
 
 @tool
@@ -41,8 +51,7 @@ def write_document(
     file_name: Annotated[str, "File path to save the document."],
 ) -> Annotated[str, "Path of the saved document file."]:
     """Create and save a text document."""
-    with (WORKING_DIRECTORY / file_name).open("w") as file:
-        file.write(content)
+    documents.write(file_name, content)
     return f"Document saved to {file_name}"
 
 
@@ -55,27 +64,29 @@ def edit_document(
     ],
 ) -> Annotated[str, "Path of the edited document file."]:
     """Edit a document by inserting text at specific line numbers."""
-
-    with (WORKING_DIRECTORY / file_name).open("r") as file:
-        lines = file.readlines()
-
-    sorted_inserts = sorted(inserts.items())
-
-    for line_number, text in sorted_inserts:
-        if 1 <= line_number <= len(lines) + 1:
-            lines.insert(line_number - 1, text + "\n")
-        else:
-            return f"Error: Line number {line_number} is out of range."
-
-    with (WORKING_DIRECTORY / file_name).open("w") as file:
-        file.writelines(lines)
+    # Logged as one edit; the file is only rewritten when the store compacts it
+    out_of_range = documents.insert(file_name, sorted(inserts.items()))
+    if out_of_range is not None:
+        return f"Error: Line number {out_of_range} is out of range."
 
     return f"Document edited and saved to {file_name}"
 
 
-# Warning: This executes code locally, which can be unsafe when not sandboxed
+# Warning: This executes code locally, which can be unsafe when not sandboxed.
+# Code runs in worker subprocesses with CPU, memory and time limits, not in the API
+# process; each run starts from a fresh namespace in WORKING_DIRECTORY.
 
-repl = PythonREPL()
+repl = ReplPool(
+    workers=tool_config.REPL_WORKERS,
+    max_runs=tool_config.REPL_MAX_RUNS,
+    cpu_seconds=tool_config.REPL_CPU_SECONDS,
+    memory_bytes=tool_config.REPL_MEMORY_BYTES,
+    timeout=tool_config.REPL_TIMEOUT,
+    queue_timeout=tool_config.REPL_QUEUE_TIMEOUT,
+    max_waiting=tool_config.REPL_MAX_WAITING,
+    warm_modules=tool_config.REPL_WARM_MODULES,
+    cwd=WORKING_DIRECTORY,
+)
 
 
 @tool
@@ -86,6 +97,8 @@ def python_repl(
     you should print it out with `print(...)`. This is visible to the user."""
     try:
         result = repl.run(code)
-    except BaseException as e:
-        return f"Failed to execute. Error: {repr(e)}"
-    return f"Succesfully executed:\n```python\n{code}\n```\nStdout: {result}"
\ No newline at end of file
+    except ReplPoolBusy as e:
+        return f"Failed to execute. Error: {e}"
+    if result.error is not None:
+        return f"Failed to execute. Error: {result.error}\nStdout: {result.output}"
+    return f"Succesfully executed:\n```python\n{code}\n```\nStdout: {result.output}"
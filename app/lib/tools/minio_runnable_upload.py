@@ -2,6 +2,7 @@
 
 import getpass
 import os
+import threading
 import uuid
 
 os.environ["OPENAI_API_KEY"] = ""
@@ -23,21 +24,28 @@ os.environ["LANGCHAIN_TRACING_V2"] = "true"
 os.environ["LANGCHAIN_PROJECT"] = "Langchain MinIO Tool"
 #from langchain.llms import OpenAI
 from langchain_openai import ChatOpenAI
+
+from ..metrics import llm_metrics
 # Initialize the LLM with your OpenAI API key
-llm = ChatOpenAI(api_key="")
+llm = ChatOpenAI(api_key="", callbacks=[llm_metrics])
 
 # Necessary imports
-import io
 from langchain.agents import tool
 
-from minio import Minio
 from minio.error import S3Error
 
+from ..clients import get_minio_client, get_weaviate_client
+from ..config import tool_config
+from ..embeddings import get_embedder
+from ..memory import ConversationMemory, MemoryStore, llm_summarizer
+from ..transfers import ParallelTransfer
+
 # Initialize MinIO client
-minio_client = Minio('play.min.io:443',
-                     access_key='minioadmin',
-                     secret_key='minioadmin',
-                     secure=True)
+minio_client = get_minio_client('play.min.io:443',
+                                access_key='minioadmin',
+                                secret_key='minioadmin',
+                                secure=True)
+transfer = ParallelTransfer(minio_client)
 
 # This variable will check if bucket exisits  
 bucket_name = "test"
@@ -64,8 +72,8 @@ def upload_file_to_minio(bucket_name: str, object_name: str, data_bytes: bytes):
         object_name (str): The name of the object to create in the bucket.
         data_bytes (bytes): The raw bytes of the file to upload.
     """
-    data_stream = io.BytesIO(data_bytes)
-    minio_client.put_object(bucket_name, object_name, data_stream, length=len(data_bytes))
+    # Sent straight from the caller's buffer, in parallel parts when it is large
+    transfer.upload_bytes(bucket_name, object_name, memoryview(data_bytes))
     return f"File {object_name} uploaded successfully to bucket {bucket_name}."
 
 #### 2. Create RunnableLambda for Upload (if needed for integration)
@@ -131,9 +139,26 @@ prompt = ChatPromptTemplate.from_messages([
     MessagesPlaceholder(variable_name="agent_scratchpad"),
 ])
 
-# Initialize chat history
+# Initialize chat history: recent turns verbatim, older ones summarized and kept in
+# Weaviate (LangchainMemoryObject), so the prompt stays within a fixed token budget
+
+_memory = None
+_memory_lock = threading.Lock()
 
-chat_history = []
+
+def get_memory() -> ConversationMemory:
+    """
+    The tool's conversation memory, loaded from Weaviate on first use rather than at import.
+    """
+    global _memory
+    with _memory_lock:
+        if _memory is None:
+            memory_store = MemoryStore(
+                get_weaviate_client(tool_config.WEAVIATE_ENDPOINT),
+                embedder=get_embedder(tool_config.EMBEDDING_BACKEND, **tool_config.embedding_model_options),
+            )
+            _memory = ConversationMemory.load("minio-tool", memory_store, summarizer=llm_summarizer(llm))
+        return _memory
 
 # Update agent definition to include chat_history
 
@@ -153,17 +178,16 @@ agent_executor = AgentExecutor(agent=agent, tools=tools, verbose=True)
 
 # This structured approach provides a detailed, step-by-step guide to refactoring the MinIO tutorial for integration with LangChain and OpenAI tools, aligning with your preferences for detailed, logical, and technically rich responses.
 
-# Prompt and file structure for file upload
-input1 = "Upload an object_name with some funny name to the 'test' bucket with some example content"
-file_info = {
-    "bucket_name": "",
-    "object_name": "",
-    "data_bytes": b""
-}
-
-# Simulate the agent executor invoking the MinIO upload tool
-result = agent_executor.invoke({"input": input1, "chat_history": chat_history, "file_info": file_info})
-chat_history.extend([
-    HumanMessage(content=input1),
-    AIMessage(content=result["output"]),
-])
+if __name__ == "__main__":
+    # Prompt and file structure for file upload
+    input1 = "Upload an object_name with some funny name to the 'test' bucket with some example content"
+    file_info = {
+        "bucket_name": "",
+        "object_name": "",
+        "data_bytes": b""
+    }
+
+    # Simulate the agent executor invoking the MinIO upload tool
+    memory = get_memory()
+    result = agent_executor.invoke({"input": input1, "chat_history": memory.messages_for(input1), "file_info": file_info})
+    memory.add_turn(input1, result["output"])
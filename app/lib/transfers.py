@@ -0,0 +1,300 @@
+import hashlib
+import json
+import logging
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, List, Optional, Tuple
+
+from minio.datatypes import Part
+from minio.error import S3Error
+
+logger = logging.getLogger(__name__)
+
+# Defaults for parallel transfers; overridable per transfer (see tool_config).
+DEFAULT_PART_SIZE = 64 * 1024 * 1024
+DEFAULT_PARALLELISM = 8
+DEFAULT_PART_RETRIES = 3
+# S3 limits on multipart uploads
+MIN_PART_SIZE = 5 * 1024 * 1024
+MAX_PARTS = 10000
+# Whole-object checksum, stored as user metadata (x-amz-meta-sha256)
+SHA256_METADATA = "x-amz-meta-sha256"
+HASH_BLOCK_SIZE = 1024 * 1024
+UPLOAD_STATE_SUFFIX = ".minio-upload"
+DOWNLOAD_STATE_SUFFIX = ".minio-download"
+DOWNLOAD_PART_SUFFIX = ".part.minio"
+
+
+class ChecksumMismatch(Exception):
+    """Raised when transferred data does not match the object's recorded sha256."""
+
+
+def _file_sha256(path: str) -> str:
+    digest = hashlib.sha256()
+    buffer = bytearray(HASH_BLOCK_SIZE)
+    view = memoryview(buffer)
+    with open(path, "rb", buffering=0) as f:
+        while True:
+            read = f.readinto(buffer)
+            if not read:
+                break
+            digest.update(view[:read])
+    return digest.hexdigest()
+
+
+def _load_state(path: str) -> Optional[dict]:
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def _save_state(path: str, state: dict):
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(state, f)
+    os.replace(tmp_path, path)
+
+
+def _remove(path: str):
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
+
+
+class ParallelTransfer:
+    """
+    Moves large objects between local files (or memory) and MinIO using concurrent parts.
+
+    Uploads above `part_size` are sent as S3 multipart uploads with `parallelism` parts in
+    flight; downloads are split into ranged GETs written straight to their offsets in a
+    preallocated file. Every object carries its sha256 as metadata, and downloads are
+    verified against it. File transfers record their progress in a sidecar next to the
+    local file, so a transfer that failed part-way resumes with only the missing parts.
+    """
+
+    def __init__(
+        self,
+        client,
+        part_size: int = DEFAULT_PART_SIZE,
+        parallelism: int = DEFAULT_PARALLELISM,
+        part_retries: int = DEFAULT_PART_RETRIES,
+    ):
+        self.client = client
+        self.part_size = max(part_size, MIN_PART_SIZE)
+        self.parallelism = parallelism
+        self.part_retries = part_retries
+
+    def upload_file(self, bucket_name: str, object_name: str, file_path: str,
+                    content_type: str = "application/octet-stream") -> dict:
+        """
+        Upload a local file, resuming an earlier interrupted upload of the same unchanged file.
+        """
+        stat = os.stat(file_path)
+        size = stat.st_size
+        state_path = file_path + UPLOAD_STATE_SUFFIX
+        state = _load_state(state_path)
+        if not (state and state["bucket"] == bucket_name and state["object"] == object_name
+                and state["size"] == size and state["mtime_ns"] == stat.st_mtime_ns):
+            state = None
+        sha256 = state["sha256"] if state else _file_sha256(file_path)
+        headers = {"Content-Type": content_type, SHA256_METADATA: sha256}
+
+        if size <= self.part_size:
+            def put():
+                # Reopened per attempt, so a retry sends the file from the start
+                with open(file_path, "rb") as f:
+                    return self.client.put_object(bucket_name, object_name, f, length=size,
+                                                  content_type=content_type, metadata={"sha256": sha256})
+
+            result = self._with_retries(put)
+            return {"etag": result.etag, "sha256": sha256, "size": size, "parts": 1, "resumed_parts": 0}
+
+        part_size = state["part_size"] if state else self._part_size_for(size)
+        uploaded = self._uploaded_parts(bucket_name, object_name, state["upload_id"]) if state else None
+        if uploaded is None:
+            upload_id = self.client._create_multipart_upload(bucket_name, object_name, headers)
+            uploaded = {}
+            _save_state(state_path, {
+                "bucket": bucket_name, "object": object_name, "upload_id": upload_id, "size": size,
+                "mtime_ns": stat.st_mtime_ns, "part_size": part_size, "sha256": sha256,
+            })
+        else:
+            upload_id = state["upload_id"]
+
+        fd = os.open(file_path, os.O_RDONLY)
+        try:
+            def read_part(offset: int, length: int):
+                return os.pread(fd, length, offset)
+
+            parts, resumed = self._upload_parts(bucket_name, object_name, upload_id, size, part_size, read_part, uploaded)
+        finally:
+            os.close(fd)
+        result = self.client._complete_multipart_upload(bucket_name, object_name, upload_id, parts)
+        _remove(state_path)
+        return {"etag": result.etag, "sha256": sha256, "size": size, "parts": len(parts), "resumed_parts": resumed}
+
+    def upload_bytes(self, bucket_name: str, object_name: str, data,
+                     content_type: str = "application/octet-stream") -> dict:
+        """
+        Upload a bytes-like payload. Parts are sent as memoryview slices of `data`,
+        so the payload is never copied.
+        """
+        view = memoryview(data)
+        if view.ndim != 1 or view.format != "B":
+            view = view.cast("B")
+        size = len(view)
+        sha256 = hashlib.sha256(view).hexdigest()
+        headers = {"Content-Type": content_type, SHA256_METADATA: sha256}
+
+        if size <= self.part_size:
+            # put_object insists on bytes from read(); the raw request accepts the view as is
+            result = self._with_retries(lambda: self.client._put_object(bucket_name, object_name, view, headers=headers))
+            return {"etag": result.etag, "sha256": sha256, "size": size, "parts": 1, "resumed_parts": 0}
+
+        part_size = self._part_size_for(size)
+        upload_id = self.client._create_multipart_upload(bucket_name, object_name, headers)
+        try:
+            parts, _ = self._upload_parts(bucket_name, object_name, upload_id, size, part_size,
+                                          lambda offset, length: view[offset:offset + length], {})
+        except Exception:
+            # Nothing to resume from once the caller's buffer is gone
+            self.client._abort_multipart_upload(bucket_name, object_name, upload_id)
+            raise
+        result = self.client._complete_multipart_upload(bucket_name, object_name, upload_id, parts)
+        return {"etag": result.etag, "sha256": sha256, "size": size, "parts": len(parts), "resumed_parts": 0}
+
+    def download_file(self, bucket_name: str, object_name: str, file_path: str) -> dict:
+        """
+        Download an object with parallel ranged GETs into `file_path`, verifying its sha256
+        when the object has one. Resumes an interrupted download of the same object version.
+        """
+        stat = self.client.stat_object(bucket_name, object_name)
+        size = stat.size
+        sha256 = stat.metadata.get(SHA256_METADATA) if stat.metadata else None
+        part_path = file_path + DOWNLOAD_PART_SUFFIX
+        state_path = file_path + DOWNLOAD_STATE_SUFFIX
+        state = _load_state(state_path)
+        if not (state and state["etag"] == stat.etag and state["size"] == size and os.path.exists(part_path)):
+            state = {"etag": stat.etag, "size": size, "part_size": self._part_size_for(size), "done": []}
+        part_size = state["part_size"]
+        done = set(state["done"])
+        resumed = len(done)
+        ranges = [(index, offset, min(part_size, size - offset))
+                  for index, offset in enumerate(range(0, size, part_size)) if index not in done]
+
+        fd = os.open(part_path, os.O_RDWR | os.O_CREAT, 0o644)
+        state_lock = threading.Lock()
+        try:
+            if not done:
+                os.ftruncate(fd, size)
+                if hasattr(os, "posix_fallocate") and size:
+                    os.posix_fallocate(fd, 0, size)
+                _save_state(state_path, state)
+
+            def fetch(index: int, offset: int, length: int):
+                def attempt():
+                    # If-Match keeps every range on the version that was stat'ed
+                    response = self.client.get_object(bucket_name, object_name, offset=offset, length=length,
+                                                      request_headers={"If-Match": stat.etag})
+                    try:
+                        position = offset
+                        for block in response.stream(HASH_BLOCK_SIZE):
+                            position += os.pwrite(fd, block, position)
+                    finally:
+                        response.close()
+                        response.release_conn()
+                    if position != offset + length:
+                        raise IOError(f"Short read for {object_name} at offset {offset}")
+
+                self._with_retries(attempt)
+                with state_lock:
+                    done.add(index)
+                    state["done"] = sorted(done)
+                    _save_state(state_path, state)
+
+            with ThreadPoolExecutor(max_workers=self.parallelism, thread_name_prefix="minio-download") as pool:
+                for future in [pool.submit(fetch, *part) for part in ranges]:
+                    future.result()
+            os.fsync(fd)
+        finally:
+            os.close(fd)
+
+        if sha256 and _file_sha256(part_path) != sha256:
+            _remove(part_path)
+            _remove(state_path)
+            raise ChecksumMismatch(f"sha256 of {bucket_name}/{object_name} does not match its metadata")
+        os.replace(part_path, file_path)
+        _remove(state_path)
+        return {"etag": stat.etag, "sha256": sha256, "size": size, "parts": len(done), "resumed_parts": resumed}
+
+    def _part_size_for(self, size: int) -> int:
+        # Grow parts when the object would otherwise need more than S3 allows
+        return max(self.part_size, -(-size // MAX_PARTS))
+
+    def _uploaded_parts(self, bucket_name: str, object_name: str, upload_id: str) -> Optional[dict]:
+        """
+        Parts already stored for an earlier upload, by part number; None if the upload is gone.
+        """
+        uploaded = {}
+        marker = None
+        try:
+            while True:
+                result = self.client._list_parts(bucket_name, object_name, upload_id, part_number_marker=marker)
+                for part in result.parts:
+                    uploaded[part.part_number] = part
+                if not result.is_truncated:
+                    return uploaded
+                marker = str(result.next_part_number_marker)
+        except S3Error as e:
+            if e.code == "NoSuchUpload":
+                return None
+            raise
+
+    def _upload_parts(
+        self,
+        bucket_name: str,
+        object_name: str,
+        upload_id: str,
+        size: int,
+        part_size: int,
+        read_part: Callable[[int, int], bytes],
+        uploaded: dict,
+    ) -> Tuple[List[Part], int]:
+        etags = {}
+        resumed = 0
+        pending = []
+        for index, offset in enumerate(range(0, size, part_size)):
+            part_number = index + 1
+            length = min(part_size, size - offset)
+            previous = uploaded.get(part_number)
+            if previous is not None and previous.size == length:
+                etags[part_number] = previous.etag
+                resumed += 1
+            else:
+                pending.append((part_number, offset, length))
+
+        def send(part_number: int, offset: int, length: int) -> str:
+            # Parts are read inside the worker, so at most `parallelism` are held in memory.
+            # The signed payload hash lets the server reject a part corrupted in transit.
+            return self._with_retries(lambda: self.client._upload_part(
+                bucket_name, object_name, read_part(offset, length), None, upload_id, part_number))
+
+        with ThreadPoolExecutor(max_workers=self.parallelism, thread_name_prefix="minio-upload") as pool:
+            futures = [(part_number, pool.submit(send, part_number, offset, length))
+                       for part_number, offset, length in pending]
+            for part_number, future in futures:
+                etags[part_number] = future.result()
+        return [Part(part_number, etags[part_number]) for part_number in sorted(etags)], resumed
+
+    def _with_retries(self, call):
+        for attempt in range(self.part_retries + 1):
+            try:
+                return call()
+            except Exception:
+                if attempt == self.part_retries:
+                    raise
+                logger.warning("Transfer request failed; retrying (%d/%d)", attempt + 1, self.part_retries, exc_info=True)
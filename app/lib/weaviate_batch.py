@@ -0,0 +1,211 @@
+import threading
+import time
+import uuid as uuid_lib
+from typing import Callable, List, NamedTuple, Optional, Sequence
+
+from weaviate.batch.requests import ObjectsBatchRequest
+
+from .metrics import WEAVIATE_OBJECTS
+
+# Defaults for the adaptive writer; overridable per writer (see tool_config).
+DEFAULT_BATCH_SIZE = 100
+DEFAULT_MIN_BATCH_SIZE = 10
+DEFAULT_MAX_BATCH_SIZE = 1000
+DEFAULT_TARGET_LATENCY = 1.0
+DEFAULT_FLUSH_INTERVAL = 5.0
+
+# Namespace of the deterministic document IDs; changing it re-keys every indexed object
+DOCUMENT_NAMESPACE = uuid_lib.UUID("6f1c2b9e-4d0a-5b7e-9c3f-2a8d1e6b4f70")
+
+
+def document_uuid(bucket_name: str, key: str, part: int = 0) -> str:
+    """
+    The ID of part `part` (chunk offset or index) of the object `key` in `bucket_name`.
+    The same source always maps to the same ID, so writing it again replaces the object
+    instead of adding a duplicate.
+    """
+    return str(uuid_lib.uuid5(DOCUMENT_NAMESPACE, f"{bucket_name}/{key}#{int(part)}"))
+
+
+class BatchError(NamedTuple):
+    """A single object that Weaviate rejected (or never received) during a batch write."""
+    uuid: str
+    class_name: str
+    message: str
+
+
+class _PendingObject(NamedTuple):
+    properties: dict
+    class_name: str
+    uuid: str
+    vector: Optional[Sequence[float]]
+
+
+class AdaptiveBatchWriter:
+    """
+    Buffers objects and writes them through the client's batch API. Each writer sends
+    its own batch requests, so several writers can share one client concurrently.
+    Writes are upserts: an object whose UUID already exists replaces it, and adding a
+    UUID that is still buffered replaces the buffered object.
+
+    A batch is sent when the buffer reaches the current batch size or when the oldest
+    buffered object has waited `flush_interval` seconds. After each send the batch size
+    grows while requests finish well under `target_latency` and shrinks when they exceed
+    it. Rejected objects are passed to `on_error` (or collected on `errors`).
+    """
+
+    def __init__(
+        self,
+        client,
+        batch_size: int = DEFAULT_BATCH_SIZE,
+        min_batch_size: int = DEFAULT_MIN_BATCH_SIZE,
+        max_batch_size: int = DEFAULT_MAX_BATCH_SIZE,
+        target_latency: float = DEFAULT_TARGET_LATENCY,
+        flush_interval: float = DEFAULT_FLUSH_INTERVAL,
+        on_error: Optional[Callable[[List[BatchError]], None]] = None,
+    ):
+        self.client = client
+        self.batch_size = max(min_batch_size, min(batch_size, max_batch_size))
+        self.min_batch_size = min_batch_size
+        self.max_batch_size = max_batch_size
+        self.target_latency = target_latency
+        self.flush_interval = flush_interval
+        self.on_error = on_error
+        self.errors: List[BatchError] = []
+        self.succeeded = 0
+        self.failed = 0
+        self.batches = 0
+
+        self._buffer: List[_PendingObject] = []
+        self._positions = {}
+        self._oldest = None
+        self._lock = threading.Lock()
+        self._send_lock = threading.Lock()
+        self._closed = threading.Event()
+        self._timer = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    def add(self, properties: dict, class_name: str, uuid: Optional[str] = None, vector: Optional[Sequence[float]] = None) -> str:
+        """
+        Queue an object for writing and return its UUID (generated client-side when omitted).
+        """
+        if self._closed.is_set():
+            raise RuntimeError("AdaptiveBatchWriter is closed")
+        object_uuid = str(uuid or uuid_lib.uuid4())
+        pending = _PendingObject(properties, class_name, object_uuid, vector)
+        with self._lock:
+            if not self._buffer:
+                self._oldest = time.monotonic()
+            position = self._positions.get(object_uuid)
+            if position is not None:
+                self._buffer[position] = pending
+            else:
+                self._positions[object_uuid] = len(self._buffer)
+                self._buffer.append(pending)
+            full = len(self._buffer) >= self.batch_size
+        self._ensure_timer()
+        if full:
+            self.flush()
+        return object_uuid
+
+    def flush(self) -> List[BatchError]:
+        """
+        Send everything buffered so far and return the objects that failed.
+        """
+        with self._send_lock:
+            with self._lock:
+                items, self._buffer = self._buffer, []
+                self._positions = {}
+                self._oldest = None
+            if not items:
+                return []
+            errors = self._send(items)
+        if errors:
+            if self.on_error is not None:
+                self.on_error(errors)
+            else:
+                self.errors.extend(errors)
+        return errors
+
+    def close(self):
+        """
+        Flush remaining objects and stop the background flush timer.
+        """
+        if self._closed.is_set():
+            return
+        self._closed.set()
+        if self._timer is not None:
+            self._timer.join()
+        self.flush()
+
+    def _send(self, items: List[_PendingObject]) -> List[BatchError]:
+        # Built per send rather than queued on client.batch, which is shared by every
+        # user of the client; _create_data keeps the client's timeout/connection retries.
+        # It is private v3 API, hence the weaviate-client<4 pin in requirements.txt
+        request = ObjectsBatchRequest()
+        for item in items:
+            request.add(item.properties, item.class_name, uuid=item.uuid, vector=item.vector)
+        start = time.monotonic()
+        try:
+            results = self.client.batch._create_data("objects", request).json()
+        except Exception as e:
+            self._resize(None)
+            self.failed += len(items)
+            errors = [BatchError(item.uuid, item.class_name, str(e)) for item in items]
+            self._count(items, errors)
+            return errors
+        self._resize(time.monotonic() - start)
+        self.batches += 1
+
+        errors = []
+        for result in results or []:
+            messages = ((result.get("result") or {}).get("errors") or {}).get("error") or []
+            if messages:
+                errors.append(BatchError(
+                    result.get("id"),
+                    result.get("class"),
+                    "; ".join(m.get("message", "") for m in messages),
+                ))
+        self.failed += len(errors)
+        self.succeeded += len(items) - len(errors)
+        self._count(items, errors)
+        return errors
+
+    @staticmethod
+    def _count(items: List[_PendingObject], errors: List[BatchError]):
+        written = {}
+        for item in items:
+            written[item.class_name] = written.get(item.class_name, 0) + 1
+        for error in errors:
+            written[error.class_name] = written.get(error.class_name, 0) - 1
+            WEAVIATE_OBJECTS.inc(error.class_name, "error")
+        for class_name, count in written.items():
+            if count:
+                WEAVIATE_OBJECTS.inc(class_name, "ok", amount=count)
+
+    def _resize(self, elapsed: Optional[float]):
+        # A failed request (elapsed is None) is treated as overload.
+        if elapsed is None or elapsed > self.target_latency:
+            ratio = 0.5 if elapsed is None else self.target_latency / elapsed
+            self.batch_size = max(self.min_batch_size, int(self.batch_size * ratio))
+        elif elapsed < self.target_latency / 2:
+            self.batch_size = min(self.max_batch_size, int(self.batch_size * 1.5) + 1)
+
+    def _ensure_timer(self):
+        if self._timer is None and self.flush_interval:
+            with self._lock:
+                if self._timer is None:
+                    self._timer = threading.Thread(target=self._flush_periodically, name="weaviate-batch-flush", daemon=True)
+                    self._timer.start()
+
+    def _flush_periodically(self):
+        while not self._closed.wait(self.flush_interval / 4):
+            with self._lock:
+                due = self._oldest is not None and time.monotonic() - self._oldest >= self.flush_interval
+            if due:
+                self.flush()
@@ -0,0 +1,288 @@
+import argparse
+import gzip
+import io
+import json
+import os
+import shutil
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Iterator, List, Optional
+
+from .transfers import ParallelTransfer
+from .weaviate_batch import AdaptiveBatchWriter
+from .weaviate_query import DEFAULT_PAGE_SIZE, compile_query
+
+# Defaults for export and import; overridable per call (see tool_config).
+DEFAULT_FORMAT = "jsonl.gz"
+DEFAULT_SHARD_SIZE = 100000
+DEFAULT_IMPORT_WORKERS = 4
+DEFAULT_UPLOAD_WORKERS = 2
+PARQUET_ROW_GROUP_SIZE = 10000
+FORMATS = ("jsonl.gz", "jsonl.zst", "parquet")
+
+
+def class_properties(client, class_name: str) -> List[str]:
+    """
+    Names of a class's primitive properties; cross-references are not exported.
+    """
+    schema = client.schema.get(class_name)
+    return [prop["name"] for prop in schema.get("properties", []) if prop["dataType"][0][:1].islower()]
+
+
+def _manifest_name(class_name: str) -> str:
+    return f"{class_name}.manifest.json"
+
+
+class _JsonlShardWriter:
+    def __init__(self, path: str, fmt: str):
+        if fmt == "jsonl.gz":
+            self._file = gzip.open(path, "wt", encoding="utf-8", compresslevel=6)
+            self._raw = None
+        else:
+            try:
+                import zstandard
+            except ImportError as e:
+                raise ImportError("jsonl.zst output requires `pip install zstandard`") from e
+            self._raw = open(path, "wb")
+            self._file = io.TextIOWrapper(zstandard.ZstdCompressor(level=3).stream_writer(self._raw), encoding="utf-8")
+
+    def write(self, record: dict):
+        self._file.write(json.dumps(record, ensure_ascii=False))
+        self._file.write("\n")
+
+    def close(self):
+        self._file.close()
+        if self._raw is not None and not self._raw.closed:
+            self._raw.close()
+
+
+class _ParquetShardWriter:
+    # Properties are kept as one JSON column so every class shares one table layout
+    def __init__(self, path: str):
+        try:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+        except ImportError as e:
+            raise ImportError("parquet output requires `pip install pyarrow`") from e
+        self._pa = pa
+        self._schema = pa.schema([("id", pa.string()), ("properties", pa.string()), ("vector", pa.list_(pa.float32()))])
+        self._writer = pq.ParquetWriter(path, self._schema, compression="zstd")
+        self._rows = []
+
+    def write(self, record: dict):
+        self._rows.append(record)
+        if len(self._rows) >= PARQUET_ROW_GROUP_SIZE:
+            self._flush()
+
+    def close(self):
+        self._flush()
+        self._writer.close()
+
+    def _flush(self):
+        if not self._rows:
+            return
+        rows, self._rows = self._rows, []
+        self._writer.write_table(self._pa.table({
+            "id": [row["id"] for row in rows],
+            "properties": [json.dumps(row["properties"], ensure_ascii=False) for row in rows],
+            "vector": [row.get("vector") for row in rows],
+        }, schema=self._schema))
+
+
+def _open_shard_writer(path: str, fmt: str):
+    if fmt == "parquet":
+        return _ParquetShardWriter(path)
+    return _JsonlShardWriter(path, fmt)
+
+
+def _read_shard(path: str, fmt: str) -> Iterator[dict]:
+    if fmt == "parquet":
+        import pyarrow.parquet as pq
+        parquet_file = pq.ParquetFile(path)
+        for batch in parquet_file.iter_batches():
+            for row in batch.to_pylist():
+                yield {"id": row["id"], "properties": json.loads(row["properties"]), "vector": row["vector"]}
+        return
+    if fmt == "jsonl.gz":
+        lines = gzip.open(path, "rt", encoding="utf-8")
+    else:
+        import zstandard
+        lines = io.TextIOWrapper(zstandard.ZstdDecompressor().stream_reader(open(path, "rb"), closefd=True), encoding="utf-8")
+    with lines:
+        for line in lines:
+            if line.strip():
+                yield json.loads(line)
+
+
+def export_class(
+    client,
+    class_name: str,
+    directory: str,
+    fmt: str = DEFAULT_FORMAT,
+    shard_size: int = DEFAULT_SHARD_SIZE,
+    page_size: int = DEFAULT_PAGE_SIZE,
+    include_vector: bool = True,
+    minio_client=None,
+    bucket_name: Optional[str] = None,
+    prefix: str = "",
+    transfer_options: Optional[dict] = None,
+) -> dict:
+    """
+    Stream every object of `class_name` into shards of `shard_size` objects plus a manifest.
+
+    Objects are walked with the `after` cursor, so memory stays at one page and one open
+    shard whatever the class size. Shards are written to `directory`; with a `minio_client`
+    each finished shard is uploaded (multipart, in parallel parts) to `bucket_name/prefix`
+    while the next one is written, and removed locally.
+    """
+    if fmt not in FORMATS:
+        raise ValueError(f"Unknown export format {fmt!r}; expected one of {FORMATS}")
+    os.makedirs(directory, exist_ok=True)
+    properties = class_properties(client, class_name)
+    query = compile_query(class_name, properties, include_vector=include_vector)
+    transfer = ParallelTransfer(minio_client, **(transfer_options or {})) if minio_client is not None else None
+    uploads = ThreadPoolExecutor(max_workers=DEFAULT_UPLOAD_WORKERS, thread_name_prefix="export-upload")
+    pending_uploads = []
+    shards = []
+    total = 0
+    start = time.monotonic()
+
+    def finish_shard(writer, name: str, count: int):
+        writer.close()
+        shards.append({"name": name, "objects": count})
+        if transfer is not None:
+            path = os.path.join(directory, name)
+            pending_uploads.append(uploads.submit(_upload_and_remove, transfer, bucket_name, prefix + name, path))
+
+    try:
+        writer, name, count = None, None, 0
+        for obj in query.iter_objects(client, page_size=page_size):
+            if writer is None:
+                name = f"{class_name}-{len(shards):05d}.{fmt}"
+                writer, count = _open_shard_writer(os.path.join(directory, name), fmt), 0
+            additional = obj["_additional"]
+            values = {key: value for key, value in obj.items() if key != "_additional"}
+            writer.write({"id": additional["id"], "properties": values, "vector": additional.get("vector")})
+            count += 1
+            total += 1
+            if count >= shard_size:
+                finish_shard(writer, name, count)
+                writer = None
+        if writer is not None:
+            finish_shard(writer, name, count)
+        for future in pending_uploads:
+            future.result()
+    finally:
+        uploads.shutdown(wait=True)
+
+    manifest = {"class": class_name, "format": fmt, "properties": properties, "objects": total, "shards": shards}
+    payload = json.dumps(manifest, indent=2).encode("utf-8")
+    if transfer is not None:
+        transfer.upload_bytes(bucket_name, prefix + _manifest_name(class_name), payload, content_type="application/json")
+    else:
+        with open(os.path.join(directory, _manifest_name(class_name)), "wb") as f:
+            f.write(payload)
+    elapsed = time.monotonic() - start
+    return {"class": class_name, "objects": total, "shards": len(shards), "seconds": elapsed,
+            "objects_per_second": total / elapsed if elapsed > 0 else 0.0}
+
+
+def _upload_and_remove(transfer: ParallelTransfer, bucket_name: str, object_name: str, path: str):
+    transfer.upload_file(bucket_name, object_name, path)
+    os.remove(path)
+
+
+def import_class(
+    client,
+    class_name: str,
+    directory: Optional[str] = None,
+    workers: int = DEFAULT_IMPORT_WORKERS,
+    minio_client=None,
+    bucket_name: Optional[str] = None,
+    prefix: str = "",
+    writer_options: Optional[dict] = None,
+    transfer_options: Optional[dict] = None,
+) -> dict:
+    """
+    Load an export back into `class_name`, `workers` shards at a time, each through its own
+    batch writer. Objects keep their IDs (re-importing overwrites) and vectors. Reads from
+    `directory`, or downloads shards from `bucket_name/prefix` with a `minio_client`.
+    """
+    transfer = ParallelTransfer(minio_client, **(transfer_options or {})) if minio_client is not None else None
+    scratch = tempfile.mkdtemp(prefix="weaviate-import-") if transfer is not None else None
+    source = scratch or directory
+    try:
+        if transfer is not None:
+            transfer.download_file(bucket_name, prefix + _manifest_name(class_name), os.path.join(source, _manifest_name(class_name)))
+        with open(os.path.join(source, _manifest_name(class_name)), "r", encoding="utf-8") as f:
+            manifest = json.load(f)
+        fmt = manifest["format"]
+
+        def load_shard(shard: dict) -> dict:
+            path = os.path.join(source, shard["name"])
+            if transfer is not None:
+                transfer.download_file(bucket_name, prefix + shard["name"], path)
+            errors = []
+            with AdaptiveBatchWriter(client, on_error=errors.extend, **(writer_options or {})) as writer:
+                for record in _read_shard(path, fmt):
+                    writer.add(record["properties"], class_name, uuid=record["id"], vector=record.get("vector"))
+            if transfer is not None:
+                os.remove(path)
+            return {"imported": writer.succeeded, "failed": writer.failed, "errors": errors}
+
+        start = time.monotonic()
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="weaviate-import") as pool:
+            results = list(pool.map(load_shard, manifest["shards"]))
+        elapsed = time.monotonic() - start
+    finally:
+        if scratch is not None:
+            shutil.rmtree(scratch, ignore_errors=True)
+
+    imported = sum(result["imported"] for result in results)
+    return {
+        "class": class_name,
+        "imported": imported,
+        "failed": sum(result["failed"] for result in results),
+        "errors": [error._asdict() for result in results for error in result["errors"]],
+        "shards": len(results),
+        "seconds": elapsed,
+        "objects_per_second": imported / elapsed if elapsed > 0 else 0.0,
+    }
+
+
+def main(argv=None):
+    from .clients import get_minio_client, get_weaviate_client
+    from .config import tool_config
+
+    parser = argparse.ArgumentParser(description="Export or import Weaviate classes as sharded, compressed files.")
+    parser.add_argument("command", choices=("export", "import"))
+    parser.add_argument("class_name")
+    parser.add_argument("--dir", default=".", help="local directory holding the shards")
+    parser.add_argument("--bucket", help="read/write the shards in this MinIO bucket instead")
+    parser.add_argument("--prefix", default="", help="object name prefix inside --bucket")
+    parser.add_argument("--format", default=tool_config.EXPORT_FORMAT, choices=FORMATS)
+    parser.add_argument("--shard-size", type=int, default=tool_config.EXPORT_SHARD_SIZE)
+    parser.add_argument("--workers", type=int, default=tool_config.IMPORT_WORKERS)
+    parser.add_argument("--no-vectors", action="store_true")
+    args = parser.parse_args(argv)
+
+    client = get_weaviate_client(tool_config.WEAVIATE_ENDPOINT, tool_config.WEAVIATE_API_KEY)
+    minio_client = None
+    if args.bucket:
+        minio_client = get_minio_client(tool_config.MINIO_ENDPOINT, tool_config.MINIO_ACCESS_KEY, tool_config.MINIO_SECRET_KEY)
+    transfer_options = {"part_size": tool_config.MINIO_TRANSFER_PART_SIZE, "parallelism": tool_config.MINIO_TRANSFER_PARALLELISM}
+    if args.command == "export":
+        with tempfile.TemporaryDirectory(prefix="weaviate-export-") as scratch:
+            result = export_class(client, args.class_name, scratch if args.bucket else args.dir, fmt=args.format,
+                                  shard_size=args.shard_size, include_vector=not args.no_vectors, minio_client=minio_client,
+                                  bucket_name=args.bucket, prefix=args.prefix, transfer_options=transfer_options)
+    else:
+        result = import_class(client, args.class_name, args.dir, workers=args.workers, minio_client=minio_client,
+                              bucket_name=args.bucket, prefix=args.prefix, transfer_options=transfer_options)
+        result.pop("errors")
+    print(json.dumps(result))
+
+
+if __name__ == "__main__":
+    main()
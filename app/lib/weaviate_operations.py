@@ -1,29 +1,241 @@
-from weaviate.client import Client
-from .minio_operations import load_documents_from_minio
+from typing import Callable, Iterable, List, Optional, Tuple
+
+from .clients import get_weaviate_client
+from .embeddings import Embedder, EmbeddingWriter
+from .minio_operations import MinioOperations
+from .query_cache import QueryCache, query_cache_key
+from .weaviate_batch import AdaptiveBatchWriter, BatchError, document_uuid
+from .weaviate_query import compile_query
+
+# Defaults for document processing; overridable per call (see llm_config).
+DEFAULT_PROCESS_BATCH_SIZE = 64
+# IDs per batch delete request (Weaviate matches at most 10000 objects per request)
+DELETE_BATCH_SIZE = 1000
 
 class WeaviateOperations:
-    def __init__(self, weaviate_endpoint: str):
-        self.client = Client(weaviate_endpoint)
+    def __init__(self, weaviate_endpoint: str, embedder: Optional[Embedder] = None, embedding_options: Optional[dict] = None,
+                 query_cache: Optional[QueryCache] = None):
+        """
+        With an `embedder`, documents are embedded client-side and written with their vectors;
+        `embedding_options` (batch_size, workers) are passed through to `EmbeddingWriter`.
+        With a `query_cache`, `query_data` results are cached until a write touches their class.
+        """
+        self.client = get_weaviate_client(weaviate_endpoint)
+        self.embedder = embedder
+        self.embedding_options = embedding_options or {}
+        self.query_cache = query_cache
 
     def index_document(self, bucket_name: str, document_name: str, document_content: str):
         """
-        Indexes a document into Weaviate.
+        Indexes a document into Weaviate, replacing the one previously indexed under the same name.
         """
         data_object = {
             "name": document_name,
             "content": document_content
         }
-        self.client.data_object.create(data_object=data_object, class_name="MarkdownDocument")
+        vector = self.embedder.embed_query(document_content) if self.embedder is not None else None
+        # Written through the batch API, which upserts by ID; data_object.create fails on an existing one
+        with AdaptiveBatchWriter(self.client, flush_interval=0) as writer:
+            writer.add(data_object, "MarkdownDocument", uuid=document_uuid(bucket_name, document_name), vector=vector)
+            errors = writer.flush()
+        self._invalidate("MarkdownDocument")
+        if errors:
+            raise RuntimeError(errors[0].message)
 
-    def index_documents_from_minio(self, bucket: str, minio_endpoint: str, access_key: str, secret_key: str, secure: bool = False):
+    def index_documents(self, documents: Iterable[Tuple[str, str]], bucket_name: str = "", **writer_options) -> dict:
+        """
+        Indexes (document_name, document_content) pairs into Weaviate through an adaptive batch writer.
+        Documents are keyed by `bucket_name` and name: indexing a name again replaces its document.
+        `writer_options` are passed through to `AdaptiveBatchWriter`.
         """
-        Retrieve documents from MinIO and index them into Weaviate.
+        errors = []
+        try:
+            with self._open_writer(errors.extend, writer_options) as writer:
+                for document_name, document_content in documents:
+                    writer.add({"name": document_name, "content": document_content}, "MarkdownDocument",
+                               uuid=document_uuid(bucket_name, document_name))
+        finally:
+            self._invalidate("MarkdownDocument")
+        return {"indexed": writer.succeeded, "failed": writer.failed, "errors": errors}
+
+    def index_documents_from_minio(self, bucket: str, minio_endpoint: str, access_key: str, secret_key: str, secure: bool = False, manifest=None, **stream_options):
+        """
+        Stream documents from MinIO and index them into Weaviate as they arrive.
+        `stream_options` are passed through to `MinioOperations.stream_documents`.
+        """
+        minio_ops = MinioOperations(minio_endpoint, access_key, secret_key, secure)
+        return self.index_minio_objects(minio_ops, bucket, manifest=manifest, stream_options=stream_options)
+
+    def index_minio_objects(
+        self,
+        minio_ops: MinioOperations,
+        bucket: str,
+        manifest=None,
+        objects: Optional[Iterable] = None,
+        process: Optional[Callable[[str], Tuple[str, str]]] = None,
+        process_batch: Optional[Callable[[List[str]], List]] = None,
+        process_batch_size: int = DEFAULT_PROCESS_BATCH_SIZE,
+        stream_options: Optional[dict] = None,
+        writer_options: Optional[dict] = None,
+        chunk_options: Optional[dict] = None,
+        start_after: Optional[str] = None,
+        progress=None,
+    ) -> dict:
         """
-        documents = load_documents_from_minio(bucket, minio_endpoint, access_key, secret_key, secure)
-        for doc_content in documents:
+        Index a bucket through the streaming loader and the batch writer.
+        Document IDs are derived from (bucket, key, chunk offset or index) and written as
+        upserts, so indexing the same data again replaces objects instead of duplicating them.
+        With an `IndexManifest`, only new or modified objects are fetched and indexed, their
+        previous objects are replaced, and objects deleted from the bucket are removed.
+        `objects` restricts the run to part of the bucket (deletions are then not detected).
+        `process` maps raw content to (document_name, document_content).
+        `process_batch` replaces it with a call per `process_batch_size` documents, returning
+        one (document_name, document_content) or exception per document, so processing can
+        run concurrently (e.g. through a model's `batch`). A document whose processing failed
+        is reported in `errors` and left out of the manifest, so the next run retries it.
+        With `chunk_options`, objects are read through ranged GETs (prefetched under the same
+        `stream_options`) and indexed as one document per chunk carrying its source key, byte
+        offset and length.
+        `start_after` resumes a run after that key in listing order (deletions are then not detected).
+        `progress` (e.g. an `IndexJob`) is told the number of objects to index via `begin(total)`,
+        is polled with `cancelled()` to stop early, and gets `object_done(key, checkpoint)` once
+        every document of an object is queued; calling `checkpoint()` flushes pending writes,
+        saves the manifest and returns the number of failed writes so far.
+        """
+        if process is None:
             # Assuming doc_content contains necessary identifiers or names
-            doc_name = self.extract_name_from_content(doc_content)
-            self.index_document(bucket, doc_name, doc_content)
+            process = lambda content: (self.extract_name_from_content(content), content)
+
+        if objects is None and start_after is not None:
+            objects = minio_ops.iter_objects(bucket, start_after=start_after)
+        partial = objects is not None
+        sizes, deleted, unchanged = {}, 0, 0
+        if manifest is not None:
+            changes = manifest.diff(objects if partial else minio_ops.iter_objects(bucket), detect_deletions=not partial)
+            deleted += self._delete_uuids([uuid for key in changes.deleted for uuid in manifest.forget(key)])
+            objects, unchanged = changes.changed, changes.unchanged
+            sizes = {obj.object_name: obj.size for obj in objects}
+        if progress is not None:
+            progress.begin(len(objects) if isinstance(objects, list) else None)
+
+        if chunk_options is not None:
+            records = minio_ops.stream_chunks(bucket, objects=objects, **(stream_options or {}), **chunk_options)
+        else:
+            records = minio_ops.stream_documents(bucket, objects=objects, **(stream_options or {}))
+
+        errors, indexed_keys, stale = [], {}, {}
+        current = None
+        uuids = []
+        queued = process_failed = settled = 0
+        completed = False
+
+        def settle(confirmed: bool):
+            # Only once the writes queued so far are flushed is it known which objects made
+            # it: those drop the documents they replaced, the others keep them until retried
+            nonlocal deleted, settled
+            failed_keys = {indexed_keys[error.uuid] for error in errors[settled:] if error.uuid in indexed_keys}
+            settled = len(errors)
+            replaced = []
+            for key, previous in stale.items():
+                if confirmed and key not in failed_keys:
+                    replaced += previous
+                else:
+                    manifest.retry(key, previous)
+            for key in failed_keys - stale.keys():
+                manifest.retry(key)
+            stale.clear()
+            deleted += self._delete_uuids(replaced)
+
+        def checkpoint() -> int:
+            writer.flush()
+            if manifest is not None:
+                settle(confirmed=True)
+                manifest.save()
+            if queued or deleted:
+                self._invalidate("MarkdownDocument")
+            return writer.failed + process_failed
+
+        try:
+            with self._open_writer(errors.extend, writer_options) as writer:
+                for record, processed in self._processed(records, process, process_batch, process_batch_size):
+                    if current is not None and record.key != current.key:
+                        self._record_indexed(manifest, current, sizes, uuids, stale)
+                        if progress is not None:
+                            progress.object_done(current.key, checkpoint)
+                        uuids = []
+                        if progress is not None and progress.cancelled():
+                            current = None
+                            break
+                    current = record
+                    part = record.offset if chunk_options is not None else len(uuids)
+                    uuid = document_uuid(bucket, record.key, part)
+                    if isinstance(processed, Exception):
+                        errors.append(BatchError(uuid, "MarkdownDocument", f"Processing failed: {processed}"))
+                        process_failed += 1
+                    else:
+                        document_name, document_content = processed
+                        properties = {"name": document_name, "content": document_content}
+                        if chunk_options is not None:
+                            properties.update(source=record.key, offset=record.offset, length=record.length)
+                        writer.add(properties, "MarkdownDocument", uuid=uuid)
+                        queued += 1
+                    uuids.append(uuid)
+                    if manifest is not None:
+                        indexed_keys[uuid] = record.key
+                if current is not None:
+                    self._record_indexed(manifest, current, sizes, uuids, stale)
+                    if progress is not None:
+                        progress.object_done(current.key, checkpoint)
+            completed = True
+        finally:
+            records.close()
+            if manifest is not None:
+                # After a failure nothing says the last writes landed, so nothing is deleted
+                settle(confirmed=completed)
+                manifest.save(force=not partial)
+            if queued or deleted:
+                self._invalidate("MarkdownDocument")
+        return {
+            "indexed": writer.succeeded,
+            "failed": writer.failed + process_failed,
+            "deleted": deleted,
+            "unchanged": unchanged,
+            "errors": errors,
+        }
+
+    @staticmethod
+    def _processed(records, process, process_batch, batch_size: int):
+        # (record, (document_name, document_content)) pairs in stream order; batched
+        # processing yields the exception in place of a document that failed
+        if process_batch is None:
+            for record in records:
+                yield record, process(record.content)
+            return
+        batch = []
+        for record in records:
+            batch.append(record)
+            if len(batch) >= batch_size:
+                yield from zip(batch, process_batch([record.content for record in batch]))
+                batch = []
+        if batch:
+            yield from zip(batch, process_batch([record.content for record in batch]))
+
+    def _invalidate(self, class_name: str):
+        if self.query_cache is not None:
+            self.query_cache.invalidate(class_name)
+
+    def _open_writer(self, on_error, writer_options: Optional[dict]):
+        writer = AdaptiveBatchWriter(self.client, on_error=on_error, **(writer_options or {}))
+        if self.embedder is not None:
+            return EmbeddingWriter(writer, self.embedder, **self.embedding_options)
+        return writer
+
+    @staticmethod
+    def _record_indexed(manifest, record, sizes: dict, uuids: List[str], stale: dict):
+        # All of an object's documents are queued; the ones they replace are deleted once
+        # the writes are confirmed (see settle)
+        if manifest is not None:
+            stale[record.key] = manifest.record(record.key, record.etag, sizes.get(record.key), uuids)
 
     @staticmethod
     def extract_name_from_content(content: str) -> str:
@@ -34,11 +246,35 @@ class WeaviateOperations:
         # For example, you might extract the first line as a name, or use a UUID
         return "ExtractedNameOrIdentifier"
         
-    def query_data(self, query):
+    def query_data(
+        self,
+        class_name: str = "MarkdownDocument",
+        properties: Optional[List[str]] = None,
+        where: Optional[dict] = None,
+        limit: Optional[int] = None,
+        vector: Optional[List[float]] = None,
+        text: Optional[str] = None,
+        bypass_cache: bool = False,
+    ):
         """
-        Query data from Weaviate.
+        Query data from Weaviate. `text` is embedded with the configured embedder and searched
+        as a vector. Results come from the query cache when one is set, unless `bypass_cache`.
         """
-        return self.client.query.get(query)
+        properties = properties or ["name", "content"]
+        if text is not None:
+            if self.embedder is None:
+                raise ValueError("Text queries need an embedder")
+            vector = self.embedder.embed_query(text).tolist()
+
+        query = compile_query(class_name, properties, where)
+
+        def run():
+            return query.execute(self.client, vector=vector, limit=limit)
+
+        if self.query_cache is None:
+            return run()
+        key = query_cache_key(class_name, properties, where, limit, vector)
+        return self.query_cache.get_or_load(class_name, key, run, bypass=bypass_cache)
 
     def update_document(self, uuid, update_properties):
         """
@@ -49,9 +285,41 @@ class WeaviateOperations:
             data_object=update_properties,
             class_name="MarkdownDocument"
         )
+        self._invalidate("MarkdownDocument")
 
     def delete_document(self, uuid):
         """
         Delete a document from Weaviate.
         """
-        self.client.data_object.delete(uuid, class_name="MarkdownDocument")
\ No newline at end of file
+        self.client.data_object.delete(uuid, class_name="MarkdownDocument")
+        self._invalidate("MarkdownDocument")
+
+    def delete_minio_object(self, key: str, manifest) -> int:
+        """
+        Delete every document indexed from the MinIO object `key` and drop it from the manifest.
+        """
+        deleted = self.delete_documents(manifest.forget(key))
+        manifest.save(force=False)
+        return deleted
+
+    def delete_documents(self, uuids: List[str]) -> int:
+        """
+        Delete several documents from Weaviate, ignoring ones that are already gone.
+        """
+        deleted = self._delete_uuids(uuids)
+        if deleted:
+            self._invalidate("MarkdownDocument")
+        return deleted
+
+    def _delete_uuids(self, uuids: List[str]) -> int:
+        # Indexing runs invalidate the query cache once per checkpoint instead of per delete.
+        # Batch deletes match on the ID, so objects that are already gone simply don't count.
+        deleted = 0
+        for start in range(0, len(uuids), DELETE_BATCH_SIZE):
+            result = self.client.batch.delete_objects(
+                "MarkdownDocument",
+                where={"path": ["id"], "operator": "ContainsAny", "valueTextArray": uuids[start:start + DELETE_BATCH_SIZE]},
+                output="minimal",
+            )
+            deleted += result["results"]["successful"]
+        return deleted
\ No newline at end of file
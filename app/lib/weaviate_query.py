@@ -0,0 +1,174 @@
+import json
+import re
+import threading
+import uuid as uuid_lib
+from collections import OrderedDict
+from typing import Iterator, List, Optional, Sequence
+
+from weaviate.gql.filter import NearVector, Where
+
+# Defaults for compiled queries; the page size is overridable per call.
+DEFAULT_PAGE_SIZE = 500
+DEFAULT_COMPILED_QUERIES = 256
+
+_NAME = re.compile(r"^[A-Za-z_][A-Za-z0-9_]*$")
+# Tokens of a property selection: names, braces and the `...` of inline fragments
+_SELECTION_TOKEN = re.compile(r"\.\.\.|[{}]|[A-Za-z_][A-Za-z0-9_]*|\S")
+
+
+class QueryError(Exception):
+    """Raised when Weaviate answers a query with GraphQL errors."""
+
+
+def _parse_field(tokens: List[str], i: int) -> int:
+    # NAME, or a reference: NAME { ... on Class { field+ } (... on Class { field+ })* }
+    # Returns the index after the field, or -1 if the tokens do not form one.
+    if i >= len(tokens) or not _NAME.match(tokens[i]):
+        return -1
+    i += 1
+    if i == len(tokens) or tokens[i] != "{":
+        return i
+    i += 1
+    fragments = 0
+    while i < len(tokens) and tokens[i] == "...":
+        if tokens[i + 1:i + 2] != ["on"] or not _NAME.match(tokens[i + 2] if i + 2 < len(tokens) else "") \
+                or tokens[i + 3:i + 4] != ["{"]:
+            return -1
+        i += 4
+        fields = 0
+        while i < len(tokens) and tokens[i] != "}":
+            i = _parse_field(tokens, i)
+            if i == -1:
+                return -1
+            fields += 1
+        if not fields or i == len(tokens):
+            return -1
+        i += 1
+        fragments += 1
+    if not fragments or i == len(tokens) or tokens[i] != "}":
+        return -1
+    return i + 1
+
+
+def _valid_property(selection: str) -> bool:
+    """
+    Whether `selection` is one property of a Get query: a name, or a cross-reference
+    with inline fragments such as `hasAuthor { ... on Author { name } }`.
+    """
+    tokens = _SELECTION_TOKEN.findall(selection)
+    return bool(tokens) and _parse_field(tokens, 0) == len(tokens)
+
+
+class CompiledQuery:
+    """
+    A Get query over one class, property selection and where filter, rendered once.
+    Executions only fill in the per-call parts: near vector, limit, offset and cursor.
+    """
+
+    def __init__(self, class_name: str, properties: Sequence[str], where: Optional[dict] = None,
+                 include_vector: bool = False):
+        if not _NAME.match(class_name):
+            raise ValueError(f"Invalid class name: {class_name!r}")
+        # Properties are pasted into the query text, so each must be a well-formed selection
+        for selection in properties:
+            if not isinstance(selection, str) or not _valid_property(selection):
+                raise ValueError(f"Invalid property: {selection!r}")
+        self.class_name = class_name
+        self.properties = list(properties)
+        self.where = where
+        self._where = str(Where(where)) if where else ""
+        self.include_vector = include_vector
+        self._selection = " ".join(self.properties) + (" _additional { id vector }" if include_vector else " _additional { id }")
+
+    def render(self, vector: Optional[Sequence[float]] = None, limit: Optional[int] = None,
+               offset: Optional[int] = None, after: Optional[str] = None) -> str:
+        arguments = self._where
+        if vector is not None:
+            arguments += str(NearVector({"vector": [float(value) for value in vector]}))
+        if limit:
+            arguments += f"limit: {int(limit)} "
+        if offset:
+            arguments += f"offset: {int(offset)} "
+        if after:
+            arguments += f'after: "{uuid_lib.UUID(str(after))}" '
+        arguments = f"({arguments.strip()})" if arguments else ""
+        return "{Get{%s%s{%s}}}" % (self.class_name, arguments, self._selection)
+
+    def execute(self, client, **arguments) -> dict:
+        """
+        Run the query; `arguments` are those of `render`. Returns the raw GraphQL response.
+        """
+        return client.query.raw(self.render(**arguments))
+
+    def objects(self, client, **arguments) -> List[dict]:
+        """
+        Run the query and return its objects, raising `QueryError` if Weaviate reported errors.
+        """
+        result = self.execute(client, **arguments)
+        if result.get("errors"):
+            raise QueryError("; ".join(error.get("message", "") for error in result["errors"]))
+        return ((result.get("data") or {}).get("Get") or {}).get(self.class_name) or []
+
+    def iter_objects(self, client, page_size: int = DEFAULT_PAGE_SIZE, vector: Optional[Sequence[float]] = None) -> Iterator[dict]:
+        """
+        Yield every matching object, one page in memory at a time.
+
+        Unfiltered queries walk the class with Weaviate's `after` cursor, which has no depth
+        limit. The cursor cannot be combined with filters or vector search, so those page
+        by offset and stop at the server's QUERY_MAXIMUM_RESULTS.
+        """
+        after = None
+        offset = 0
+        cursor = not self.where and vector is None
+        while True:
+            if cursor:
+                page = self.objects(client, limit=page_size, after=after)
+            else:
+                page = self.objects(client, vector=vector, limit=page_size, offset=offset)
+            yield from page
+            if len(page) < page_size:
+                return
+            after = page[-1]["_additional"]["id"]
+            offset += len(page)
+
+
+class QueryCompiler:
+    """
+    LRU cache of compiled queries keyed by their shape: class, property selection and filter.
+    """
+
+    def __init__(self, max_size: int = DEFAULT_COMPILED_QUERIES):
+        self.max_size = max_size
+        self.hits = 0
+        self.misses = 0
+        self._queries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def compile(self, class_name: str, properties: Sequence[str], where: Optional[dict] = None,
+                include_vector: bool = False) -> CompiledQuery:
+        key = (class_name, tuple(properties), json.dumps(where, sort_keys=True) if where else None, include_vector)
+        with self._lock:
+            query = self._queries.get(key)
+            if query is not None:
+                self._queries.move_to_end(key)
+                self.hits += 1
+                return query
+            self.misses += 1
+        query = CompiledQuery(class_name, properties, where, include_vector)
+        with self._lock:
+            self._queries[key] = query
+            while len(self._queries) > self.max_size:
+                self._queries.popitem(last=False)
+        return query
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {"compiled": len(self._queries), "hits": self.hits, "misses": self.misses}
+
+
+compiler = QueryCompiler()
+
+
+def compile_query(class_name: str, properties: Sequence[str], where: Optional[dict] = None,
+                  include_vector: bool = False) -> CompiledQuery:
+    return compiler.compile(class_name, properties, where, include_vector)
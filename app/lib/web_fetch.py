@@ -0,0 +1,393 @@
+import hashlib
+import io
+import json
+import logging
+import math
+import os
+import re
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from email.utils import parsedate_to_datetime
+from pathlib import Path
+from typing import Dict, List, NamedTuple, Optional, Sequence
+from urllib.parse import quote, urlsplit
+
+import httpx
+from bs4 import BeautifulSoup
+
+logger = logging.getLogger(__name__)
+
+# Defaults for the web fetcher; overridable per fetcher (see tool_config).
+DEFAULT_MAX_CONNECTIONS = 16
+DEFAULT_MAX_PER_HOST = 2
+DEFAULT_HOST_INTERVAL = 0.5
+DEFAULT_TIMEOUT = 20.0
+DEFAULT_USER_AGENT = "langchain-research-agent/1.0"
+# Longest a response without explicit freshness is reused without revalidating
+DEFAULT_HEURISTIC_MAX_AGE = 24 * 3600.0
+
+NETWORK = "network"
+FRESH = "cache"
+REVALIDATED = "revalidated"
+STALE = "stale"
+
+# Response headers a cache entry keeps: validators and freshness information
+_KEPT_HEADERS = ("etag", "last-modified", "cache-control", "expires", "date", "age", "content-type")
+_MAX_AGE = re.compile(r"(?:^|,)\s*max-age\s*=\s*\"?(\d+)", re.IGNORECASE)
+
+
+class WebPage(NamedTuple):
+    """One fetched page as scrape_webpages uses it, and where it came from."""
+    url: str
+    title: str
+    text: str
+    source: str
+    error: Optional[str] = None
+
+
+def _cache_directives(headers: Dict[str, str]) -> set:
+    return {part.strip().split("=", 1)[0].lower() for part in headers.get("cache-control", "").split(",") if part.strip()}
+
+
+def _http_date(value: Optional[str]) -> Optional[float]:
+    if not value:
+        return None
+    try:
+        return parsedate_to_datetime(value).timestamp()
+    except (TypeError, ValueError):
+        return None
+
+
+def freshness_lifetime(headers: Dict[str, str]) -> float:
+    """
+    Seconds a response stays fresh (RFC 9111 section 4.2.1, as a private cache): max-age,
+    else Expires minus Date, else a tenth of the time since Last-Modified, capped.
+    """
+    directives = _cache_directives(headers)
+    if "no-cache" in directives or "no-store" in directives:
+        return 0.0
+    match = _MAX_AGE.search(headers.get("cache-control", ""))
+    if match:
+        return float(match.group(1))
+    date = _http_date(headers.get("date"))
+    expires = _http_date(headers.get("expires"))
+    if "expires" in headers:
+        # An invalid Expires (often "0") means already expired
+        return max(0.0, expires - (date or time.time())) if expires is not None else 0.0
+    last_modified = _http_date(headers.get("last-modified"))
+    if last_modified is not None:
+        return min(DEFAULT_HEURISTIC_MAX_AGE, max(0.0, ((date or time.time()) - last_modified) / 10))
+    return 0.0
+
+
+class CacheEntry(NamedTuple):
+    url: str
+    headers: Dict[str, str]
+    stored_at: float
+    title: str
+    text: str
+
+    def age(self, now: float) -> float:
+        return now - self.stored_at + float(self.headers.get("age") or 0)
+
+    def fresh(self, now: float) -> bool:
+        return self.age(now) < freshness_lifetime(self.headers)
+
+    def validators(self) -> Dict[str, str]:
+        headers = {}
+        if "etag" in self.headers:
+            headers["If-None-Match"] = self.headers["etag"]
+        if "last-modified" in self.headers:
+            headers["If-Modified-Since"] = self.headers["last-modified"]
+        return headers
+
+
+class PageCache:
+    """
+    Parsed pages with the response headers that govern their reuse, one JSON file per
+    URL under `directory`. Only the parsed text is kept, not the HTML: a revalidated
+    page never needs parsing again.
+    """
+
+    def __init__(self, directory):
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+
+    def _path(self, url: str) -> Path:
+        return self.directory / (hashlib.sha256(url.encode("utf-8")).hexdigest() + ".json")
+
+    def get(self, url: str) -> Optional[CacheEntry]:
+        try:
+            with open(self._path(url), "r", encoding="utf-8") as f:
+                entry = CacheEntry(**json.load(f))
+        except (OSError, ValueError, TypeError):
+            return None
+        return entry if entry.url == url else None
+
+    def put(self, entry: CacheEntry):
+        path = self._path(entry.url)
+        temporary = path.with_name(f".{path.name}.{threading.get_ident()}")
+        with open(temporary, "w", encoding="utf-8") as f:
+            json.dump(entry._asdict(), f)
+        os.replace(temporary, path)
+
+    def delete(self, url: str):
+        self._path(url).unlink(missing_ok=True)
+
+
+class HostLimiter:
+    """
+    Politeness per host: at most `max_per_host` requests in flight to one host, and
+    request starts spaced at least `interval` seconds apart. A host that answers 429 or
+    503 with Retry-After gets nothing more until then.
+    """
+
+    def __init__(self, max_per_host: int = DEFAULT_MAX_PER_HOST, interval: float = DEFAULT_HOST_INTERVAL):
+        self.max_per_host = max_per_host
+        self.interval = interval
+        self._in_flight: Dict[str, int] = {}
+        self._next_start: Dict[str, float] = {}
+        self._releases = 0
+        self._cond = threading.Condition()
+
+    def _take(self, host: str) -> Optional[float]:
+        # Called with the lock held: None once the slot is taken, else how long to wait
+        # (math.inf until a request to the host finishes)
+        now = time.monotonic()
+        wait = self._next_start.get(host, 0.0) - now
+        if self._in_flight.get(host, 0) >= self.max_per_host:
+            return math.inf
+        if wait > 0:
+            return wait
+        self._in_flight[host] = self._in_flight.get(host, 0) + 1
+        self._next_start[host] = now + self.interval
+        return None
+
+    def acquire(self, host: str):
+        with self._cond:
+            while True:
+                wait = self._take(host)
+                if wait is None:
+                    return
+                self._cond.wait(None if wait == math.inf else wait)
+
+    def try_acquire(self, host: str) -> Optional[float]:
+        """
+        Take a slot for `host` without blocking. Returns None when it was taken, otherwise
+        the seconds until one may be (math.inf while the host is at `max_per_host`).
+        """
+        with self._cond:
+            return self._take(host)
+
+    @property
+    def releases(self) -> int:
+        with self._cond:
+            return self._releases
+
+    def wait_for_release(self, seen: int, timeout: Optional[float] = None):
+        """
+        Block until some slot is released after `releases` read `seen`, or `timeout` passes.
+        """
+        with self._cond:
+            self._cond.wait_for(lambda: self._releases != seen, None if timeout == math.inf else timeout)
+
+    def release(self, host: str, retry_after: Optional[float] = None):
+        with self._cond:
+            self._in_flight[host] -= 1
+            if not self._in_flight[host]:
+                del self._in_flight[host]
+            if retry_after:
+                self._next_start[host] = max(self._next_start.get(host, 0.0), time.monotonic() + retry_after)
+            self._releases += 1
+            self._cond.notify_all()
+
+
+def parse_page(html: str):
+    """
+    (title, text) of an HTML page, the way WebBaseLoader extracts them.
+    """
+    soup = BeautifulSoup(html, "html.parser")
+    title = soup.find("title")
+    return (title.get_text() if title else ""), soup.get_text()
+
+
+def _retry_after(response: httpx.Response) -> Optional[float]:
+    value = response.headers.get("retry-after")
+    if not value or response.status_code not in (429, 503):
+        return None
+    if value.strip().isdigit():
+        return float(value)
+    when = _http_date(value)
+    return max(0.0, when - time.time()) if when is not None else None
+
+
+class WebFetcher:
+    """
+    Fetches pages concurrently over one pooled HTTP client (`max_connections`), politely
+    per host (see HostLimiter), through a PageCache when `cache_dir` is given: fresh
+    entries are served without a request, stale ones are revalidated with
+    If-None-Match/If-Modified-Since, and a cached copy stands in when the network or the
+    server (5xx) fails.
+    With a MinIO `client` and `bucket_name`, the text of every newly fetched or changed
+    page is mirrored to `prefix<host>/<sha256 of url>.txt`.
+    """
+
+    def __init__(
+        self,
+        cache_dir=None,
+        max_connections: int = DEFAULT_MAX_CONNECTIONS,
+        max_per_host: int = DEFAULT_MAX_PER_HOST,
+        host_interval: float = DEFAULT_HOST_INTERVAL,
+        timeout: float = DEFAULT_TIMEOUT,
+        user_agent: str = DEFAULT_USER_AGENT,
+        client=None,
+        bucket_name: Optional[str] = None,
+        prefix: str = "web/",
+    ):
+        self.cache = PageCache(cache_dir) if cache_dir else None
+        self.hosts = HostLimiter(max_per_host, host_interval)
+        self.max_connections = max_connections
+        self.client = client
+        self.bucket_name = bucket_name
+        self.prefix = prefix
+        self.http = httpx.Client(
+            limits=httpx.Limits(max_connections=max_connections, max_keepalive_connections=max_connections),
+            timeout=timeout, follow_redirects=True, headers={"User-Agent": user_agent},
+        )
+        self._executor = ThreadPoolExecutor(max_connections, thread_name_prefix="web-fetch")
+        self._bucket_ready = False
+        self._lock = threading.Lock()
+        self.counts = {source: 0 for source in (NETWORK, FRESH, REVALIDATED, STALE)}
+        self.errors = 0
+        self.mirrored = 0
+
+    def fetch_many(self, urls: Sequence[str]) -> List[WebPage]:
+        """
+        Pages for `urls`, in the same order; each URL is fetched once however often it appears.
+        Fresh cached pages are served here; the rest wait in a queue per host and go to the
+        pool only once their host has a free slot, so a worker never sits out a host's
+        limit while other hosts have work.
+        """
+        unique = list(dict.fromkeys(urls))
+        pages: Dict[str, WebPage] = {}
+        queues: Dict[str, deque] = {}
+        for url in unique:
+            entry = self._cached(url)
+            if entry is not None and entry.fresh(time.time()):
+                pages[url] = self._counted(WebPage(url, entry.title, entry.text, FRESH))
+            else:
+                queues.setdefault(urlsplit(url).netloc, deque()).append((url, entry))
+
+        futures = {}
+        while queues:
+            seen = self.hosts.releases
+            wait = math.inf
+            for host in list(queues):
+                queue = queues[host]
+                while queue:
+                    delay = self.hosts.try_acquire(host)
+                    if delay is not None:
+                        wait = min(wait, delay)
+                        break
+                    url, entry = queue.popleft()
+                    futures[url] = self._executor.submit(self._fetch_acquired, url, host, entry)
+                if not queue:
+                    del queues[host]
+            if queues:
+                self.hosts.wait_for_release(seen, wait)
+        for url, future in futures.items():
+            pages[url] = future.result()
+        return [pages[url] for url in urls]
+
+    def fetch(self, url: str) -> WebPage:
+        entry = self._cached(url)
+        if entry is not None and entry.fresh(time.time()):
+            return self._counted(WebPage(url, entry.title, entry.text, FRESH))
+        host = urlsplit(url).netloc
+        self.hosts.acquire(host)
+        return self._fetch_acquired(url, host, entry)
+
+    def _cached(self, url: str) -> Optional[CacheEntry]:
+        return self.cache.get(url) if self.cache is not None else None
+
+    def _fetch_acquired(self, url: str, host: str, entry: Optional[CacheEntry]) -> WebPage:
+        # Runs holding a slot for `host`, which is released whatever happens
+        retry_after = None
+        try:
+            response = self.http.get(url, headers=entry.validators() if entry is not None else None)
+            retry_after = _retry_after(response)
+            if response.status_code == 304 and entry is not None:
+                page = WebPage(url, entry.title, entry.text, REVALIDATED)
+                # A 304 carries updated freshness information for the stored response
+                headers = dict(entry.headers, **self._kept(response))
+                self.cache.put(CacheEntry(url, headers, time.time(), entry.title, entry.text))
+                return self._counted(page)
+            response.raise_for_status()
+            title, text = parse_page(response.text)
+        except (httpx.HTTPError, httpx.InvalidURL) as e:
+            gone = isinstance(e, httpx.HTTPStatusError) and e.response.status_code < 500
+            if entry is not None and not gone:
+                logger.warning("Serving a stale copy of %s: %r", url, e)
+                return self._counted(WebPage(url, entry.title, entry.text, STALE))
+            with self._lock:
+                self.errors += 1
+            return WebPage(url, "", "", NETWORK, error=repr(e))
+        finally:
+            self.hosts.release(host, retry_after)
+
+        headers = self._kept(response)
+        if self.cache is not None:
+            if "no-store" in _cache_directives(headers):
+                self.cache.delete(url)
+            else:
+                self.cache.put(CacheEntry(url, headers, time.time(), title, text))
+        if entry is None or entry.text != text:
+            self._mirror(url, title, text)
+        return self._counted(WebPage(url, title, text, NETWORK))
+
+    @staticmethod
+    def _kept(response: httpx.Response) -> Dict[str, str]:
+        return {name: response.headers[name] for name in _KEPT_HEADERS if name in response.headers}
+
+    def _counted(self, page: WebPage) -> WebPage:
+        with self._lock:
+            self.counts[page.source] += 1
+        return page
+
+    def _mirror(self, url: str, title: str, text: str):
+        # Best effort: a MinIO failure costs the copy, never the page
+        if self.client is None or not self.bucket_name:
+            return
+        payload = text.encode("utf-8")
+        name = f"{self.prefix}{urlsplit(url).netloc}/{hashlib.sha256(url.encode('utf-8')).hexdigest()}.txt"
+        # Object metadata travels as HTTP headers, so it has to be ASCII
+        metadata = {"source-url": quote(url, safe=":/?&=#%"), "title": quote(title[:512])}
+        try:
+            if not self._bucket_ready:
+                if not self.client.bucket_exists(self.bucket_name):
+                    self.client.make_bucket(self.bucket_name)
+                self._bucket_ready = True
+            self.client.put_object(self.bucket_name, name, io.BytesIO(payload), length=len(payload),
+                                   content_type="text/plain; charset=utf-8", metadata=metadata)
+        except Exception:
+            logger.exception("Could not mirror %s to MinIO", url)
+            return
+        with self._lock:
+            self.mirrored += 1
+
+    def close(self):
+        self._executor.shutdown()
+        self.http.close()
+
+    def stats(self) -> dict:
+        with self._lock:
+            served = sum(self.counts.values())
+            return {
+                "pages": dict(self.counts),
+                "errors": self.errors,
+                "mirrored": self.mirrored,
+                # Pages served without downloading them again
+                "cache_hit_rate": (served - self.counts[NETWORK]) / served if served else 0.0,
+            }
@@ -1,45 +1,76 @@
 # main.py
 
-import sys
-import json
+from lib.startup import StartupProfile
+
+startup = StartupProfile()
+
+import os
+import threading
+from contextlib import asynccontextmanager
+from urllib.parse import unquote_plus
 from pydantic import BaseModel, Field
 from typing import Optional, List
-from fastapi import FastAPI, Request
-from langchain_openai import ChatOpenAI
-from langchain_community.llms import Ollama
+from fastapi import FastAPI, Header, HTTPException, Request
+from fastapi.responses import JSONResponse, Response
+from langserve import add_routes
 
-# Assuming LangChain core functionalities are similarly structured
-# For runnables, tools, and creating agents, adjust according to the new package structure
+# Model packages (langchain_openai, langchain_community, langchain_anthropic) are
+# imported by the model factories below, when each model is first needed
 from langchain_core.runnables import Runnable
+from langchain_core.globals import set_llm_cache
+from langchain_core.prompts import ChatPromptTemplate
 
-
-from langchain_core._api import deprecated
-from langchain_core.callbacks import BaseCallbackManager
-from langchain_core.language_models import BaseLanguageModel
-from langchain_core.prompts import PromptTemplate
-from langchain_core.pydantic_v1 import Field
-from langchain_core.tools import BaseTool
-
-from langchain.agents.agent import Agent, AgentOutputParser
-from langchain.agents.agent_types import AgentType
-from langchain.agents.conversational.output_parser import ConvoOutputParser
-from langchain.agents.conversational.prompt import FORMAT_INSTRUCTIONS, PREFIX, SUFFIX
-from langchain.agents.utils import validate_tools_single_input
-from langchain.chains import LLMChain
-
-# Example for creating an OpenAI functions agent, adjust the import based on actual package structure and naming
-from langchain.agents.openai_tools.base import create_openai_tools_agent
-# Adjust the imports based on your project structure
 from lib.config import app_config, langchain_config, llm_config, tool_config
 from lib.langchain_utils.MinioTool import MinioTool
 from lib.langchain_utils.WeaviateTool import WeaviateTool
 from lib.weaviate_operations import WeaviateOperations
-from lib.minio_operations import load_documents_from_minio
+from lib.minio_operations import MinioOperations
+from lib.index_manifest import IndexManifest, LocalManifestStore, MinioManifestStore
+from lib.event_queue import EventIngestQueue
+from lib.llm_cache import DiskLLMCache
+from lib.clients import registry as client_registry
+from lib.async_operations import AsyncWeaviateOperations, BlockingCallExecutor
+from lib.jobs import JobManager
+from lib.embeddings import get_embedder
+from lib.query_cache import MinioQueryCacheBackend, QueryCache
+from lib.weaviate_query import compiler as query_compiler
+from lib.agents.router import router_stats
+from lib.metrics import CONTENT_TYPE as METRICS_CONTENT_TYPE, llm_metrics, metrics
+from lib.models import ModelUnavailable, registry as model_registry
+from lib.rate_limit import AsyncRateLimitedTransport, RateLimitedTransport, RateLimiter
+
+startup.mark("imports")
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Built here rather than at import, so importing the app needs no running services
+    global runnable, query_ops
+    runnable = setup_document_processing_runnable()
+    query_ops = AsyncWeaviateOperations(runnable.weaviate_ops, query_executor)
+    model_registry.warm_up(llm_config.MODEL_WARMUP)
+    ingest_queue.start()
+    # Creates the checkpoint directory, then restarts jobs a previous run left unfinished
+    job_manager.resume()
+    startup.ready()
+    yield
+    ingest_queue.stop(tool_config.EVENT_QUEUE_STOP_TIMEOUT)
+    job_manager.shutdown()
+    query_executor.shutdown()
+    runnable.save_manifests()
+    client_registry.close()
 
 app = FastAPI(
     title="Cdaprod AI API Gateway",
     version="1.0",
     description="An api server using Langchain's Runnable interfaces",
+    lifespan=lifespan,
+)
+
+client_registry.configure(
+    pool_size=tool_config.CLIENT_POOL_SIZE,
+    connect_timeout=tool_config.CLIENT_CONNECT_TIMEOUT,
+    read_timeout=tool_config.CLIENT_READ_TIMEOUT,
+    retries=tool_config.CLIENT_RETRIES,
 )
 
 # Weaviate and MinIO connection details, ensure these are correctly configured
@@ -49,7 +80,86 @@ MINIO_ACCESS_KEY = "minio"
 MINIO_SECRET_KEY = "minio123"
 MINIO_BUCKET = "langchain-bucket"
 
-llama = Ollama(model="llama2")
+# Relative data paths in the configs (LLM cache, manifests, job checkpoints) resolve
+# here, under app/data by default, wherever the server was started from
+APP_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# Every model in the process (the indexing LLM and the /openai and /llama2 routes)
+# answers repeated prompts from this cache
+llm_cache = None
+if llm_config.LLM_CACHE_ENABLED:
+    llm_cache = DiskLLMCache(
+        os.path.join(APP_DIR, llm_config.LLM_CACHE_PATH),
+        max_entries=llm_config.LLM_CACHE_MAX_ENTRIES,
+        max_bytes=llm_config.LLM_CACHE_MAX_BYTES,
+        client=MinioOperations(MINIO_ENDPOINT, MINIO_ACCESS_KEY, MINIO_SECRET_KEY).client if llm_config.LLM_CACHE_BUCKET else None,
+        bucket_name=llm_config.LLM_CACHE_BUCKET or None,
+    )
+    set_llm_cache(llm_cache)
+
+# /query results, dropped whenever updates, deletes or indexing touch their class
+query_cache = None
+if tool_config.QUERY_CACHE_ENABLED:
+    query_cache = QueryCache(
+        max_entries=tool_config.QUERY_CACHE_MAX_ENTRIES,
+        ttl=tool_config.QUERY_CACHE_TTL,
+        backend=MinioQueryCacheBackend(
+            MinioOperations(MINIO_ENDPOINT, MINIO_ACCESS_KEY, MINIO_SECRET_KEY).client, tool_config.QUERY_CACHE_BUCKET
+        ) if tool_config.QUERY_CACHE_BUCKET else None,
+    )
+
+# Models are built by these factories on first use (or by the startup warm-up), so an
+# unreachable backend only fails the routes that need it
+model_registry.retry_interval = llm_config.MODEL_RETRY_INTERVAL
+
+# Shared by every document-processing call, so concurrent indexing runs stay within
+# the account's rate limits together
+indexing_rate_limiter = RateLimiter(
+    requests_per_minute=llm_config.LLM_REQUESTS_PER_MINUTE,
+    tokens_per_minute=llm_config.LLM_TOKENS_PER_MINUTE,
+    max_concurrency=llm_config.LLM_MAX_CONCURRENCY,
+)
+
+def _indexing_llm():
+    import httpx
+    from langchain_openai import ChatOpenAI
+    # Retries happen in the transports, which know about the limiter and Retry-After
+    return ChatOpenAI(
+        api_key=llm_config.OPENAI_API_KEY,
+        callbacks=[llm_metrics],
+        max_retries=0,
+        http_client=httpx.Client(transport=RateLimitedTransport(
+            indexing_rate_limiter, max_retries=llm_config.LLM_MAX_RETRIES)),
+        http_async_client=httpx.AsyncClient(transport=AsyncRateLimitedTransport(
+            indexing_rate_limiter, max_retries=llm_config.LLM_MAX_RETRIES)),
+    )
+
+def _openai_llm():
+    from langchain_openai import ChatOpenAI
+    return ChatOpenAI(callbacks=[llm_metrics])
+
+def _llama2_llm():
+    from langchain_community.llms import Ollama
+    return Ollama(model="llama2", callbacks=[llm_metrics])
+
+def _anthropic_llm():
+    from langchain_anthropic import ChatAnthropic
+    return ChatAnthropic(callbacks=[llm_metrics])
+
+model_registry.register("indexing", _indexing_llm)
+model_registry.register("openai", _openai_llm)
+model_registry.register("llama2", _llama2_llm, output_type=str)
+model_registry.register("anthropic", _anthropic_llm)
+
+startup.mark("caches and models")
+
+class QueryRequest(BaseModel):
+    class_name: str = "MarkdownDocument"
+    properties: List[str] = ["name", "content"]
+    where: Optional[dict] = None
+    limit: Optional[int] = None
+    vector: Optional[List[float]] = None
+    text: Optional[str] = None
 
 class MinioEvent(BaseModel):
     eventName: str
@@ -83,23 +193,127 @@ class MinioFile(BaseModel):
 
 class DocumentProcessingRunnable(Runnable):
     def __init__(self, minio_tool, weaviate_tool):
-        self.llm = ChatOpenAI(api_key=llm_config.API_KEY)
-        self.weaviate_ops = WeaviateOperations(weaviate_tool.config['url'])
+        self.llm = model_registry.lazy("indexing")
+        self.weaviate_ops = WeaviateOperations(
+            weaviate_tool.config['url'],
+            embedder=get_embedder(tool_config.EMBEDDING_BACKEND, **tool_config.embedding_model_options),
+            embedding_options={"batch_size": tool_config.EMBEDDING_BATCH_SIZE, "workers": tool_config.EMBEDDING_WORKERS},
+            query_cache=query_cache,
+        )
         self.bucket_name = MINIO_BUCKET
-        self.minio_ops = lambda: load_documents_from_minio(self.bucket_name, minio_tool.config['endpoint'], minio_tool.config['access_key'], minio_tool.config['secret_key'])
+        self.minio_ops = MinioOperations(minio_tool.config['endpoint'], minio_tool.config['access_key'], minio_tool.config['secret_key'])
+        self.manifests = {}
+        self._manifests_lock = threading.Lock()
+        self.stream_options = {
+            "max_workers": tool_config.MINIO_MAX_WORKERS,
+            "prefetch": tool_config.MINIO_PREFETCH_DEPTH,
+            "max_buffered_bytes": tool_config.MINIO_MAX_BUFFERED_BYTES,
+        }
+        self.writer_options = {
+            "batch_size": tool_config.WEAVIATE_BATCH_SIZE,
+            "min_batch_size": tool_config.WEAVIATE_MIN_BATCH_SIZE,
+            "max_batch_size": tool_config.WEAVIATE_MAX_BATCH_SIZE,
+            "target_latency": tool_config.WEAVIATE_BATCH_TARGET_LATENCY,
+            "flush_interval": tool_config.WEAVIATE_BATCH_FLUSH_INTERVAL,
+        }
+        self.chunk_options = None
+        if tool_config.CHUNKING_ENABLED:
+            self.chunk_options = {
+                "chunk_tokens": tool_config.CHUNK_TOKENS,
+                "overlap_tokens": tool_config.CHUNK_OVERLAP_TOKENS,
+                "range_bytes": tool_config.CHUNK_RANGE_BYTES,
+            }
+
+    def manifest_for(self, bucket_name):
+        """
+        The incremental indexing manifest of one bucket, loaded on first use.
+        """
+        with self._manifests_lock:
+            manifest = self.manifests.get(bucket_name)
+            if manifest is None:
+                if tool_config.INDEX_MANIFEST_BUCKET:
+                    manifest_store = MinioManifestStore(self.minio_ops.client, tool_config.INDEX_MANIFEST_BUCKET,
+                                                        tool_config.INDEX_MANIFEST_OBJECT.format(bucket=bucket_name))
+                else:
+                    manifest_store = LocalManifestStore(
+                        os.path.join(APP_DIR, tool_config.INDEX_MANIFEST_PATH.format(bucket=bucket_name)))
+                manifest = IndexManifest(manifest_store, save_interval=tool_config.INDEX_MANIFEST_SAVE_INTERVAL)
+                self.manifests[bucket_name] = manifest
+            return manifest
+
+    def save_manifests(self):
+        with self._manifests_lock:
+            manifests = list(self.manifests.values())
+        for manifest in manifests:
+            manifest.save()
+
+    def index_options(self, bucket=None, **overrides):
+        bucket = bucket or self.bucket_name
+        options = dict(
+            minio_ops=self.minio_ops,
+            bucket=bucket,
+            manifest=self.manifest_for(bucket),
+            process=self.process_and_name,
+            process_batch=self.process_batch,
+            process_batch_size=llm_config.LLM_PROCESS_BATCH_SIZE,
+            stream_options=self.stream_options,
+            writer_options=self.writer_options,
+            chunk_options=self.chunk_options,
+        )
+        options.update(overrides)
+        return options
 
     def run(self, _):
-        documents = self.minio_ops()
-
-        for doc in documents:
-            processed_doc = self.process_document(doc)
-            doc_name = self.extract_document_name(processed_doc)
-            self.weaviate_ops.index_document(self.bucket_name, doc_name, processed_doc)
+        return self.weaviate_ops.index_minio_objects(**self.index_options())
+
+    def invoke(self, input, config=None):
+        return self.run(input)
+
+    def run_job(self, job):
+        """
+        Index `job.bucket`, resuming after the job's last checkpointed key.
+        """
+        return self.weaviate_ops.index_minio_objects(
+            **self.index_options(bucket=job.bucket, start_after=job.last_key, progress=job)
+        )
+
+    def handle_event(self, event_name, bucket_name, object_key):
+        """
+        Apply one bucket notification: removals delete the object's documents, anything
+        else (re)indexes the object if it changed.
+        """
+        if event_name.startswith("s3:ObjectRemoved:"):
+            self.weaviate_ops.delete_minio_object(object_key, self.manifest_for(bucket_name))
+            return
+        self.weaviate_ops.index_minio_objects(
+            **self.index_options(bucket=bucket_name, objects=[self.minio_ops.client.stat_object(bucket_name, object_key)])
+        )
+
+    def process_and_name(self, document):
+        processed_doc = self.process_document(document)
+        return self.extract_document_name(processed_doc), processed_doc
 
     def process_document(self, document):
         prompt = f"Process this document: {document}"
-        response = self.llm.complete(prompt=prompt)
-        return response
+        response = self.llm.invoke(prompt)
+        return response.content
+
+    def process_batch(self, documents):
+        """
+        Process documents concurrently through the model's batch path; the rate limiter
+        decides how many requests are actually in flight. Failed documents come back as
+        their exception.
+        """
+        responses = self.llm.batch(
+            [f"Process this document: {document}" for document in documents],
+            config={"max_concurrency": indexing_rate_limiter.max_concurrency},
+            return_exceptions=True,
+        )
+        return [
+            response if isinstance(response, Exception)
+            else (self.extract_document_name(response.content), response.content)
+            for response in responses
+        ]
 
     def extract_document_name(self, document):
         return "ExtractedDocumentName"
@@ -111,33 +325,73 @@ def initialize_tools():
     minio_tool = MinioTool(minio_url=tool_config.MINIO_ENDPOINT,
                            access_key=tool_config.MINIO_ACCESS_KEY,
                            secret_key=tool_config.MINIO_SECRET_KEY,
-                           secure=False)  # Set secure=True if using HTTPS
+                           secure=False,  # Set secure=True if using HTTPS
+                           part_size=tool_config.MINIO_TRANSFER_PART_SIZE,
+                           parallelism=tool_config.MINIO_TRANSFER_PARALLELISM)
     weaviate_tool = WeaviateTool(tool_config.WEAVIATE_ENDPOINT, tool_config.WEAVIATE_API_KEY)
     return minio_tool, weaviate_tool
 
-# def setup_document_processing_runnable():
-#     """
-#     Setup DocumentProcessingRunnable with MinioTool and WeaviateTool.
-#     """
-#     minio_tool, weaviate_tool = initialize_tools()
-#     runnable = DocumentProcessingRunnable(minio_tool, weaviate_tool)
-#     return runnable
+def setup_document_processing_runnable():
+    """
+    Setup DocumentProcessingRunnable with MinioTool and WeaviateTool.
+    """
+    minio_tool, weaviate_tool = initialize_tools()
+    runnable = DocumentProcessingRunnable(minio_tool, weaviate_tool)
+    return runnable
+
+# Both are set up by lifespan when the app starts
+runnable = None
+query_ops = None
+
+# Queries, updates and deletes run here, apart from ingestion, so their latency
+# stays flat while an indexing run is in progress
+query_executor = BlockingCallExecutor(tool_config.QUERY_EXECUTOR_WORKERS, "weaviate-query")
+
+# Bucket indexing runs as background jobs; at most INDEX_JOB_CONCURRENCY run at once,
+# on their own threads, so they never take the threads serving queries
+job_manager = JobManager(
+    lambda job: runnable.run_job(job),
+    os.path.join(APP_DIR, tool_config.INDEX_JOB_CHECKPOINT_DIR),
+    max_concurrent=tool_config.INDEX_JOB_CONCURRENCY,
+    checkpoint_interval=tool_config.INDEX_JOB_CHECKPOINT_INTERVAL,
+)
+
+ingest_queue = EventIngestQueue(
+    lambda event_name, bucket_name, object_key: runnable.handle_event(event_name, bucket_name, object_key),
+    max_size=tool_config.EVENT_QUEUE_MAX_SIZE,
+    workers=tool_config.EVENT_QUEUE_WORKERS,
+    coalesce_window=tool_config.EVENT_COALESCE_WINDOW,
+)
 
-# runnable = setup_document_processing_runnable()
+# Request metrics are recorded by the pooled clients and the LLM callback; these
+# expose the existing stats as gauges on /metrics, read at scrape time
+metrics.register_stats("app_client_pool", "Connection pool utilization (see /clients/stats).", client_registry.stats)
+metrics.register_stats("app_query_executor", "Query executor threads and queue.", query_executor.stats)
+metrics.register_stats("app_index_jobs", "Background index jobs.", job_manager.stats)
+metrics.register_stats("app_ingest_queue", "MinIO event ingestion queue.", ingest_queue.metrics)
+metrics.register_stats("app_models", "Models by build status.", model_registry.stats)
+metrics.register_stats("app_llm_rate_limit", "Document-processing LLM rate limiter.", indexing_rate_limiter.stats)
+metrics.register_stats("app_router", "Agent supervisor routing: decisions by tier and classifier checks.", router_stats)
+if query_cache is not None:
+    metrics.register_stats("app_query_cache", "/query result cache.", query_cache.stats)
+if llm_cache is not None:
+    metrics.register_stats("app_llm_cache", "LLM response cache.", llm_cache.stats)
+
+startup.mark("operations and executors")
 
 add_routes(
     app,
-    ChatOpenAI(),
+    model_registry.lazy("openai"),
     path="/openai",
 )
 
 add_routes(
     app,
-    llama(),
+    model_registry.lazy("llama2"),
     path="/llama2",
 )
 
-model = ChatAnthropic()
+model = model_registry.lazy("anthropic")
 prompt = ChatPromptTemplate.from_template("Fetch")
 add_routes(
     app,
@@ -145,47 +399,114 @@ add_routes(
     path="/joke",
 )
 
+startup.mark("routes")
+
+@app.exception_handler(ModelUnavailable)
+async def model_unavailable(request: Request, exc: ModelUnavailable):
+    return JSONResponse(status_code=503, content={"detail": str(exc)},
+                        headers={"Retry-After": str(max(1, int(exc.retry_after)))})
+
 @app.get("/")
 async def root():
     return {"message": "LangChain-Weaviate-MinIO Integration Service"}
 
-@app.post("/index_from_minio")
-async def index_from_minio():
-    runnable.run(None)
-    return {"status": "Indexing complete"}
+@app.post("/index_from_minio", status_code=202)
+async def index_from_minio(bucket: Optional[str] = None):
+    # Returns at once; poll /jobs/{job_id} for progress
+    job = job_manager.submit(bucket or runnable.bucket_name)
+    return job.to_dict()
+
+@app.get("/jobs")
+async def list_jobs():
+    return [job.to_dict() for job in job_manager.list()]
+
+@app.get("/jobs/{job_id}")
+async def get_job(job_id: str):
+    job = job_manager.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job.to_dict()
+
+@app.delete("/jobs/{job_id}")
+async def cancel_job(job_id: str):
+    job = job_manager.cancel(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job.to_dict()
 
 @app.post("/query")
-async def query_weaviate(query: str):
-    return runnable.weaviate_ops.query_data(query)
+async def query_weaviate(query: QueryRequest, cache_control: Optional[str] = Header(None)):
+    # "Cache-Control: no-cache" skips the cached result and refreshes it
+    bypass_cache = cache_control is not None and "no-cache" in cache_control.lower()
+    try:
+        return await query_ops.query_data(
+            class_name=query.class_name,
+            properties=query.properties,
+            where=query.where,
+            limit=query.limit,
+            vector=query.vector,
+            text=query.text,
+            bypass_cache=bypass_cache,
+        )
+    except ValueError as e:
+        # A malformed class name, property selection or filter
+        raise HTTPException(status_code=400, detail=str(e))
 
 @app.post("/update/{uuid}")
 async def update_document(uuid: str, update_properties: dict):
-    runnable.weaviate_ops.update_document(uuid, update_properties)
+    await query_ops.update_document(uuid, update_properties)
     return {"status": "Document updated"}
 
 @app.delete("/delete/{uuid}")
 async def delete_document(uuid: str):
-    runnable.weaviate_ops.delete_document(uuid)
+    await query_ops.delete_document(uuid)
     return {"status": "Document deleted"}
     
 # Existing setup for LangChain, LangServe, and Weaviate...
 
 
 
-@app.post("/minio-event")
+@app.post("/minio-event", status_code=202)
 async def handle_minio_event(event: MinioEvent):
-    # Process the MinIO event and extract relevant data
+    # Acknowledge immediately; fetching, LLM processing and indexing happen on the ingest workers
     bucket_name = event.bucket["name"]
-    object_key = event.object["key"]
-    object_size = event.object["size"]
-    content_type = event.object.get("contentType", "application/octet-stream")
-    
-    # Here you can add logic to process the event further, for example:
-    # - Retrieve the object content from MinIO if necessary
-    # - Use LangChain to generate a summary or tags based on the content
-    # - Index the object data into Weaviate
-    
-    return {"message": "Event processed successfully"}
+    object_key = unquote_plus(event.object["key"])
+
+    if not ingest_queue.submit(event.eventName, bucket_name, object_key):
+        raise HTTPException(status_code=429, detail="Event queue is full", headers={"Retry-After": "1"})
+    return {"message": "Event queued"}
+
+@app.get("/health")
+async def health():
+    return await query_executor.run(client_registry.health)
+
+@app.get("/clients/stats")
+async def client_stats():
+    return {
+        **client_registry.stats(),
+        "executors": {"query": query_executor.stats(), "index_jobs": job_manager.stats()},
+    }
+
+@app.get("/llm-cache/stats")
+async def llm_cache_stats():
+    return llm_cache.stats() if llm_cache else {"enabled": False}
+
+@app.get("/query-cache/stats")
+async def query_cache_stats():
+    stats = query_cache.stats() if query_cache else {"enabled": False}
+    return {**stats, "compiled_queries": query_compiler.stats()}
+
+@app.get("/startup")
+async def startup_report():
+    return {**startup.report(), "models": model_registry.stats()["models"]}
+
+@app.get("/metrics")
+async def prometheus_metrics():
+    return Response(metrics.render(), media_type=METRICS_CONTENT_TYPE)
+
+@app.get("/minio-event/metrics")
+async def minio_event_metrics():
+    return ingest_queue.metrics()
 
 if __name__ == "__main__":
     import uvicorn
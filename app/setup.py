@@ -21,8 +21,12 @@ setup(
         'uvicorn',
         'requests',  # Assuming you're using requests in your application
         'langchain',  # Add specific version if needed
-        'weaviate-client',  # Add specific version if needed
-        'minio',  # Add specific version if needed
+        'langchain-openai>=0.1.7',  # ChatOpenAI's http_client/http_async_client
+        'httpx>=0.27',
+        'langgraph>=0.0.40',  # add_edge from a list of nodes
+        'weaviate-client>=3.26,<4',  # v3 API; lib/weaviate_batch.py and lib/clients.py use its internals
+        'minio>=7.2,<7.3',  # lib/transfers.py uses its private multipart calls
+        'numpy',
         # ... any other dependencies ...
     ],
     classifiers=[
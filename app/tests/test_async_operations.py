@@ -0,0 +1,113 @@
+import asyncio
+import importlib
+import statistics
+import threading
+import time
+
+import httpx
+import pytest
+
+from bench.fake_s3 import FakeS3Server
+from bench.fake_weaviate import FakeWeaviateServer
+from lib.async_operations import BlockingCallExecutor
+from lib.config import llm_config, tool_config
+
+BUCKETS = ["ingest-a", "ingest-b", "ingest-c", "ingest-d"]
+# Per batch of documents: a slow model, so every job thread stays busy for seconds
+PROCESS_SECONDS = 0.5
+
+
+def test_shutdown_without_wait_drops_calls_that_have_not_started():
+    executor = BlockingCallExecutor(1, "test")
+    started = threading.Event()
+    release = threading.Event()
+    ran = []
+
+    def blocker():
+        started.set()
+        release.wait(5)
+
+    async def scenario():
+        first = asyncio.ensure_future(executor.run(blocker))
+        queued = [asyncio.ensure_future(executor.run(ran.append, i)) for i in range(5)]
+        await asyncio.get_running_loop().run_in_executor(None, started.wait, 5)
+        assert executor.stats()["queued"] == 5
+        executor.shutdown(wait=False)
+        release.set()
+        await first
+        results = await asyncio.gather(*queued, return_exceptions=True)
+        assert all(isinstance(result, asyncio.CancelledError) for result in results)
+
+    asyncio.run(scenario())
+    assert ran == []
+    assert executor.stats()["queued"] == 0
+
+
+@pytest.fixture
+def app(tmp_path, monkeypatch):
+    s3, weaviate = FakeS3Server(), FakeWeaviateServer()
+    s3.start()
+    weaviate.start()
+    for bucket in BUCKETS:
+        for i in range(40):
+            s3.put(bucket, f"doc-{i:03d}.md", f"# Document {i}\n\n".encode("utf-8") + b"text " * 200)
+    monkeypatch.setattr(llm_config, "LLM_CACHE_ENABLED", False)
+    monkeypatch.setattr(llm_config, "LLM_PROCESS_BATCH_SIZE", 4)
+    monkeypatch.setattr(tool_config, "CHUNKING_ENABLED", False)
+    monkeypatch.setattr(tool_config, "INDEX_MANIFEST_PATH", str(tmp_path / "index-manifest-{bucket}.json"))
+    monkeypatch.setattr(tool_config, "INDEX_JOB_CHECKPOINT_DIR", str(tmp_path / "index-jobs"))
+    monkeypatch.setattr(tool_config, "MINIO_ENDPOINT", s3.endpoint)
+    monkeypatch.setattr(tool_config, "MINIO_ACCESS_KEY", "test")
+    monkeypatch.setattr(tool_config, "MINIO_SECRET_KEY", "test-secret")
+    monkeypatch.setattr(tool_config, "WEAVIATE_ENDPOINT", weaviate.url)
+    monkeypatch.setattr(tool_config, "EMBEDDING_BACKEND", "hashing")
+    monkeypatch.setattr(tool_config, "embedding_model_options", {"dimensions": 64})
+    main = importlib.import_module("main")
+    yield main
+    s3.stop()
+    weaviate.stop()
+
+
+def slow_process_batch(documents):
+    time.sleep(PROCESS_SECONDS)
+    return [("name", document) for document in documents]
+
+
+async def query_latencies(client, count: int):
+    latencies = []
+    for _ in range(count):
+        started = time.perf_counter()
+        response = await client.post("/query", json={"limit": 5})
+        latencies.append(time.perf_counter() - started)
+        assert response.status_code == 200
+    return latencies
+
+
+def test_query_latency_stays_flat_during_slow_ingest(app):
+    async def scenario():
+        async with app.lifespan(app.app):
+            app.runnable.process_batch = slow_process_batch
+            transport = httpx.ASGITransport(app=app.app)
+            async with httpx.AsyncClient(transport=transport, base_url="http://app") as client:
+                idle = await query_latencies(client, 20)
+
+                jobs = []
+                for bucket in BUCKETS:
+                    response = await client.post("/index_from_minio", params={"bucket": bucket})
+                    assert response.status_code == 202
+                    jobs.append(response.json()["id"])
+                # Let every job thread pick up work before measuring
+                await asyncio.sleep(PROCESS_SECONDS / 2)
+                busy = await query_latencies(client, 20)
+
+                statuses = [(await client.get(f"/jobs/{job_id}")).json()["status"] for job_id in jobs]
+                for job_id in jobs:
+                    await client.delete(f"/jobs/{job_id}")
+        return idle, busy, statuses
+
+    idle, busy, statuses = asyncio.run(scenario())
+    # The ingest was still going on while the queries ran ...
+    assert statuses.count("running") >= min(len(BUCKETS), tool_config.INDEX_JOB_CONCURRENCY)
+    # ... and never made a query wait for one of its batches
+    assert max(busy) < PROCESS_SECONDS / 2
+    assert statistics.median(busy) < statistics.median(idle) * 3 + 0.02
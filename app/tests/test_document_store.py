@@ -0,0 +1,96 @@
+import random
+
+import pytest
+
+from bench.fake_s3 import FakeS3Server
+from lib.clients import get_minio_client
+from lib.document_store import EDIT_LOG_SUFFIX, DocumentStore
+
+TEXT = "".join(f"line {i}\n" for i in range(1, 21))
+
+
+def random_inserts(rng, lines, count):
+    # Valid (line_number, text) inserts, and the lines they should leave
+    inserts = []
+    for i in range(count):
+        line_number = rng.randint(1, len(lines) + 1)
+        inserts.append((line_number, f"insert {i}"))
+        lines.insert(line_number - 1, f"insert {i}\n")
+    return inserts
+
+
+@pytest.fixture
+def open_store():
+    stores = []
+
+    def open_store(*args, **kwargs):
+        stores.append(DocumentStore(*args, **kwargs))
+        return stores[-1]
+    yield open_store
+    for store in stores:
+        store.close()
+
+
+def test_inserts_and_reads_match_a_list_of_lines(tmp_path, open_store):
+    store = open_store(tmp_path)
+    store.write("notes.md", TEXT)
+    rng = random.Random(0)
+    lines = TEXT.splitlines(keepends=True)
+    for _ in range(10):
+        assert store.insert("notes.md", random_inserts(rng, lines, 5)) is None
+
+    assert store.read("notes.md") == lines
+    assert store.line_count("notes.md") == 70
+    for start, end in [(0, 1), (3, 17), (-5, None), (40, 200), (12, 12)]:
+        assert store.read("notes.md", start, end) == lines[start:end]
+    # The file itself is untouched until compaction
+    assert (tmp_path / "notes.md").read_text() == TEXT
+
+
+def test_out_of_range_inserts_change_nothing(tmp_path, open_store):
+    store = open_store(tmp_path)
+    store.write("notes.md", "one\ntwo\n")
+    # The second insert would be valid after the first, the third never is
+    assert store.insert("notes.md", [(3, "three"), (4, "four"), (9, "nine")]) == 9
+    assert store.read("notes.md") == ["one\n", "two\n"]
+    assert not (tmp_path / ("notes.md" + EDIT_LOG_SUFFIX)).exists()
+
+
+@pytest.fixture
+def minio_client():
+    with FakeS3Server() as s3:
+        client = get_minio_client(s3.endpoint, "test", "test-secret")
+        client.make_bucket("documents")
+        yield client
+
+
+def test_another_replica_replays_the_edit_log_from_minio(tmp_path, minio_client, open_store):
+    store = open_store(tmp_path / "first", minio_client, "documents")
+    store.write("notes.md", TEXT)
+    lines = TEXT.splitlines(keepends=True)
+    store.insert("notes.md", random_inserts(random.Random(1), lines, 8))
+
+    replica = open_store(tmp_path / "second", minio_client, "documents")
+    assert replica.read("notes.md") == lines
+    assert (tmp_path / "second" / "notes.md").read_text() == TEXT
+
+
+def test_too_many_pieces_compact_the_document(tmp_path, minio_client, open_store):
+    store = open_store(tmp_path / "first", minio_client, "documents", max_pieces=8)
+    store.write("notes.md", TEXT)
+    lines = TEXT.splitlines(keepends=True)
+    # Three inserts into the middle of the file split it into seven pieces
+    middle = [(5, "a"), (10, "b"), (15, "c")]
+    assert store.insert("notes.md", middle) is None
+    for line_number, text in middle:
+        lines.insert(line_number - 1, text + "\n")
+    log = tmp_path / "first" / ("notes.md" + EDIT_LOG_SUFFIX)
+    assert log.exists()
+
+    store.insert("notes.md", random_inserts(random.Random(2), lines, 6))
+    assert not log.exists()
+    assert (tmp_path / "first" / "notes.md").read_text() == "".join(lines)
+    assert store.read("notes.md") == lines
+
+    replica = open_store(tmp_path / "second", minio_client, "documents")
+    assert replica.read("notes.md") == lines
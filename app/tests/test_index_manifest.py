@@ -0,0 +1,66 @@
+from types import SimpleNamespace
+
+import pytest
+
+from bench.scenarios import BUCKET, SIZES, BenchEnvironment
+from lib.index_manifest import IndexManifest, LocalManifestStore
+
+
+def listing(**objects):
+    return [SimpleNamespace(object_name=key, etag=etag, size=size) for key, (etag, size) in objects.items()]
+
+
+def test_diff_finds_new_changed_and_deleted_objects(tmp_path):
+    manifest = IndexManifest(LocalManifestStore(str(tmp_path / "manifest.json")))
+    for key, etag, size in [("same", "e1", 10), ("edited", "e1", 10), ("resized", "e1", 10), ("gone", "e1", 10)]:
+        manifest.record(key, etag, size, [f"{key}-uuid"])
+
+    diff = manifest.diff(listing(same=("e1", 10), edited=("e2", 10), resized=("e1", 11), new=("e1", 1)))
+    assert sorted(obj.object_name for obj in diff.changed) == ["edited", "new", "resized"]
+    assert diff.deleted == ["gone"]
+    assert diff.unchanged == 1
+
+    # A partial listing says nothing about the keys it leaves out
+    assert manifest.diff(listing(same=("e1", 10)), detect_deletions=False).deleted == []
+
+
+def test_record_returns_the_objects_it_replaces_and_save_persists(tmp_path):
+    path = str(tmp_path / "manifest.json")
+    manifest = IndexManifest(LocalManifestStore(path))
+    assert manifest.record("doc", "e1", 10, ["a", "b", "c"]) == []
+    assert manifest.record("doc", "e2", 5, ["a"]) == ["b", "c"]
+    manifest.retry("doc", ["d"])
+    manifest.save()
+
+    reloaded = IndexManifest(LocalManifestStore(path))
+    assert reloaded.entries == {"doc": {"etag": None, "size": None, "uuids": ["a", "d"]}}
+    # A key marked for retry is indexed again whatever its listing says
+    assert len(reloaded.diff(listing(doc=("e2", 5))).changed) == 1
+    assert reloaded.forget("doc") == ["a", "d"]
+
+
+@pytest.fixture
+def env():
+    with BenchEnvironment({**SIZES["small"], "documents": 6}) as env:
+        yield env
+
+
+def test_reindexing_only_touches_changed_objects(env):
+    ops = env.weaviate_ops()
+    manifest = env.manifest("incremental")
+    process = lambda content: (content.split("\n", 1)[0], content)
+
+    first = ops.index_minio_objects(env.minio_ops, BUCKET, manifest=manifest, process=process)
+    assert (first["indexed"], first["unchanged"]) == (6, 0)
+    assert ops.index_minio_objects(env.minio_ops, BUCKET, manifest=manifest, process=process)["unchanged"] == 6
+
+    edited, removed = sorted(env.s3.buckets[BUCKET])[:2]
+    env.s3.put(BUCKET, edited, b"# Edited\n\nnew text")
+    del env.s3.buckets[BUCKET][removed]
+    result = ops.index_minio_objects(env.minio_ops, BUCKET, manifest=manifest, process=process)
+
+    assert (result["indexed"], result["unchanged"], result["deleted"]) == (1, 4, 1)
+    assert env.weaviate.count("MarkdownDocument") == 5
+    assert removed not in manifest.entries
+    contents = [obj["properties"]["content"] for obj in env.weaviate.collections["MarkdownDocument"].objects.values()]
+    assert "# Edited\n\nnew text" in contents
@@ -0,0 +1,78 @@
+import json
+import threading
+import time
+
+from lib.jobs import COMPLETED, PENDING, JobManager
+
+KEYS = [f"doc-{i:02d}" for i in range(10)]
+
+
+class Runner:
+    """
+    Indexes KEYS after `job.last_key`, checkpointing after every key; with `stop_after`,
+    it parks after that key until the job is cancelled.
+    """
+
+    def __init__(self, stop_after=None):
+        self.stop_after = stop_after
+        self.indexed = []
+        self.parked = threading.Event()
+
+    def __call__(self, job):
+        start = KEYS.index(job.last_key) + 1 if job.last_key else 0
+        job.begin(len(KEYS) - start)
+        for key in KEYS[start:]:
+            if job.cancelled():
+                break
+            self.indexed.append(key)
+            job.object_done(key, lambda: 0)
+            if key == self.stop_after:
+                self.parked.set()
+                while not job.cancelled():
+                    time.sleep(0.01)
+        return {"failed": 0}
+
+
+def wait_for(condition, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline
+        time.sleep(0.01)
+
+
+def test_job_interrupted_by_shutdown_resumes_after_its_checkpoint(tmp_path):
+    checkpoints = tmp_path / "index-jobs"
+    first = Runner(stop_after="doc-03")
+    manager = JobManager(first, str(checkpoints), checkpoint_interval=0.0)
+    manager.resume()
+    job = manager.submit("bucket")
+    assert first.parked.wait(5)
+    manager.shutdown()
+
+    state = json.loads((checkpoints / f"{job.id}.json").read_text())
+    assert (state["status"], state["last_key"], state["processed"]) == (PENDING, "doc-03", 4)
+
+    second = Runner()
+    restarted = JobManager(second, str(checkpoints), checkpoint_interval=0.0)
+    [resumed] = restarted.resume()
+    wait_for(lambda: resumed.status == COMPLETED)
+    restarted.shutdown()
+    assert second.indexed == KEYS[4:]
+    assert resumed.to_dict()["processed"] == len(KEYS)
+
+
+def test_finished_jobs_are_not_run_again(tmp_path):
+    checkpoints = str(tmp_path / "index-jobs")
+    runner = Runner()
+    manager = JobManager(runner, checkpoints)
+    manager.resume()
+    job = manager.submit("bucket")
+    wait_for(lambda: job.status == COMPLETED)
+    manager.shutdown()
+
+    again = Runner()
+    restarted = JobManager(again, checkpoints)
+    assert restarted.resume() == []
+    assert restarted.get(job.id).status == COMPLETED
+    restarted.shutdown()
+    assert again.indexed == []
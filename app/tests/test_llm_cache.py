@@ -0,0 +1,67 @@
+from langchain_core.outputs import Generation
+
+from bench.fake_s3 import FakeS3Server
+from lib.clients import get_minio_client
+from lib.llm_cache import DiskLLMCache
+
+LLM = "ChatOpenAI model=gpt-4 temperature=0"
+
+
+def answer(text):
+    return [Generation(text=text)]
+
+
+def test_responses_are_reused_per_model_and_prompt_across_restarts(tmp_path):
+    path = str(tmp_path / "data" / "llm-cache.sqlite")
+    cache = DiskLLMCache(path)
+    assert cache.lookup("prompt", LLM) is None
+    cache.update("prompt", LLM, answer("cached"))
+
+    assert cache.lookup("prompt", LLM) == answer("cached")
+    assert cache.lookup("prompt", LLM + " temperature=1") is None
+    assert cache.lookup("other prompt", LLM) is None
+
+    reopened = DiskLLMCache(path)
+    assert reopened.lookup("prompt", LLM) == answer("cached")
+    assert reopened.stats()["entries"] == 1
+
+
+def test_least_recently_used_entries_are_evicted(tmp_path):
+    cache = DiskLLMCache(str(tmp_path / "llm-cache.sqlite"), max_entries=2)
+    cache.update("a", LLM, answer("a"))
+    cache.update("b", LLM, answer("b"))
+    cache.lookup("a", LLM)
+    cache.update("c", LLM, answer("c"))
+
+    assert [cache.lookup(prompt, LLM) is not None for prompt in "abc"] == [True, False, True]
+    assert cache.stats()["evictions"] == 1
+
+
+def test_replicas_share_entries_through_minio(tmp_path):
+    with FakeS3Server() as s3:
+        client = get_minio_client(s3.endpoint, "test", "test-secret")
+        client.make_bucket("llm-cache")
+        first = DiskLLMCache(str(tmp_path / "first.sqlite"), client=client, bucket_name="llm-cache")
+        second = DiskLLMCache(str(tmp_path / "second.sqlite"), client=client, bucket_name="llm-cache")
+        first.update("prompt", LLM, answer("shared"))
+
+        assert second.lookup("prompt", LLM) == answer("shared")
+        assert second.stats()["remote_hits"] == 1
+        # Now held locally as well
+        s3.buckets["llm-cache"].clear()
+        assert second.lookup("prompt", LLM) == answer("shared")
+
+
+def test_minio_failures_fall_back_to_the_local_cache(tmp_path):
+    class BrokenMinio:
+        def get_object(self, *args, **kwargs):
+            raise ConnectionError("minio is down")
+
+        put_object = get_object
+
+    cache = DiskLLMCache(str(tmp_path / "llm-cache.sqlite"), client=BrokenMinio(), bucket_name="llm-cache")
+    assert cache.lookup("prompt", LLM) is None
+    cache.update("prompt", LLM, answer("local"))
+
+    assert cache.lookup("prompt", LLM) == answer("local")
+    assert cache.stats()["remote_errors"] == 2
@@ -0,0 +1,115 @@
+import pytest
+
+from bench.fake_s3 import FakeS3Server
+from bench.scenarios import SIZES, BenchEnvironment
+from lib.clients import get_minio_client
+from lib.query_cache import MinioQueryCacheBackend, QueryCache, query_cache_key
+
+KEY = query_cache_key("MarkdownDocument", ["name"], limit=10)
+OTHER_CLASS_KEY = query_cache_key("Note", ["name"], limit=10)
+
+
+class Loader:
+    def __init__(self, value):
+        self.value = value
+        self.calls = 0
+
+    def __call__(self):
+        self.calls += 1
+        return self.value
+
+
+def test_keys_ignore_property_and_operand_order():
+    where = lambda *operands: {"operator": "And", "operands": list(operands)}
+    first = {"path": ["name"], "operator": "Equal", "valueText": "a"}
+    second = {"path": ["size"], "operator": "GreaterThan", "valueInt": 1}
+    assert (query_cache_key("MarkdownDocument", ["name", "content"], where(first, second))
+            == query_cache_key("MarkdownDocument", ["content", "name"], where(second, first)))
+    assert query_cache_key("MarkdownDocument", ["name"], limit=1) != query_cache_key("MarkdownDocument", ["name"], limit=2)
+
+
+def test_invalidation_drops_only_the_written_class():
+    cache = QueryCache()
+    load = Loader({"data": "old"})
+    cache.get_or_load("MarkdownDocument", KEY, load)
+    cache.get_or_load("Note", OTHER_CLASS_KEY, load)
+    cache.invalidate("MarkdownDocument")
+
+    load.value = {"data": "new"}
+    assert cache.get_or_load("MarkdownDocument", KEY, load) == {"data": "new"}
+    assert cache.get_or_load("Note", OTHER_CLASS_KEY, load) == {"data": "old"}
+    assert load.calls == 3
+
+
+def test_results_of_a_query_racing_a_write_are_not_stored():
+    cache = QueryCache()
+
+    def load_during_write():
+        cache.invalidate("MarkdownDocument")
+        return {"data": "pre-write"}
+
+    assert cache.get_or_load("MarkdownDocument", KEY, load_during_write) == {"data": "pre-write"}
+    assert cache.stats()["entries"] == 0
+
+
+def test_error_responses_are_not_cached():
+    cache = QueryCache()
+    load = Loader({"errors": [{"message": "no such class"}]})
+    cache.get_or_load("MarkdownDocument", KEY, load)
+    cache.get_or_load("MarkdownDocument", KEY, load)
+    assert load.calls == 2
+
+
+@pytest.fixture
+def s3():
+    with FakeS3Server() as s3:
+        yield s3
+
+
+def test_replicas_share_results_and_invalidations_through_minio(s3):
+    client = get_minio_client(s3.endpoint, "test", "test-secret")
+    client.make_bucket("query-cache")
+    first = QueryCache(backend=MinioQueryCacheBackend(client, "query-cache"))
+    second = QueryCache(backend=MinioQueryCacheBackend(client, "query-cache"))
+    first.get_or_load("MarkdownDocument", KEY, Loader({"data": "shared"}))
+
+    load = Loader({"data": "reloaded"})
+    assert second.get_or_load("MarkdownDocument", KEY, load) == {"data": "shared"}
+    assert (load.calls, second.stats()["shared_hits"]) == (0, 1)
+
+    first.invalidate("MarkdownDocument")
+    assert s3.buckets["query-cache"] == {}
+    third = QueryCache(backend=MinioQueryCacheBackend(client, "query-cache"))
+    assert third.get_or_load("MarkdownDocument", KEY, load) == {"data": "reloaded"}
+
+
+def test_minio_failures_degrade_to_the_local_cache():
+    class BrokenMinio:
+        def get_object(self, *args, **kwargs):
+            raise ConnectionError("minio is down")
+
+        put_object = list_objects = get_object
+
+    cache = QueryCache(backend=MinioQueryCacheBackend(BrokenMinio(), "query-cache"))
+    load = Loader({"data": "local"})
+    cache.get_or_load("MarkdownDocument", KEY, load)
+    cache.invalidate("MarkdownDocument")
+    cache.get_or_load("MarkdownDocument", KEY, load)
+    cache.get_or_load("MarkdownDocument", KEY, load)
+
+    assert load.calls == 2
+    # Two failed reads, two failed writes and the failed invalidation
+    assert cache.stats()["backend_errors"] == 5
+
+
+def test_writes_through_weaviate_operations_invalidate_cached_queries():
+    with BenchEnvironment({**SIZES["small"], "documents": 4}) as env:
+        env.index_corpus()
+        cache = QueryCache()
+        ops = env.weaviate_ops(query_cache=cache)
+        names = lambda: [doc["name"] for doc in ops.query_data(properties=["name"])["data"]["Get"]["MarkdownDocument"]]
+
+        assert names() == names()
+        assert cache.stats()["hits"] == 1
+        ops.index_document("bucket", "new.md", "# New\n\ntext")
+        assert len(names()) == 5
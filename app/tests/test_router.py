@@ -0,0 +1,98 @@
+import time
+
+from langchain_core.messages import HumanMessage
+from langchain_core.runnables import RunnableLambda
+
+from lib.agents.router import (
+    CACHE, CLASSIFIER, DEFAULT_MIN_SHADOW_CHECKS, LLM, RULE, TieredRouter, handoff_rule, mention_rule,
+)
+
+OPTIONS = ["Researcher", "Coder", "FINISH"]
+TOPICS = ["weaviate", "minio", "python", "numpy", "llamas", "rivers"]
+
+
+class LLMRouter:
+    """
+    Routes web searches to the Researcher and the rest to the Coder, or the other way
+    round once `flipped`; counts its calls.
+    """
+
+    def __init__(self):
+        self.calls = 0
+        self.flipped = False
+
+    def __call__(self, state):
+        self.calls += 1
+        research = "search" in state["messages"][-1].content
+        return {"next": "Researcher" if research != self.flipped else "Coder"}
+
+
+def state(text, name=None):
+    return {"messages": [HumanMessage(content=text, name=name)]}
+
+
+def search(topic):
+    return state(f"please search the web for news about {topic}")
+
+
+def code(topic):
+    return state(f"please write code that sorts a list of {topic}")
+
+
+def make_router(llm, **options):
+    options = {"rules": [], "min_route_examples": 5, "shadow_rate": 0.0, **options}
+    return TieredRouter(RunnableLambda(llm), OPTIONS, **options)
+
+
+def test_rules_and_the_memo_answer_without_the_llm():
+    llm = LLMRouter()
+    router = make_router(llm, rules=[mention_rule(OPTIONS), handoff_rule({"Researcher": "Coder"})])
+    decisions = [router.route(state("over to you @coder")), router.route(state("done", name="Researcher"))]
+    assert [(decision.route, decision.tier) for decision in decisions] == [("Coder", RULE), ("Coder", RULE)]
+    assert router.route(search("llamas")).tier == LLM
+    assert router.route(search("llamas")).tier == CACHE
+    assert llm.calls == 1
+
+
+def test_classifier_is_used_only_once_its_route_has_enough_examples():
+    llm = LLMRouter()
+    router = make_router(llm)
+    for topic in TOPICS[:4]:
+        router.route(search(topic))
+        router.route(code(topic))
+    # Four examples per route: still too few
+    assert router.route(search(TOPICS[4])).tier == LLM
+    router.route(code(TOPICS[4]))
+
+    decisions = [router.route(search(TOPICS[5])), router.route(code(TOPICS[5]))]
+    assert [(decision.route, decision.tier) for decision in decisions] == [("Researcher", CLASSIFIER), ("Coder", CLASSIFIER)]
+    assert llm.calls == 10
+
+
+def wait_for_shadow_check(router):
+    while router._shadow_pending:
+        time.sleep(0.01)
+
+
+def test_classifier_is_distrusted_while_checks_disagree_with_the_llm():
+    llm = LLMRouter()
+    # Every classifier answer counts, however unsure, so every decision is checked
+    router = make_router(llm, shadow_rate=1.0, min_confidence=0.0, min_margin=-2.0)
+    for topic in TOPICS[:5]:
+        router.route(search(topic))
+        router.route(code(topic))
+
+    llm.flipped = True
+    tiers = []
+    while router.classifier_trusted():
+        tiers.append(router.route(search(f"topic {len(tiers)}")).tier)
+        wait_for_shadow_check(router)
+    assert tiers == [CLASSIFIER] * DEFAULT_MIN_SHADOW_CHECKS
+    assert router.stats()["disagreements"] > router.max_disagreement * DEFAULT_MIN_SHADOW_CHECKS
+
+    # The LLM decides, and is compared with the classifier, until enough checks agree again
+    while not router.classifier_trusted():
+        decision = router.route(search(f"topic {len(tiers)}"))
+        tiers.append(decision.tier)
+        assert (decision.route, decision.tier) == ("Coder", LLM)
+    assert router.route(search("volcanoes")).tier == CLASSIFIER
@@ -0,0 +1,110 @@
+import os
+
+import pytest
+import urllib3
+from minio import Minio
+
+from bench.fake_s3 import FakeS3Server
+from lib.transfers import DOWNLOAD_STATE_SUFFIX, MIN_PART_SIZE, UPLOAD_STATE_SUFFIX, ParallelTransfer
+
+BUCKET = "transfers"
+SIZE = 2 * MIN_PART_SIZE + 12345
+
+
+class FlakyS3Server(FakeS3Server):
+    """
+    Answers 500 to uploads of the part numbers in `fail_parts` and to ranged GETs starting
+    at the offsets in `fail_ranges`, for as long as they are listed.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self.fail_parts = set()
+        self.fail_ranges = set()
+
+    def handle(self, request):
+        if request.command == "PUT" and "partNumber=" in request.path:
+            number = int(request.path.split("partNumber=")[1].split("&")[0])
+            if number in self.fail_parts:
+                return 500, {"Content-Type": "text/plain"}, b"part lost"
+        byte_range = request.headers.get("Range")
+        if request.command == "GET" and byte_range:
+            if int(byte_range.split("=")[1].split("-")[0]) in self.fail_ranges:
+                return 500, {"Content-Type": "text/plain"}, b"range lost"
+        return super().handle(request)
+
+
+@pytest.fixture
+def s3():
+    with FlakyS3Server() as s3:
+        s3.buckets[BUCKET] = {}
+        yield s3
+
+
+@pytest.fixture
+def transfer(s3):
+    # No transport retries, so a failed part fails the transfer
+    client = Minio(s3.endpoint, "test", "test-secret", secure=False, http_client=urllib3.PoolManager(retries=False))
+    return ParallelTransfer(client, part_size=MIN_PART_SIZE, parallelism=1, part_retries=0)
+
+
+@pytest.fixture
+def payload(tmp_path):
+    data = os.urandom(SIZE)
+    path = tmp_path / "upload.bin"
+    path.write_bytes(data)
+    return str(path), data
+
+
+def test_interrupted_upload_resumes_with_the_missing_parts(s3, transfer, payload):
+    path, data = payload
+    s3.fail_parts = {3}
+    with pytest.raises(Exception):
+        transfer.upload_file(BUCKET, "object.bin", path)
+    assert os.path.exists(path + UPLOAD_STATE_SUFFIX)
+    assert "object.bin" not in s3.buckets[BUCKET]
+
+    s3.fail_parts = set()
+    result = transfer.upload_file(BUCKET, "object.bin", path)
+    assert (result["parts"], result["resumed_parts"]) == (3, 2)
+    assert s3.buckets[BUCKET]["object.bin"].data == data
+    assert not os.path.exists(path + UPLOAD_STATE_SUFFIX)
+
+
+def test_interrupted_download_resumes_and_is_verified(s3, transfer, payload, tmp_path):
+    path, data = payload
+    transfer.upload_file(BUCKET, "object.bin", path)
+    target = str(tmp_path / "download.bin")
+    s3.fail_ranges = {2 * MIN_PART_SIZE}
+    with pytest.raises(Exception):
+        transfer.download_file(BUCKET, "object.bin", target)
+    assert os.path.exists(target + DOWNLOAD_STATE_SUFFIX)
+
+    s3.fail_ranges = set()
+    result = transfer.download_file(BUCKET, "object.bin", target)
+    assert (result["parts"], result["resumed_parts"]) == (3, 2)
+    assert result["sha256"] is not None
+    with open(target, "rb") as f:
+        assert f.read() == data
+    assert not os.path.exists(target + DOWNLOAD_STATE_SUFFIX)
+
+
+def test_small_file_upload_is_retried(s3, payload, tmp_path):
+    attempts = []
+    handle = s3.handle
+
+    def fail_first_put(request):
+        if request.command == "PUT" and not attempts:
+            attempts.append(request.path)
+            return 500, {"Content-Type": "text/plain"}, b"try again"
+        return handle(request)
+
+    s3.handle = fail_first_put
+    client = Minio(s3.endpoint, "test", "test-secret", secure=False, http_client=urllib3.PoolManager(retries=False))
+    path = tmp_path / "small.txt"
+    path.write_bytes(b"small file")
+
+    result = ParallelTransfer(client, part_retries=1).upload_file(BUCKET, "small.txt", str(path))
+    assert result["parts"] == 1
+    assert s3.buckets[BUCKET]["small.txt"].data == b"small file"
+    assert len(attempts) == 1
@@ -0,0 +1,98 @@
+import json
+
+import pytest
+import weaviate
+
+from bench.fake_weaviate import FakeWeaviateServer
+from lib.weaviate_batch import AdaptiveBatchWriter, document_uuid
+
+
+class FlakyWeaviateServer(FakeWeaviateServer):
+    """
+    Fails the next `fail_batches` batch writes with a 500 and rejects, per object, every
+    object whose `reject` property is set. Records the size of every batch it receives.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self.fail_batches = 0
+        self.batch_sizes = []
+
+    def handle(self, request):
+        if request.command == "POST" and request.path.startswith("/v1/batch/objects"):
+            objects = json.loads(request.body)["objects"]
+            with self._lock:
+                self.batch_sizes.append(len(objects))
+                if self.fail_batches:
+                    self.fail_batches -= 1
+                    return self._json(500, {"error": [{"message": "overloaded"}]})
+            results = []
+            for obj in objects:
+                if obj["properties"].get("reject"):
+                    results.append({"class": obj["class"], "id": obj["id"],
+                                    "result": {"errors": {"error": [{"message": "invalid object"}]}}})
+                else:
+                    results.append(self._write(obj))
+            return self._json(200, results)
+        return super().handle(request)
+
+
+@pytest.fixture
+def server():
+    with FlakyWeaviateServer() as server:
+        yield server
+
+
+@pytest.fixture
+def client(server):
+    return weaviate.Client(server.url, startup_period=None)
+
+
+def test_full_buffers_are_sent_as_batches_of_the_current_size(server, client):
+    with AdaptiveBatchWriter(client, batch_size=10, min_batch_size=10, max_batch_size=10, flush_interval=0) as writer:
+        for i in range(25):
+            writer.add({"name": f"doc-{i}"}, "MarkdownDocument", uuid=document_uuid("bucket", f"doc-{i}"))
+
+    assert server.batch_sizes == [10, 10, 5]
+    assert (writer.succeeded, writer.failed, writer.errors) == (25, 0, [])
+    assert server.count("MarkdownDocument") == 25
+
+
+def test_writing_an_id_again_replaces_the_object(server, client):
+    uuid = document_uuid("bucket", "doc")
+    with AdaptiveBatchWriter(client, flush_interval=0) as writer:
+        writer.add({"name": "first"}, "MarkdownDocument", uuid=uuid)
+        writer.add({"name": "buffered"}, "MarkdownDocument", uuid=uuid)
+    with AdaptiveBatchWriter(client, flush_interval=0) as writer:
+        writer.add({"name": "second"}, "MarkdownDocument", uuid=uuid)
+
+    assert server.batch_sizes == [1, 1]
+    assert server.collections["MarkdownDocument"].objects[uuid]["properties"] == {"name": "second"}
+
+
+def test_failed_request_fails_its_objects_and_halves_the_batch_size(server, client):
+    server.fail_batches = 1
+    writer = AdaptiveBatchWriter(client, batch_size=40, min_batch_size=10, flush_interval=0)
+    for i in range(40):
+        writer.add({"name": f"doc-{i}"}, "MarkdownDocument", uuid=document_uuid("bucket", f"doc-{i}"))
+
+    assert len(writer.errors) == 40
+    assert writer.batch_size == 20
+    # The failed objects can be written again, now in smaller batches
+    for error in writer.errors:
+        writer.add({"name": "retried"}, error.class_name, uuid=error.uuid)
+    writer.close()
+    assert server.batch_sizes == [40, 20, 20]
+    assert (writer.succeeded, writer.failed) == (40, 40)
+    assert server.count("MarkdownDocument") == 40
+
+
+def test_rejected_objects_are_reported_without_failing_the_batch(server, client):
+    failed = []
+    with AdaptiveBatchWriter(client, flush_interval=0, on_error=failed.extend) as writer:
+        kept = writer.add({"name": "kept"}, "MarkdownDocument")
+        rejected = writer.add({"name": "rejected", "reject": True}, "MarkdownDocument")
+
+    assert [(error.uuid, error.message) for error in failed] == [(rejected, "invalid object")]
+    assert (writer.succeeded, writer.failed) == (1, 1)
+    assert list(server.collections["MarkdownDocument"].objects) == [kept]
@@ -0,0 +1,74 @@
+import json
+
+import pytest
+import weaviate
+
+from bench.fake_s3 import FakeS3Server
+from bench.fake_weaviate import FakeWeaviateServer
+from lib.clients import get_minio_client
+from lib.weaviate_batch import document_uuid
+from lib.weaviate_export import export_class, import_class
+
+SCHEMA = {
+    "class": "Note",
+    "properties": [
+        {"name": "title", "dataType": ["text"]},
+        {"name": "words", "dataType": ["int"]},
+    ],
+}
+
+
+@pytest.fixture
+def source():
+    with FakeWeaviateServer() as server:
+        client = weaviate.Client(server.url, startup_period=None)
+        client.schema.create_class(SCHEMA)
+        for i in range(25):
+            client.data_object.create({"title": f"note {i}", "words": i}, "Note",
+                                      uuid=document_uuid("notes", str(i)), vector=[float(i), 1.0, 0.5])
+        yield server, client
+
+
+@pytest.fixture
+def target():
+    with FakeWeaviateServer() as server:
+        client = weaviate.Client(server.url, startup_period=None)
+        client.schema.create_class(SCHEMA)
+        yield server, client
+
+
+def objects(server):
+    return {uuid: (obj["properties"], obj["vector"]) for uuid, obj in server.collections["Note"].objects.items()}
+
+
+def test_export_and_import_round_trip_ids_properties_and_vectors(source, target, tmp_path):
+    (source_server, source_client), (target_server, target_client) = source, target
+    exported = export_class(source_client, "Note", str(tmp_path), shard_size=10, page_size=7)
+    assert (exported["objects"], exported["shards"]) == (25, 3)
+    manifest = json.loads((tmp_path / "Note.manifest.json").read_text())
+    assert manifest["properties"] == ["title", "words"]
+    assert [shard["objects"] for shard in manifest["shards"]] == [10, 10, 5]
+
+    imported = import_class(target_client, "Note", directory=str(tmp_path), workers=2)
+    assert (imported["imported"], imported["failed"], imported["shards"]) == (25, 0, 3)
+    assert objects(target_server) == objects(source_server)
+
+    # Importing again overwrites rather than duplicates
+    import_class(target_client, "Note", directory=str(tmp_path))
+    assert target_server.count("Note") == 25
+
+
+def test_export_and_import_through_minio(source, target, tmp_path):
+    (source_server, source_client), (target_server, target_client) = source, target
+    with FakeS3Server() as s3:
+        minio_client = get_minio_client(s3.endpoint, "test", "test-secret")
+        minio_client.make_bucket("exports")
+        export_class(source_client, "Note", str(tmp_path / "export"), shard_size=10,
+                     minio_client=minio_client, bucket_name="exports", prefix="notes/")
+        assert sorted(s3.buckets["exports"]) == [
+            "notes/Note-00000.jsonl.gz", "notes/Note-00001.jsonl.gz", "notes/Note-00002.jsonl.gz", "notes/Note.manifest.json"]
+        # Uploaded shards are not kept locally
+        assert list((tmp_path / "export").iterdir()) == []
+
+        import_class(target_client, "Note", minio_client=minio_client, bucket_name="exports", prefix="notes/")
+    assert objects(target_server) == objects(source_server)
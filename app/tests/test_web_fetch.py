@@ -0,0 +1,164 @@
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from lib.web_fetch import FRESH, NETWORK, REVALIDATED, STALE, WebFetcher
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self):
+        site = self.server.site
+        with site.lock:
+            site.requests.append((self.path, dict(self.headers), time.monotonic()))
+            site.in_flight += 1
+            site.max_in_flight = max(site.max_in_flight, site.in_flight)
+            status, headers, body = site.pages[self.path]
+        try:
+            if site.delay:
+                time.sleep(site.delay)
+            if status == 200 and "ETag" in headers and self.headers.get("If-None-Match") == headers["ETag"]:
+                status, body = 304, b""
+            self.send_response(status)
+            for name, value in headers.items():
+                self.send_header(name, value)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+        finally:
+            with site.lock:
+                site.in_flight -= 1
+
+    def log_message(self, format, *args):
+        pass
+
+
+class Site:
+    """
+    A local http.server serving `pages` ({path: (status, headers, body)}) that records
+    every request and the most requests it ever had in flight at once.
+    """
+
+    def __init__(self, delay: float = 0.0):
+        self.delay = delay
+        self.pages = {}
+        self.requests = []
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.lock = threading.Lock()
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), _Handler)
+        self.server.daemon_threads = True
+        self.server.site = self
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+    def put(self, path, text, status=200, **headers):
+        body = f"<html><head><title>{path}</title></head><body>{text}</body></html>".encode("utf-8")
+        headers = {"Content-Type": "text/html; charset=utf-8", **{k.replace("_", "-"): v for k, v in headers.items()}}
+        self.pages[path] = (status, headers, body)
+
+    def url(self, path):
+        return f"http://127.0.0.1:{self.server.server_address[1]}{path}"
+
+    def close(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+@pytest.fixture
+def site():
+    site = Site()
+    yield site
+    site.close()
+
+
+@pytest.fixture
+def fetcher(tmp_path):
+    fetcher = WebFetcher(tmp_path / "cache", host_interval=0.0)
+    yield fetcher
+    fetcher.close()
+
+
+def test_stale_page_is_revalidated_with_its_etag(site, fetcher):
+    site.put("/a", "first", ETag='"v1"', Cache_Control="max-age=0")
+    assert fetcher.fetch(site.url("/a")).source == NETWORK
+
+    page = fetcher.fetch(site.url("/a"))
+    assert (page.source, page.title) == (REVALIDATED, "/a")
+    assert "first" in page.text
+    assert site.requests[-1][1].get("If-None-Match") == '"v1"'
+
+
+def test_fresh_page_is_served_without_a_request(site, fetcher):
+    site.put("/a", "first", Cache_Control="max-age=60")
+    fetcher.fetch(site.url("/a"))
+    site.put("/a", "second", Cache_Control="max-age=60")
+
+    page = fetcher.fetch(site.url("/a"))
+    assert page.source == FRESH
+    assert "first" in page.text
+    assert len(site.requests) == 1
+
+
+def test_no_store_page_is_not_cached(site, fetcher, tmp_path):
+    site.put("/a", "first", ETag='"v1"', Cache_Control="no-store")
+    fetcher.fetch(site.url("/a"))
+
+    assert fetcher.fetch(site.url("/a")).source == NETWORK
+    assert len(site.requests) == 2
+    assert "If-None-Match" not in site.requests[-1][1]
+    assert not list((tmp_path / "cache").iterdir())
+
+
+def test_cached_copy_stands_in_for_a_server_error(site, fetcher):
+    site.put("/a", "first", Cache_Control="max-age=0")
+    fetcher.fetch(site.url("/a"))
+    site.put("/a", "broken", status=503)
+
+    page = fetcher.fetch(site.url("/a"))
+    assert (page.source, page.error) == (STALE, None)
+    assert "first" in page.text
+
+    # Without a cached copy the error comes back
+    site.put("/b", "broken", status=500)
+    assert fetcher.fetch(site.url("/b")).error is not None
+
+
+def test_busy_host_neither_exceeds_its_limit_nor_starves_others(tmp_path):
+    slow, quick = Site(delay=0.2), Site()
+    fetcher = WebFetcher(tmp_path / "cache", max_connections=4, max_per_host=2, host_interval=0.0)
+    try:
+        slow_urls = [slow.url(f"/{i}") for i in range(16)]
+        quick_urls = [quick.url(f"/{i}") for i in range(4)]
+        for i in range(16):
+            slow.put(f"/{i}", "text")
+        for i in range(4):
+            quick.put(f"/{i}", "text")
+        started = time.monotonic()
+        pages = fetcher.fetch_many(slow_urls + quick_urls)
+
+        assert [page.error for page in pages] == [None] * 20
+        assert slow.max_in_flight == 2
+        # The slow host takes 16 / 2 * 0.2s; the other host is served alongside it
+        assert max(at for _, _, at in quick.requests) - started < 0.5
+    finally:
+        fetcher.close()
+        slow.close()
+        quick.close()
+
+
+def test_mirror_failures_do_not_fail_the_fetch(site, tmp_path):
+    class BrokenMinio:
+        def bucket_exists(self, bucket_name):
+            raise ConnectionError("minio is down")
+
+    fetcher = WebFetcher(tmp_path / "cache", host_interval=0.0, client=BrokenMinio(), bucket_name="web")
+    try:
+        site.put("/a", "first")
+        pages = fetcher.fetch_many([site.url("/a")])
+        assert (pages[0].source, pages[0].error) == (NETWORK, None)
+        assert fetcher.stats()["mirrored"] == 0
+    finally:
+        fetcher.close()
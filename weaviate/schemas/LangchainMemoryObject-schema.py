@@ -1,16 +1,12 @@
 langchain_memory_object_schema = {
     "class": "LangchainMemoryObject",
     "description": "A flexible schema for storing various types of memory objects related to Langchain activities.",
+    "vectorizer": "none",  # vectors are supplied with each object by the app
     "properties": [
-        {
-            "name": "id",
-            "dataType": ["string"],
-            "description": "A unique identifier for the memory object."
-        },
         {
             "name": "content",
-            "dataType": ["blob", "text"],
-            "description": "The primary content of the memory object, supporting both binary and text data."
+            "dataType": ["text"],
+            "description": "The primary content of the memory object; its identifier is the object's own UUID."
         },
         {
             "name": "timestamp",